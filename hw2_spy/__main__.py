@@ -2,14 +2,16 @@
 
 """HW2_Spy main module."""
 import argparse
+import asyncio
 import json
 import logging
 import sys
+import threading
 from typing import Any
 
 from rich.traceback import install
 
-from hw2_spy import hw2_spy_config, hw2_spy_data
+from hw2_spy import hw2_spy_cache, hw2_spy_config, hw2_spy_data, hw2_spy_metadata, hw2_spy_throttle
 
 
 def main() -> None:  # noqa: PLR0915, PLR0912, C901
@@ -59,13 +61,90 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
     parser.add_argument("-w", "--web", action="store_true", help="Enable Web mode")
     parser.add_argument("-j", "--json", action="store_true", help="Enable JSON mode")
     parser.add_argument("-k", "--key", nargs=1, help="Specify an API key")
+    parser.add_argument(
+        "-s",
+        "--shared-throttle",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="Share the API request limit with other running instances, using an optional SQLite file",
+    )
+    parser.add_argument(
+        "--horizon",
+        type=float,
+        metavar="MINUTES",
+        help=f"Set the minutes of every match analysed, by default {hw2_spy_config.analysis_horizon_ms / 60000:g}",
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        metavar="MINUTES",
+        help=f"Set the minutes between the population samples, by default {hw2_spy_config.analysis_step_ms / 60000:g}",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=hw2_spy_data.PlayerStats.modes,
+        help="Set the mode of the matches analysed, by default the one matching the number of players",
+    )
+    parser.add_argument(
+        "--matches",
+        type=int,
+        metavar="N",
+        help=f"Set the number of last matches analysed, by default {hw2_spy_config.last_matches}",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        metavar="PAGES",
+        help="Set the most pages of 25 matches of the history scanned to find them, "
+        f"by default {hw2_spy_config.history_max_pages}",
+    )
+    parser.add_argument(
+        "--combat",
+        action="store_true",
+        default=None,
+        help="Add the kills and losses of the whole match to every match of the JSON output",
+    )
+    # Define the cache maintenance command
+    commands = parser.add_subparsers(dest="command")
+    cache_parser = commands.add_parser("cache", help="Manage the cache of API responses")
+    cache_commands = cache_parser.add_subparsers(dest="cache_command", required=True)
+    gc_parser = cache_commands.add_parser(
+        "gc", help="Remove the expired responses and the least recently used ones beyond the size budget"
+    )
+    gc_parser.add_argument("--max-bytes", type=int, help="Set the maximum size in bytes of the cache")
+    gc_parser.add_argument("--days", type=int, help="Set the number of days a response is kept")
+    metadata_parser = commands.add_parser("metadata", help="Manage the index of the game metadata")
+    metadata_commands = metadata_parser.add_subparsers(dest="metadata_command", required=True)
+    metadata_commands.add_parser(
+        "update", help="Get the leaders, designations, playlists, ranks and game objects from the API"
+    )
     usage = (
         f"""HW2-Spy v.{version} \n"""
         """hw2-spy [-h] (-r RED [-y YELLOW [-o ORANGE] ] | -b BLUE """
-        """[-c CYAN [-g GREEN]]) [-k KEY] [--tui] [--web] [--json]"""
+        """[-c CYAN [-g GREEN]]) [-k KEY] [-s [FILE]] [--horizon MINUTES] [--step MINUTES] """
+        """[--mode MODE] [--matches N] [--pages PAGES] [--combat] [--tui] [--web] [--json]\n"""
+        """hw2-spy cache gc [--max-bytes MAX_BYTES] [--days DAYS]\n"""
+        """hw2-spy [-k KEY] metadata update"""
     )
     parser.usage = usage
     args = parser.parse_args()
+    if args.command == "cache":
+        removed = hw2_spy_cache.CacheStore().gc(args.max_bytes, None if args.days is None else args.days * 86400)
+        print(json.dumps({"status": "Success", "removed": removed}, indent=4))  # noqa: T201
+        return
+    if args.command == "metadata":
+        hw2api = hw2_spy_data.HW2Api(key=str(args.key[0]) if args.key else None)
+        registry = hw2_spy_metadata.MetadataRegistry.build(hw2api)
+        counts = {
+            "leaders": len(registry.leaders),
+            "designations": len(registry.designations),
+            "playlists": len(registry.playlists),
+            "levels": len(registry.level_numbers),
+            "units": len(registry.units),
+        }
+        print(json.dumps({"status": "Success", **counts}, indent=4))  # noqa: T201
+        return
     # Validate the complex option relationships
     if args.green and not (args.cyan and args.blue):
         parser.error("-g option requires -b and -c")
@@ -80,6 +159,13 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
         parser.error("-web option requires at least -r or -b")
     if args.json and not (args.blue or args.red):
         parser.error("-json option requires at least -r or -b")
+    # analysis horizon and population sampling step of the matches, in milliseconds
+    horizon_ms = None if args.horizon is None else round(args.horizon * 60000)
+    step_ms = None if args.step is None else round(args.step * 60000)
+    if (horizon_ms is not None and horizon_ms <= 0) or (step_ms is not None and step_ms <= 0):
+        parser.error("--horizon and --step options require a positive number of minutes")
+    if (args.matches is not None and args.matches <= 0) or (args.pages is not None and args.pages <= 0):
+        parser.error("--matches and --pages options require a positive number")
     # set the api key (needed in order to fetch data)
     api_key = None
     if args.key:
@@ -91,6 +177,12 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
         print(json.dumps(output, indent=4))  # noqa: T201
         logging.exception("Api key not found. Quitting...")
         sys.exit(1)
+    # set the throttle backend, shared with other processes when requested
+    throttle_backend = None
+    if args.shared_throttle is not None:
+        throttle_backend = hw2_spy_throttle.SQLiteThrottle(
+            args.shared_throttle or None, hw2_spy_config.api_max_requests, hw2_spy_config.api_interval_seconds
+        )
     # Determine the mode by the given number of players
     if args.green or args.orange:
         mode = "3vs3"
@@ -101,6 +193,12 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
     else:
         # default when no gamertags given
         mode = "1vs1"
+    # the matches analysed may be of another mode than the one played
+    match_mode = mode if args.mode is None else args.mode
+    # Prune the cache in the background, so the startup doesn't depend on its size
+    threading.Thread(target=hw2_spy_cache.CacheStore().gc, name="cache-gc", daemon=True).start()
+    # Load the metadata index, built from the samples on the first run
+    hw2_spy_metadata.get_registry()
     #
     p1g = None
     p2g = None
@@ -123,34 +221,49 @@ def main() -> None:  # noqa: PLR0915, PLR0912, C901
                 p2g = args.yellow[0]
                 if args.orange:
                     p3g = args.orange[0]
-        app = hw2_spy_tui.HW2SpyApp(mode, color, p1g, p2g, p3g, api_key)
+        app = hw2_spy_tui.HW2SpyApp(
+            mode,
+            color,
+            p1g,
+            p2g,
+            p3g,
+            api_key,
+            throttle_backend,
+            horizon_ms,
+            step_ms,
+            match_mode=match_mode,
+            max_matches=args.matches,
+            max_pages=args.pages,
+        )
         app.run()
     else:
+        from hw2_spy import hw2_spy_async
+
         # set the HW2Api instance in order to centralise the access to the API
-        hw2api = hw2_spy_data.HW2Api(key=api_key)
-        # Clear the cache
-        hw2api.clear_cache()
-        # Get the stats for every specified player
+        hw2api = hw2_spy_data.HW2Api(key=api_key, throttle_backend=throttle_backend)
+        # Get the stats for every specified player at once
+        gamertags = {
+            color: getattr(args, color)[0]
+            for color in ("red", "blue", "yellow", "cyan", "orange", "green")
+            if getattr(args, color)
+        }
         stats: dict[str, Any] = {}
-        stats["data"] = {}
-        if args.red:
-            player = hw2_spy_data.PlayerStats(args.red[0], mode, hw2api)
-            stats["data"]["red"] = player.export_json()
-        if args.blue:
-            player = hw2_spy_data.PlayerStats(args.blue[0], mode, hw2api)
-            stats["data"]["blue"] = player.export_json()
-        if args.yellow:
-            player = hw2_spy_data.PlayerStats(args.yellow[0], mode, hw2api)
-            stats["data"]["yellow"] = player.export_json()
-        if args.cyan:
-            player = hw2_spy_data.PlayerStats(args.cyan[0], mode, hw2api)
-            stats["data"]["cyan"] = player.export_json()
-        if args.orange:
-            player = hw2_spy_data.PlayerStats(args.orange[0], mode, hw2api)
-            stats["data"]["orange"] = player.export_json()
-        if args.green:
-            player = hw2_spy_data.PlayerStats(args.green[0], mode, hw2api)
-            stats["data"]["green"] = player.export_json()
+        async_api = hw2_spy_async.AsyncHW2Api(hw2api=hw2api)
+        try:
+            stats["data"] = asyncio.run(
+                hw2_spy_async.scout(
+                    gamertags,
+                    match_mode,
+                    async_api,
+                    horizon_ms=horizon_ms,
+                    step_ms=step_ms,
+                    max_matches=args.matches,
+                    max_pages=args.pages,
+                    combat=args.combat,
+                )
+            )
+        finally:
+            async_api.close()
         stats["status"] = "Success"
         json_data = json.dumps(stats, indent=4)
         print(json_data)  # noqa: T201
@@ -0,0 +1,610 @@
+"""HW2_Spy asyncio api access module."""
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import logging
+from collections.abc import AsyncIterator, Callable, Iterable, Mapping
+from typing import Any, TypeVar
+
+from hw2_spy.hw2_spy_data import HW2Api, MatchEvents, MatchHistory, PlayerStats, PlaylistRatings, RatingsResolver
+from hw2_spy.hw2_spy_models import MatchRecord
+
+T = TypeVar("T")
+
+
+class AsyncHW2Api:
+    """Asyncio flavour of the HW2Api class, able to run several API calls concurrently.
+
+    Every call is executed by the wrapped HW2Api instance in a worker thread, so the
+    sliding window throttle, the cache and the error handling are shared with the
+    synchronous API. Every call in flight has its own worker thread, up to `max_workers`,
+    so the calls waiting for the throttle are let in by the priority scheduler of the
+    HW2Api instance, history and ratings first, rather than in the order they were made.
+    The worker threads are stopped by `close`, or when leaving an `async with` block.
+    """
+
+    # Most worker threads, more calls in flight wait for a thread in the order they were made
+    max_workers = 64
+
+    def __init__(  # noqa: PLR0913
+        self,
+        key: str | None = None,
+        max_requests: int = 10,
+        interval_seconds: int = 10,
+        hw2api: HW2Api | None = None,
+        *,
+        close_when_idle: bool = False,
+    ) -> None:
+        """Initialize variables when instantiating AsyncHW2Api class.
+
+        Parameters
+        ----------
+        key : str | None, optional
+            The API key for accessing the Halo API, by default None
+        max_requests : int, optional
+            The maximum number of requests allowed per interval before
+            throttling is activated, by default 10
+        interval_seconds : int, optional
+            The time interval in seconds during which the maximum
+            number of requests is defined, by default 10
+        hw2api : HW2Api | None, optional
+            An existent instance of the HW2Api class in order to use
+            a shared queue, if None is specified a new local one is
+            created from the other parameters, by default None
+        close_when_idle : bool, optional
+            Whether to stop the worker threads whenever no call is in flight,
+            for the instances nobody closes, by default False
+
+        Raises
+        ------
+        ValueError
+            When a value is passed thru hw2api parameter that is not actually
+            an instance of the HW2Api class.
+        """
+        if hw2api is None:
+            hw2api = HW2Api(key=key, max_requests=max_requests, interval_seconds=interval_seconds)
+        elif not isinstance(hw2api, HW2Api):
+            msg = "hw2api parameter must be an instance of the HW2Api class."
+            raise ValueError(msg)
+        self.hw2api = hw2api
+        self.close_when_idle = close_when_idle
+        # Worker threads running the blocking calls, mostly idle while waiting for the throttle,
+        # started by the first call, and calls in flight
+        self.executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self.in_flight = 0
+
+    async def __aenter__(self) -> "AsyncHW2Api":
+        """Enter the async context, the worker threads being stopped when leaving it.
+
+        Returns
+        -------
+        AsyncHW2Api
+            The instance itself.
+        """
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop the worker threads when leaving the async context.
+
+        Parameters
+        ----------
+        *exc_info : object
+            The exception raised in the context, if any.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker threads, once the calls in flight are done.
+
+        A later call starts new worker threads, the wrapped HW2Api instance is left untouched.
+        """
+        self._shutdown(wait=True)
+
+    def _shutdown(self, *, wait: bool) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+            self.executor = None
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        # The call is given a worker thread right away, where it waits for the throttle by the
+        # priority of its endpoint, in the scheduler shared with the synchronous calls
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="AsyncHW2Api"
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args))
+        finally:
+            self.in_flight -= 1
+            if self.close_when_idle and not self.in_flight:
+                # the threads of a cancelled call finish on their own
+                self._shutdown(wait=False)
+
+    async def get_player_playlist_ratings(
+        self, playlist: str | None = None, gamertags: Iterable[str] | None = None
+    ) -> dict[str, Any]:
+        """Get the player ratings from the API for a given playlist and up to 6 gamertags.
+
+        Parameters
+        ----------
+        playlist : str | None, optional
+            The playlist ID, by default None
+        gamertags : Iterable[str] | None, optional
+            A list of gamertags, by default None
+
+        Returns
+        -------
+        dict[str, Any]
+            A dictionary with the ratings for every gamertag on the given playlist.
+        """
+        return await self._run(self.hw2api.get_player_playlist_ratings, playlist, gamertags)
+
+    async def get_player_match_history(self, gamertag: str, start: int = 0, count: int | None = None) -> dict[str, Any]:
+        """Get a page of the match history for a given gamertag from the API.
+
+        Parameters
+        ----------
+        gamertag : str
+            The gamertag for which to retrieve the match history.
+        start : int, optional
+            The number of most recent matches to skip, by default 0
+        count : int | None, optional
+            The number of matches of the page, at most history_page_size,
+            if None the API default is used, by default None (25 matches)
+
+        Returns
+        -------
+        dict[str, Any]
+            The match history page for the given gamertag.
+        """
+        return await self._run(self.hw2api.get_player_match_history, gamertag, start, count)
+
+    async def iter_player_match_history(
+        self, gamertag: str, start: int = 0, count: int | None = None, max_pages: int | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Iterate over the matches of a given gamertag, from the most recent, a page at a time.
+
+        A page is requested only once the matches of the previous one have been consumed,
+        so a caller which stops iterating doesn't pay for the next pages.
+
+        Parameters
+        ----------
+        gamertag : str
+            The gamertag for which to retrieve the match history.
+        start : int, optional
+            The number of most recent matches to skip, by default 0
+        count : int | None, optional
+            The number of matches of every page, at most history_page_size,
+            if None history_page_size is used, by default None
+        max_pages : int | None, optional
+            The most pages requested, if None the whole history
+            is gone through, by default None
+
+        Yields
+        ------
+        dict[str, Any]
+            The next match, as returned by the API.
+        """
+        page_size = self.hw2api.history_page_size
+        count = page_size if count is None else min(count, page_size)
+        pages = itertools.count() if max_pages is None else range(max_pages)
+        for _ in pages:
+            page = await self.get_player_match_history(gamertag, start, count)
+            results = page.get("Results") or []
+            for match in results:
+                yield match
+            # a short page is the last one
+            if len(results) < count:
+                return
+            start += len(results)
+
+    async def get_match_events(self, match_id: str | None = None, horizon_ms: int | None = None) -> dict[str, Any]:
+        """Get the events for a given match.
+
+        Parameters
+        ----------
+        match_id : str | None, optional
+            The match ID, by default None
+        horizon_ms : int | None, optional
+            The last millisecond of the match to analyse, when given the events
+            past it are not decoded, except for the building completions and the
+            match end, by default None (every event)
+
+        Returns
+        -------
+        dict[str, Any]
+            The match events.
+        """
+        return await self._run(self.hw2api.get_match_events, match_id, horizon_ms)
+
+
+def _async_api(hw2api: AsyncHW2Api | None) -> AsyncHW2Api:
+    # Setup the API instance, the one created here stopping its worker threads whenever idle, as nobody closes it
+    if hw2api is None:
+        return AsyncHW2Api(close_when_idle=True)
+    if not isinstance(hw2api, AsyncHW2Api):
+        msg = "hw2api parameter must be an instance of the AsyncHW2Api class."
+        raise ValueError(msg)  # noqa: TRY004
+    return hw2api
+
+
+class AsyncMatchHistory(MatchHistory):
+    """Retrieve and manage the 25 last matches for a given user, using asyncio.
+
+    Setting the gamertag doesn't trigger any API call, await `afetch` to get the data.
+    """
+
+    def __init__(self, gamertag: str, hw2api: AsyncHW2Api | None = None) -> None:
+        """Init vars according to given parameters.
+
+        Parameters
+        ----------
+        gamertag : str
+            A gamertag to retrieve the history for.
+        hw2api : AsyncHW2Api | None, optional
+            An existent instance of the AsyncHW2Api class in order to use
+            a shared queue, if None is specified a new local one is
+            created, by default None
+        """
+        self.async_api = _async_api(hw2api)
+        super().__init__(gamertag, self.async_api.hw2api, lazy=True)
+
+    async def afetch(self) -> dict[str, Any]:
+        """Get and process the match history for the gamertag of the instance.
+
+        Returns
+        -------
+        dict[str, Any]
+            A summary of data extracted from match history.
+        """
+        self.match_history = {}
+        self.last_matches = []
+        self.player_stats = {}
+        self.match_history = await self.async_api.get_player_match_history(self.gamertag)
+        if self.match_history:
+            self.process()
+        else:
+            logging.error("Can't get the match history, please check the gamertag and the api key.")
+        return self.player_stats
+
+    async def fetch_last_matches(
+        self, play_list_ids: Iterable[str], max_matches: int = 3, max_pages: int = 1
+    ) -> list[dict[str, Any]]:
+        """Get a number of last matches for the given playlists from the match history.
+
+        Parameters
+        ----------
+        play_list_ids : Iterable[str]
+            The playlist IDs for the matches to be collected.
+        max_matches : int, optional
+            The number of matches to collect, by default 3
+        max_pages : int, optional
+            The most pages of the match history scanned, the next pages
+            being requested only while the matches collected fall short,
+            by default 1 (the fetched matches only)
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            The selected last matches.
+        """
+        last_matches = self.get_last_matches(play_list_ids, max_matches)
+        results = self.match_history.get("Results") or []
+        if len(last_matches) < max_matches and max_pages > 1 and len(results) >= self.hw2api.history_page_size:
+            matches = self.async_api.iter_player_match_history(self.gamertag, len(results), max_pages=max_pages - 1)
+            async for match in matches:
+                if match["PlaylistId"] in play_list_ids:
+                    last_matches.append(self.last_match(match))
+                    if len(last_matches) >= max_matches:
+                        break
+        self.last_matches = last_matches
+        return last_matches
+
+
+class AsyncMatchEvents(MatchEvents):
+    """Retrieve, manage and extract data from match events for a given match and gamertag, using asyncio.
+
+    Setting the match ID or the gamertag doesn't trigger any API call, await `afetch` to get the data.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        match_id: str | None = None,
+        gamertag: str | None = None,
+        hw2api: AsyncHW2Api | None = None,
+        *,
+        horizon_ms: int | None = None,
+        step_ms: int | None = None,
+        retain_events: bool | None = None,
+    ) -> None:
+        """Init the vars according to the given parameters.
+
+        Parameters
+        ----------
+        match_id : str | None, optional
+            match ID to extract data from, by default None
+        gamertag : str | None, optional
+            gamertag to extract data for, by default None
+        hw2api : AsyncHW2Api | None, optional
+            An existent instance of the AsyncHW2Api class in order to use
+            a shared queue, if None is specified a new local one is
+            created, by default None
+        horizon_ms : int | None, optional
+            The last millisecond of the match analysed, if None
+            the horizon_ms class attribute is used, by default None
+        step_ms : int | None, optional
+            The milliseconds between the population samples, if None
+            the step_ms class attribute is used, by default None
+        retain_events : bool | None, optional
+            Whether to keep the decoded events once processed, if None
+            the retain_events class attribute is used, by default None
+        """
+        self.async_api = _async_api(hw2api)
+        super().__init__(
+            match_id,
+            gamertag,
+            self.async_api.hw2api,
+            horizon_ms=horizon_ms,
+            step_ms=step_ms,
+            retain_events=retain_events,
+            lazy=True,
+        )
+
+    async def afetch(self) -> dict[str, Any]:
+        """Get the match events and, when a gamertag is set, calculate its summary.
+
+        The summary stored by a previous run is used when available, without getting the events.
+
+        Returns
+        -------
+        dict[str, Any]
+            The match summary for the gamertag of the instance.
+        """
+        if self.gamertag and self.load_summary(self.match_id, self.gamertag):
+            return self.match_summary
+        self.match_events = {}
+        self.match_events = await self.async_api.get_match_events(self.match_id, self.horizon_ms)
+        if self.match_events and self.gamertag:
+            self.process()
+        return self.match_summary
+
+
+class AsyncPlayerStats(PlayerStats):
+    """Consolidate a set of player stats running the needed API calls concurrently.
+
+    Setting the gamertag doesn't trigger any API call, await `afetch` to get the data.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        gamertag: str,
+        mode: str | None = None,
+        hw2api: AsyncHW2Api | None = None,
+        resolve_ratings: bool = True,  # noqa: FBT001, FBT002
+        *,
+        horizon_ms: int | None = None,
+        step_ms: int | None = None,
+        max_matches: int | None = None,
+        max_pages: int | None = None,
+        combat: bool | None = None,
+    ) -> None:
+        """Init player stats for a given gamertag and game mode.
+
+        Parameters
+        ----------
+        gamertag : str
+            A gamertag to get the stats for.
+        mode : str | None, optional
+            A game mode to get the extended stats for,
+            valid values are 1vs1, 2vs2, 3vs3, by default None (1vs1)
+        hw2api : AsyncHW2Api | None, optional
+            An existent instance of the AsyncHW2Api class in order to use
+            a shared queue, if None is specified a new local one is
+            created, by default None
+        resolve_ratings : bool, optional
+            Whether to fetch the ratings missing from the match history
+            along with the matches, when False the missing modes are kept
+            in `missing_modes` to be resolved later for a whole team with
+            `resolve_ratings`, by default True
+        horizon_ms : int | None, optional
+            The last millisecond of the matches analysed, if None
+            the MatchEvents default is used, by default None
+        step_ms : int | None, optional
+            The milliseconds between the population samples of the matches,
+            if None the MatchEvents default is used, by default None
+        max_matches : int | None, optional
+            The number of last matches of the mode summarized, if None
+            the max_matches class attribute is used, by default None
+        max_pages : int | None, optional
+            The most pages of 25 matches of the history scanned to find
+            them, a page being requested only while they fall short, if
+            None the max_pages class attribute is used, by default None
+        combat : bool | None, optional
+            Whether to add the kills and losses of the whole match to the
+            matches summarized, if None the combat class attribute is
+            used, by default None
+        """
+        self.async_api = _async_api(hw2api)
+        super().__init__(
+            gamertag,
+            mode,
+            self.async_api.hw2api,
+            resolve_ratings,
+            horizon_ms=horizon_ms,
+            step_ms=step_ms,
+            max_matches=max_matches,
+            max_pages=max_pages,
+            combat=combat,
+            lazy=True,
+        )
+
+    async def afetch(self) -> None:
+        """Get the stats for the gamertag and mode of the instance.
+
+        Once the match history is known, the missing ratings and the events
+        of the last matches are requested all at once.
+        """
+        await self.afetch_ranks()
+        await self.afetch_matches()
+
+    async def afetch_ranks(self) -> None:
+        """Get the match history and the ratings of the gamertag, without the match events.
+
+        The last matches of the mode are kept, so that `afetch_matches` can get their events later.
+        """
+        self.last_matches = []
+        if not self.gamertag:
+            return
+        history = AsyncMatchHistory(self.gamertag, self.async_api)
+        player = await history.afetch()
+        # If got results put the data into the class attributes
+        # Otherwise don't make additional api calls for this gamertag
+        if not player:
+            return
+        self.missing_modes = self._process_history_stats(player)
+        missing_modes = self.missing_modes if self.resolve_ratings else []
+        if self.mode in self.hw2api.play_lists:
+            self.last_matches = await history.fetch_last_matches(
+                self.hw2api.play_lists[self.mode], self.max_matches, self.max_pages
+            )
+        results = await asyncio.gather(*(self._fetch_ratings(missing_mode) for missing_mode in missing_modes))
+        for missing_mode, ratings in zip(missing_modes, results, strict=True):
+            self._process_ratings(missing_mode, ratings)
+        if self.resolve_ratings:
+            self.missing_modes = []
+
+    async def afetch_matches(self) -> None:
+        """Get the events of the last matches found by `afetch_ranks` and add their summary to the stats."""
+        events = [
+            AsyncMatchEvents(
+                match["MatchId"],
+                self.gamertag,
+                self.async_api,
+                horizon_ms=self.horizon_ms,
+                step_ms=self.step_ms,
+                retain_events=False,
+            )
+            for match in self.last_matches
+        ]
+        await asyncio.gather(*(match_events.afetch() for match_events in events))
+        summaries = [match_events.match_summary for match_events in events]
+        if self.combat:
+            # a pass over all the events of every match, in threads of their own
+            summaries = await asyncio.gather(
+                *(asyncio.to_thread(self._with_combat, match_events) for match_events in events)
+            )
+        for match, summary in zip(self.last_matches, summaries, strict=True):
+            self.matches.append(MatchRecord.from_summary(match, summary))
+
+    async def _fetch_ratings(self, mode: str) -> dict[str, Any]:
+        # probably none of the last 25 matches were related
+        # so fetch this data from the player_playlist_ratings api
+        playlist = self.hw2api.play_lists[mode][0]
+        ratings = await self.async_api.get_player_playlist_ratings(playlist, [self.gamertag])
+        return PlaylistRatings(hw2api=self.hw2api).summarize(playlist, self.gamertag, ratings)
+
+
+async def resolve_ratings(players: Iterable[PlayerStats], hw2api: AsyncHW2Api | None = None) -> None:
+    """Resolve the ratings missing from the match history of several players with one call per playlist.
+
+    Parameters
+    ----------
+    players : Iterable[PlayerStats]
+        The player stats to resolve the missing ratings for,
+        built with resolve_ratings set to False.
+    hw2api : AsyncHW2Api | None, optional
+        An existent instance of the AsyncHW2Api class in order to use
+        a shared queue, if None is specified a new local one is
+        created, by default None
+    """
+    hw2api = _async_api(hw2api)
+    resolver = RatingsResolver(players, hw2api.hw2api)
+    calls = resolver.pending()
+    results = await asyncio.gather(
+        *(hw2api.get_player_playlist_ratings(playlist, gamertags) for _, playlist, gamertags in calls)
+    )
+    for (mode, playlist, _), ratings in zip(calls, results, strict=True):
+        resolver.apply(mode, playlist, ratings)
+
+
+async def scout(  # noqa: PLR0913
+    gamertags: Mapping[str, str],
+    mode: str,
+    hw2api: AsyncHW2Api | None = None,
+    *,
+    horizon_ms: int | None = None,
+    step_ms: int | None = None,
+    max_matches: int | None = None,
+    max_pages: int | None = None,
+    combat: bool | None = None,
+) -> dict[str, Any]:
+    """Get the stats for several players at once.
+
+    Parameters
+    ----------
+    gamertags : Mapping[str, str]
+        The gamertags to get the stats for, keyed by their team color.
+    mode : str
+        A game mode to get the extended stats for, valid values are 1vs1, 2vs2, 3vs3.
+    hw2api : AsyncHW2Api | None, optional
+        An existent instance of the AsyncHW2Api class in order to use
+        a shared queue, if None is specified a new local one is
+        created, by default None
+    horizon_ms : int | None, optional
+        The last millisecond of the matches analysed, if None
+        the MatchEvents default is used, by default None
+    step_ms : int | None, optional
+        The milliseconds between the population samples of the matches,
+        if None the MatchEvents default is used, by default None
+    max_matches : int | None, optional
+        The number of last matches of the mode summarized for every player,
+        if None the PlayerStats default is used, by default None
+    max_pages : int | None, optional
+        The most pages of the history of every player scanned to find them,
+        if None the PlayerStats default is used, by default None
+    combat : bool | None, optional
+        Whether to add the kills and losses of the whole match to the matches
+        summarized, if None the PlayerStats default is used, by default None
+
+    Returns
+    -------
+    dict[str, Any]
+        The consolidated stats of every player, keyed by their team color.
+    """
+    if hw2api is None:
+        # the instance created here isn't shared, so its worker threads are stopped once done
+        async with AsyncHW2Api() as async_api:
+            return await scout(
+                gamertags,
+                mode,
+                async_api,
+                horizon_ms=horizon_ms,
+                step_ms=step_ms,
+                max_matches=max_matches,
+                max_pages=max_pages,
+                combat=combat,
+            )
+    hw2api = _async_api(hw2api)
+    players = {
+        color: AsyncPlayerStats(
+            gamertag,
+            mode,
+            hw2api,
+            resolve_ratings=False,
+            horizon_ms=horizon_ms,
+            step_ms=step_ms,
+            max_matches=max_matches,
+            max_pages=max_pages,
+            combat=combat,
+        )
+        for color, gamertag in gamertags.items()
+    }
+    # Ranks of the whole team first, so they don't wait behind the match events
+    await asyncio.gather(*(player.afetch_ranks() for player in players.values()))
+    # A single ratings call per playlist for the whole team
+    await asyncio.gather(
+        resolve_ratings(players.values(), hw2api), *(player.afetch_matches() for player in players.values())
+    )
+    return {color: player.export_json() for color, player in players.items()}
@@ -0,0 +1,396 @@
+"""HW2_Spy api response caching module."""
+import contextlib
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Mapping
+from typing import Any, Generic, TypeVar
+
+from hw2_spy import hw2_spy_config
+
+T = TypeVar("T")
+
+# Folder where the previous versions cached the match events, one file per match
+LEGACY_EVENTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "matches", "events")
+
+
+class CacheStore:
+    """Single SQLite file holding the cached API responses, indexed by endpoint and key.
+
+    Every entry records its insertion time, last access time and size, so lookups
+    go through the primary key, and expiring old entries or evicting the least
+    recently used ones to fit a byte budget are single indexed queries. The access
+    time is only updated when older than a granularity, so most lookups don't write.
+    """
+
+    # Seconds an access time is kept before a lookup updates it
+    access_granularity_seconds = 3600
+
+    def __init__(self, path: str | None = None) -> None:
+        """Init the database file.
+
+        Parameters
+        ----------
+        path : str | None, optional
+            The database file, if None the one in the package cache
+            folder is used, by default None
+        """
+        if path is None:
+            script_directory = os.path.dirname(os.path.abspath(__file__))
+            path = os.path.join(script_directory, "cache", "cache.sqlite3")
+        self.path = path
+        # make sure folder exists
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            # Free pages can be given back to the file system after evictions, only taken
+            # into account when the file is created
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # Readers don't wait for the writers
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "endpoint TEXT NOT NULL, key TEXT NOT NULL, data BLOB NOT NULL, inserted REAL NOT NULL, "
+                "accessed REAL NOT NULL, size INTEGER NOT NULL, PRIMARY KEY (endpoint, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_inserted ON entries (inserted)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, every statement is atomic on its own
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    def get(self, endpoint: str, key: str) -> tuple[bytes, float] | None:
+        """Get a cached entry.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint the entry belongs to.
+        key : str
+            The key identifying the entry.
+
+        Returns
+        -------
+        tuple[bytes, float] | None
+            The entry data and its insertion timestamp, or None when not cached.
+        """
+        current_time = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data, inserted, accessed FROM entries WHERE endpoint = ? AND key = ?", (endpoint, key)
+            ).fetchone()
+            if row is not None and row[2] < current_time - self.access_granularity_seconds:
+                conn.execute(
+                    "UPDATE entries SET accessed = ? WHERE endpoint = ? AND key = ?", (current_time, endpoint, key)
+                )
+        finally:
+            conn.close()
+        return None if row is None else (bytes(row[0]), float(row[1]))
+
+    def put(self, endpoint: str, key: str, data: bytes) -> None:
+        """Store an entry, replacing the previous one with the same key.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint the entry belongs to.
+        key : str
+            The key identifying the entry.
+        data : bytes
+            The entry data.
+        """
+        self.put_many(endpoint, {key: data})
+
+    def put_many(self, endpoint: str, entries: Mapping[str, bytes]) -> None:
+        """Store several entries at once, replacing the previous ones with the same keys.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint the entries belong to.
+        entries : Mapping[str, bytes]
+            The data of the entries, by key.
+        """
+        current_time = time.time()
+        conn = self._connect()
+        try:
+            # a single transaction for all the entries
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries (endpoint, key, data, inserted, accessed, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(endpoint, key, data, current_time, current_time, len(data)) for key, data in entries.items()],
+                )
+        finally:
+            conn.close()
+
+    def expire(self, max_age_seconds: float) -> int:
+        """Remove the entries inserted before the given age.
+
+        Parameters
+        ----------
+        max_age_seconds : float
+            The age in seconds from which an entry is removed.
+
+        Returns
+        -------
+        int
+            The number of removed entries.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute("DELETE FROM entries WHERE inserted < ?", (time.time() - max_age_seconds,))
+        finally:
+            conn.close()
+        return cursor.rowcount
+
+    def import_legacy_events(self, folder: str = LEGACY_EVENTS_FOLDER) -> int:
+        """Move the match events cached as files by the previous versions into the store, then remove the folder.
+
+        The files keep their modification time as insertion time, so they are expired
+        with the other entries, and don't replace the events already in the store.
+
+        Parameters
+        ----------
+        folder : str, optional
+            The folder of the match events files, by default LEGACY_EVENTS_FOLDER
+
+        Returns
+        -------
+        int
+            The number of imported files.
+        """
+        try:
+            files = os.listdir(folder)
+        except FileNotFoundError:
+            return 0
+        imported = 0
+        conn = self._connect()
+        try:
+            for file in files:
+                match_id, _, extension = file.partition(".")
+                if extension not in ("json", "json.gz"):
+                    continue
+                path = os.path.join(folder, file)
+                try:
+                    with open(path, "rb") as rfile:
+                        data = rfile.read()
+                    modified = os.path.getmtime(path)
+                except FileNotFoundError:
+                    # already moved by a match events request
+                    continue
+                except OSError:
+                    logging.exception("Can't read the legacy match events %s.", path)
+                    continue
+                if extension == "json":
+                    data = gzip.compress(data)
+                conn.execute(
+                    "INSERT OR IGNORE INTO entries (endpoint, key, data, inserted, accessed, size) "
+                    "VALUES ('events', ?, ?, ?, ?, ?)",
+                    (match_id, data, modified, modified, len(data)),
+                )
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                imported += 1
+        finally:
+            conn.close()
+        # remove the emptied legacy folders, kept when something else is left in them
+        with contextlib.suppress(OSError):
+            os.rmdir(folder)
+            os.rmdir(os.path.dirname(folder))
+        logging.info("Imported %s legacy match events files.", imported)
+        return imported
+
+    def gc(self, max_bytes: int | None = None, max_age_seconds: float | None = None) -> int:
+        """Expire the old entries, then evict the least recently used ones until the store fits its byte budget.
+
+        The match events cached as files by the previous versions are imported first.
+
+        Parameters
+        ----------
+        max_bytes : int | None, optional
+            The maximum size in bytes of the cached data, loaded
+            from the config file when None, by default None
+        max_age_seconds : float | None, optional
+            The age in seconds from which an entry is removed, loaded
+            from the config file when None, by default None
+
+        Returns
+        -------
+        int
+            The number of removed entries.
+        """
+        if max_bytes is None:
+            max_bytes = hw2_spy_config.cache_max_bytes
+        if max_age_seconds is None:
+            max_age_seconds = hw2_spy_config.cache_max_days * 86400
+        self.import_legacy_events()
+        removed = self.expire(max_age_seconds)
+        conn = self._connect()
+        try:
+            # keep the most recently used entries as long as their running total fits the budget
+            cursor = conn.execute(
+                "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM (SELECT rowid, SUM(size) OVER "
+                "(ORDER BY accessed DESC, rowid DESC) AS running_size FROM entries) WHERE running_size > ?)",
+                (max_bytes,),
+            )
+            removed += cursor.rowcount
+            conn.execute("PRAGMA incremental_vacuum")
+        finally:
+            conn.close()
+        logging.info("Removed %s cached responses.", removed)
+        return removed
+
+
+class ResponseCache:
+    """Cache of API responses with a freshness window per endpoint.
+
+    A response younger than the endpoint time to live is fresh and can be served
+    without calling the API. Once expired, it is still served as stale during the
+    endpoint stale window, while it is refreshed in the background.
+    """
+
+    def __init__(
+        self,
+        store: CacheStore | None = None,
+        ttl_seconds: Mapping[str, float] | None = None,
+        stale_seconds: Mapping[str, float] | None = None,
+    ) -> None:
+        """Init the cache store and the freshness windows.
+
+        Parameters
+        ----------
+        store : CacheStore | None, optional
+            The store where responses are kept, if None the one
+            in the package cache folder is used, by default None
+        ttl_seconds : Mapping[str, float] | None, optional
+            The seconds a response is fresh, by endpoint, loaded from the
+            config file when None, by default None
+        stale_seconds : Mapping[str, float] | None, optional
+            The seconds an expired response can still be served while it is
+            refreshed, by endpoint, loaded from the config file when None,
+            by default None
+        """
+        self.store = store if store is not None else CacheStore()
+        self.ttl_seconds = hw2_spy_config.cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.stale_seconds = hw2_spy_config.cache_stale_seconds if stale_seconds is None else stale_seconds
+
+    def get(self, endpoint: str, key: str) -> tuple[dict[str, Any] | None, bool]:
+        """Get a cached response.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint the response belongs to.
+        key : str
+            The key identifying the request, usually its url.
+
+        Returns
+        -------
+        tuple[dict[str, Any] | None, bool]
+            The response, or None when not cached or too old to be served,
+            and whether it is still fresh.
+        """
+        ttl = self.ttl_seconds.get(endpoint, 0)
+        if ttl <= 0:
+            return None, False
+        entry = self.store.get(endpoint, key.casefold())
+        if entry is None:
+            return None, False
+        data, inserted = entry
+        age = time.time() - inserted
+        if age > ttl + self.stale_seconds.get(endpoint, 0):
+            return None, False
+        try:
+            return json.loads(data), age <= ttl
+        except ValueError:
+            return None, False
+
+    def put(self, endpoint: str, key: str, response: Mapping[str, Any]) -> None:
+        """Store a response in the cache.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint the response belongs to.
+        key : str
+            The key identifying the request, usually its url.
+        response : Mapping[str, Any]
+            The response to store.
+        """
+        if self.ttl_seconds.get(endpoint, 0) <= 0:
+            return
+        self.store.put(endpoint, key.casefold(), json.dumps(response).encode())
+
+
+class SingleFlight(Generic[T]):
+    """In-memory registry running the loader of every key at most once, even for concurrent callers.
+
+    While a key is being loaded, the other callers asking for it wait for that load
+    to finish and share its result instead of starting their own. Empty results
+    are not kept, so a failed load is retried by the next caller.
+    """
+
+    def __init__(self) -> None:
+        """Init the loaded results and the keys being loaded."""
+        self.results: dict[str, T] = {}
+        self.loading: dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str, loader: Callable[[], T]) -> T:
+        """Get the result for a key, loading it when needed.
+
+        Parameters
+        ----------
+        key : str
+            The key identifying the result.
+        loader : Callable[[], T]
+            The function loading the result when it is not registered yet.
+
+        Returns
+        -------
+        T
+            The registered or loaded result.
+        """
+        while True:
+            with self.lock:
+                if key in self.results:
+                    return self.results[key]
+                event = self.loading.get(key)
+                if event is None:
+                    # this caller will load the key
+                    event = threading.Event()
+                    self.loading[key] = event
+                    break
+            # wait for the caller loading the key and look again
+            event.wait()
+        try:
+            result = loader()
+            if result:
+                with self.lock:
+                    self.results[key] = result
+        finally:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+        return result
+
+    def discard(self, key: str) -> None:
+        """Forget the result of a key, so that it can be freed and the next caller loads it again.
+
+        Parameters
+        ----------
+        key : str
+            The key identifying the result.
+        """
+        with self.lock:
+            self.results.pop(key, None)
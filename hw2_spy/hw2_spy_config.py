@@ -3,6 +3,32 @@ __version__ = "1.1.4"
 # api_key: str = "your_key_here"  # noqa: ERA001
 api_max_requests: int = 10
 api_interval_seconds: int = 10
+# SQLite file shared by the processes throttling their requests together
+api_throttle_file: str | None = None
+# Retry policy for rate limited (429), transient (5xx) and connection errors, by endpoint
+api_retry_attempts: dict[str, int] = {"history": 4, "ratings": 4, "events": 3, "metadata": 3}
+# Maximum seconds spent waiting between the attempts of a request, by endpoint
+api_retry_seconds: dict[str, float] = {"history": 30, "ratings": 30, "events": 60, "metadata": 60}
+# Base delay of the exponential backoff when the API doesn't send a Retry-After header
+api_retry_backoff_seconds: float = 1.0
+# Seconds a cached response is served without calling the API, by endpoint (0 disables the cache)
+cache_ttl_seconds: dict[str, int] = {"history": 300, "ratings": 900}
+# Seconds an expired response is still served while it is refreshed in the background, by endpoint
+cache_stale_seconds: dict[str, int] = {"history": 1800, "ratings": 3600}
+# Days a cached response is kept, and maximum size in bytes of the cached data, least recently used first out
+cache_max_days: int = 7
+cache_max_bytes: int = 256 * 1024 * 1024
+# Last millisecond of the matches analysed, and milliseconds between the population samples
+analysis_horizon_ms: int = 720000
+analysis_step_ms: int = 120000
+# Last millisecond searched for the building completions and the tech ups past the analysed part of the
+# matches, None searches the whole match, a building completed or a tech level reached later is not counted
+analysis_late_horizon_ms: int | None = None
+# Number of last matches analysed, and most pages of 25 matches of the history scanned to find them
+last_matches: int = 3
+history_max_pages: int = 1
+# Whether to add the kills and losses of the whole match to the matches analysed, which takes a pass over all its events
+analysis_combat: bool = False
 
 leaders: dict[int, str] = {
     1: "Cutter",
@@ -1,21 +1,33 @@
 """HW2_Spy api access and data processing module."""
+import concurrent.futures
+import contextlib
+import copy
 import datetime
+import email.utils
+import functools
+import gzip
+import itertools
 import json
 import logging
 import os
+import random
 import re
+import sqlite3
 import sys
+import threading
 import time
 
 # types
-from collections import deque
-from collections.abc import Iterable, Mapping
-from typing import Any
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import Any, ClassVar
 
+import numpy as np
 import urllib3
-from dateutil.parser import isoparse
 
-from hw2_spy import hw2_spy_config
+from hw2_spy import hw2_spy_config, hw2_spy_events, hw2_spy_extractors, hw2_spy_metadata, hw2_spy_timeline
+from hw2_spy.hw2_spy_cache import LEGACY_EVENTS_FOLDER, CacheStore, ResponseCache, SingleFlight
+from hw2_spy.hw2_spy_models import MatchRecord, Rating
+from hw2_spy.hw2_spy_throttle import LocalThrottle, PriorityScheduler, SQLiteThrottle, Throttle
 
 
 def get_version() -> str:
@@ -29,6 +41,46 @@ def get_version() -> str:
     return str(hw2_spy_config.__version__) if hasattr(hw2_spy_config, "__version__") else "?"
 
 
+def deep_sizeof(obj: object) -> int:
+    """Get the memory used by an object along with every object it references, each counted once.
+
+    Parameters
+    ----------
+    obj : object
+        The object to measure, made of containers, plain or slotted objects and NumPy arrays.
+
+    Returns
+    -------
+    int
+        The size in bytes.
+    """
+    size = 0
+    seen: set[int] = set()
+    pending = [obj]
+    while pending:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, list | tuple | set | frozenset):
+            pending.extend(item)
+        elif isinstance(item, np.ndarray):
+            # the views don't own their data, it is counted with their base array
+            if item.base is not None:
+                pending.append(item.base)
+        elif hasattr(item, "__dict__"):
+            pending.append(vars(item))
+        else:
+            # slotted objects, such as the PlayerStats records
+            slots = (name for cls in type(item).__mro__ for name in getattr(cls, "__slots__", ()))
+            pending.extend(getattr(item, name) for name in slots if hasattr(item, name))
+    return size
+
+
 class HW2Api:
     """Halo Wars 2 API class with builtin sliding window throttle manager and cache.
 
@@ -46,8 +98,23 @@ class HW2Api:
     # urllib3 init
     http = urllib3.PoolManager()
     urllib3.disable_warnings()
-
-    def __init__(self, key: str | None = None, max_requests: int = 10, interval_seconds: int = 10) -> None:
+    # Rate limited and transient server errors worth a retry
+    retry_statuses = ("429", "500", "502", "503", "504")
+    # Throttle priority by endpoint, lower values are served first, so the cheap
+    # history and ratings requests go ahead of the bulky match events
+    priorities: ClassVar[dict[str, int]] = {"history": 0, "ratings": 1, "events": 2, "metadata": 3}
+    # Most matches returned by a page of the match history
+    history_page_size = 25
+
+    def __init__(  # noqa: PLR0912, PLR0913
+        self,
+        key: str | None = None,
+        max_requests: int = 10,
+        interval_seconds: int = 10,
+        throttle_backend: Throttle | None = None,
+        response_cache: ResponseCache | None = None,
+        cache_store: CacheStore | None = None,
+    ) -> None:
         """Initialize variables when instantiating HW2Api class.
 
         Parameters
@@ -61,6 +128,17 @@ class HW2Api:
         interval_seconds : int, optional
             The time interval in seconds during which the maximum
             number of requests is defined, by default 10
+        throttle_backend : Throttle | None, optional
+            The backend keeping the sliding window of requests, if None
+            a SQLiteThrottle is used when a throttle file is configured
+            and a LocalThrottle otherwise, by default None
+        response_cache : ResponseCache | None, optional
+            The cache of match history and ratings responses, if None
+            one is created in the cache store with the freshness windows
+            from the config file, by default None
+        cache_store : CacheStore | None, optional
+            The store keeping the cached API responses, if None the one
+            in the package cache folder is used, by default None
         """
         if key is not None:
             self.key = key
@@ -96,8 +174,25 @@ class HW2Api:
         else:
             # Default access allows 10 calls every 10 seconds
             self.interval_seconds = 10
-        # Init a request queue
-        self.request_queue: deque[float] = deque()
+        # Set the backend keeping the sliding window of requests
+        if throttle_backend is not None:
+            self.throttle_backend = throttle_backend
+        elif hw2_spy_config.api_throttle_file is not None:
+            # Shared with the other processes using the same file
+            self.throttle_backend = SQLiteThrottle(
+                hw2_spy_config.api_throttle_file, self.max_requests, self.interval_seconds
+            )
+        else:
+            self.throttle_backend = LocalThrottle(self.max_requests, self.interval_seconds)
+        self.scheduler = PriorityScheduler(self.throttle_backend)
+        # Set the store of cached responses, and the cache of match history and ratings responses
+        self.cache_store = cache_store if cache_store is not None else CacheStore()
+        self.response_cache = response_cache if response_cache is not None else ResponseCache(self.cache_store)
+        # Urls of the stale responses being refreshed in the background
+        self.revalidating: set[str] = set()
+        self.revalidation_lock = threading.Lock()
+        # Registry of the events decoded during the instance lifetime
+        self.match_events_registry: SingleFlight[dict[str, Any]] = SingleFlight()
 
     @staticmethod
     def id_filter(match_id: str | None) -> str | None:
@@ -152,38 +247,24 @@ class HW2Api:
         """
         return ",".join(str(item) for item in str_list)
 
-    @staticmethod
-    def clear_cache(days_to_keep: int = 7) -> None:
-        """Clear all the cached API calls older than the specified threshold.
+    def clear_cache(self, days_to_keep: int | None = None, max_bytes: int | None = None) -> None:
+        """Clear the cached API calls older than the specified threshold or beyond the cache size budget.
 
         Parameters
         ----------
-        days_to_keep : int, optional
+        days_to_keep : int | None, optional
             The number of days for which a request should be kept in the cache,
-            by default 7
+            loaded from the config file when None, by default None
+        max_bytes : int | None, optional
+            The maximum size in bytes of the cache, the least recently used
+            requests are removed first, loaded from the config file when None,
+            by default None
         """
-        # define the cache folder
-        folder = os.path.join(os.path.dirname(__file__), "/cache/matches/events/")
-        # make sure it exists
-        os.makedirs(folder, exist_ok=True)
-        # os.walk returns current path, its files and its folders
-        for root, dirs, files in os.walk(folder, topdown=True):  # noqa: B007
-            for f in files:
-                file_path = os.path.join(root, f)
-                timestamp_of_file_modified = os.path.getmtime(file_path)
-                # convert timestamp to datetime
-                modification_date = datetime.datetime.fromtimestamp(
-                    timestamp_of_file_modified, tz=datetime.timezone.utc
-                )
-                # find the number of days when the file was modified
-                number_of_days: int = (datetime.datetime.now(tz=datetime.timezone.utc) - modification_date).days
-                if number_of_days > days_to_keep:
-                    os.remove(file_path)
-                    logging.info(" Delete : %s", f)
+        self.cache_store.gc(max_bytes, None if days_to_keep is None else days_to_keep * 86400)
 
     @staticmethod
     def get_spartan_ranks() -> dict[int, int]:
-        """Get the spartan ranks info from the API and produce a workable dict.
+        """Get the spartan ranks info from the metadata registry and produce a workable dict.
 
         Returns
         -------
@@ -191,38 +272,156 @@ class HW2Api:
             Return a dictionary with the rank level as a key, and the
             corresponding amount of XP required for the level as a value.
         """
-        levels = {}
-        script_file_path = os.path.abspath(__file__)
-        script_directory = os.path.dirname(script_file_path)
-        file = os.path.join(script_directory, "samples/spartan-ranks.json")
-        try:
-            with open(file) as rfile:
-                ranks = json.load(rfile)
-        except FileNotFoundError:
-            logging.exception("Can't open Spartan Ranks file.")
-        for rank in ranks["ContentItems"]:
-            levels[int(rank["View"]["HW2SpartanRank"]["RankNumber"])] = int(rank["View"]["HW2SpartanRank"]["StartXP"])
-        return dict(sorted(levels.items()))
-
-    def throttle(self) -> None:
-        """Manage the request queue and throttle by waiting when necessary."""
-        current_time = time.time()
-        # clear old requests
-        while self.request_queue and current_time - self.request_queue[0] >= self.interval_seconds:
-            self.request_queue.popleft()
-        # wait if needed
-        if len(self.request_queue) >= self.max_requests:
-            oldest_request_time = self.request_queue[0]
-            wait_time = self.interval_seconds - (current_time - oldest_request_time)
-            if wait_time > 0:
-                logging.info("Reached max requests. Waiting for %s seconds...", wait_time)
-                time.sleep(wait_time)
-
-    def register_call(self) -> None:
-        """Register a new request into the request queue."""
-        current_time = time.time()
-        self.request_queue.append(current_time)
-        # logging.info("Request sent.")  # noqa: ERA001
+        registry = hw2_spy_metadata.get_registry()
+        return dict(sorted(zip(registry.level_numbers, registry.level_xps, strict=True)))
+
+    def get_metadata(self, endpoint: str) -> dict[str, Any]:
+        """Get every page of a metadata endpoint from the API.
+
+        Parameters
+        ----------
+        endpoint : str
+            The name of the metadata endpoint, such as leaders or game-objects.
+
+        Returns
+        -------
+        dict[str, Any]
+            The metadata, with the content items of every page, or {} on errors.
+        """
+        items: list[dict[str, Any]] = []
+        start = 0
+        while True:
+            url = f"https://www.haloapi.com/metadata/hw2/{endpoint}?startAt={start}"
+            page = self._request("metadata", url, f"{endpoint} metadata")
+            if not page:
+                return {}
+            items.extend(page.get("ContentItems", []))
+            paging = page.get("Paging", {})
+            start = int(paging.get("StartAt", start)) + int(paging.get("InlineCount", 0))
+            if not paging.get("InlineCount") or start >= int(paging.get("TotalCount", 0)):
+                return {"ContentItems": items}
+
+    def throttle(self, priority: int = 0) -> None:
+        """Wait until the throttle backend allows a new request and register it.
+
+        Parameters
+        ----------
+        priority : int, optional
+            The request priority, when several requests are waiting for the
+            throttle lower values are served first, by default 0
+        """
+        self.scheduler.acquire(priority)
+
+    def _request(self, endpoint: str, url: str, api_name: str) -> dict[str, Any]:
+        # Throttle and send a request, returning the decoded response or {} on errors.
+        data = self._request_raw(endpoint, url, api_name)
+        return dict(json.loads(data)) if data else {}
+
+    def _request_raw(self, endpoint: str, url: str, api_name: str, *, compressed: bool = False) -> bytes:
+        # Throttle and send a request, returning the response body or b"" on errors,
+        # gzip compressed when asked so it can be stored as is.
+        # Rate limited and transient errors are retried according to the endpoint policy.
+        headers = {"Ocp-Apim-Subscription-Key": self.key, "Accept-Encoding": "gzip"}
+        max_attempts = hw2_spy_config.api_retry_attempts.get(endpoint, 1)
+        deadline = time.monotonic() + hw2_spy_config.api_retry_seconds.get(endpoint, 0)
+        attempt = 1
+        while True:
+            self.throttle(self.priorities.get(endpoint, 0))
+            try:
+                response = self.http.request("GET", url, headers=headers, redirect=False, decode_content=not compressed)
+            except urllib3.exceptions.HTTPError as exc:
+                status = exc.__class__.__name__
+                retry_after = None
+                retryable = True
+            else:
+                if str(response.status) == "200":
+                    if compressed and response.headers.get("Content-Encoding", "").lower() != "gzip":
+                        # the server ignored the Accept-Encoding header
+                        return gzip.compress(response.data)
+                    return bytes(response.data)
+                status = str(response.status)
+                retry_after = response.headers.get("Retry-After")
+                retryable = status in self.retry_statuses
+            if retryable and attempt < max_attempts:
+                delay = self.retry_delay(attempt, retry_after)
+                if time.monotonic() + delay <= deadline:
+                    logging.warning(
+                        "Got %s while accessing the %s api. Retrying in %.1f seconds.", status, api_name, delay
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+            break
+        message = f"Error: Got code {status} while accessing the {api_name} api."
+        logging.error(message)
+        if status == "401":
+            message = message + " Please check your api key."
+            output = {"status": message}
+            sys.exit(json.dumps(output, indent=4))
+        return b""
+
+    @staticmethod
+    def retry_delay(attempt: int, retry_after: str | None = None) -> float:
+        """Get the seconds to wait before retrying a failed request.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of the failed attempt, starting at 1.
+        retry_after : str | None, optional
+            The Retry-After header of the failed response, either
+            in seconds or as an HTTP date, by default None
+
+        Returns
+        -------
+        float
+            The server requested delay when given, otherwise an exponential
+            backoff from the configured base, plus a random jitter.
+        """
+        base = hw2_spy_config.api_retry_backoff_seconds
+        jitter = random.uniform(0, base)  # noqa: S311
+        if retry_after:
+            try:
+                return max(float(retry_after), 0) + jitter
+            except ValueError:
+                try:
+                    retry_date = email.utils.parsedate_to_datetime(retry_after)
+                    now = datetime.datetime.now(tz=datetime.timezone.utc)
+                    return max((retry_date - now).total_seconds(), 0) + jitter
+                except (TypeError, ValueError):
+                    logging.warning("Unexpected Retry-After header: %s", retry_after)
+        return base * 2.0 ** (attempt - 1) + jitter
+
+    def _cached_request(self, endpoint: str, url: str, api_name: str) -> dict[str, Any]:
+        # Serve the request from the response cache when possible
+        response, fresh = self.response_cache.get(endpoint, url)
+        if response is not None:
+            if not fresh:
+                # serve the stale response and refresh it in the background
+                self._revalidate(endpoint, url, api_name)
+            return response
+        response = self._request(endpoint, url, api_name)
+        if response:
+            self.response_cache.put(endpoint, url, response)
+        return response
+
+    def _revalidate(self, endpoint: str, url: str, api_name: str) -> None:
+        with self.revalidation_lock:
+            if url in self.revalidating:
+                return
+            self.revalidating.add(url)
+
+        def refresh() -> None:
+            try:
+                response = self._request(endpoint, url, api_name)
+                if response:
+                    self.response_cache.put(endpoint, url, response)
+            finally:
+                with self.revalidation_lock:
+                    self.revalidating.discard(url)
+
+        # a daemon thread, so a slow refresh never holds the process at exit, the stale response was already served
+        threading.Thread(target=refresh, name=f"revalidate-{endpoint}", daemon=True).start()
 
     def get_player_playlist_ratings(
         self, playlist: str | None = None, gamertags: Iterable[str] | None = None
@@ -256,110 +455,198 @@ class HW2Api:
             players = self.csv(safe_gamertags)
         if playlist and players:
             url = f"https://www.haloapi.com/stats/hw2/playlist/{playlist}/rating?players={players}"
-            headers = {"Ocp-Apim-Subscription-Key": self.key}
-            self.throttle()
-            response = self.http.request("GET", url, headers=headers, redirect=False)
-            self.register_call()
-            if str(response.status) == "200":
-                ratings = json.loads(response.data)
-            else:
-                message = f"Error: Got code {response.status} while accessing the player playlist ratings api."
-                logging.error(message)
-                if str(response.status) == "401":
-                    message = message + " Please check your api key."
-                    output = {"status": message}
-                    sys.exit(json.dumps(output, indent=4))
+            ratings = self._cached_request("ratings", url, "player playlist ratings")
         return ratings
 
-    def get_player_match_history(self, gamertag: str) -> dict[str, Any]:
-        """Get the match history for a given gamertag from the API.
+    def get_player_match_history(self, gamertag: str, start: int = 0, count: int | None = None) -> dict[str, Any]:
+        """Get a page of the match history for a given gamertag from the API.
 
         Parameters
         ----------
         gamertag : str
             The gamertag for which to retrieve the match history.
+        start : int, optional
+            The number of most recent matches to skip, by default 0
+        count : int | None, optional
+            The number of matches of the page, at most history_page_size,
+            if None the API default is used, by default None (25 matches)
 
         Returns
         -------
         dict[str, Any]
-            The match history for the given gamertag.
+            The match history page for the given gamertag.
         """
         # Init vars
         match_history = {}
         gamertag = self.gamertag_filter(gamertag)
         if gamertag is not None:
-            # get the 25 last matches for the player
             url = f"https://www.haloapi.com/stats/hw2/players/{gamertag}/matches?matchType=matchmaking"
-            headers = {"Ocp-Apim-Subscription-Key": self.key}
-            self.throttle()
-            response = self.http.request("GET", url, headers=headers, redirect=False)
-            self.register_call()
-            if str(response.status) == "200":
-                match_history = json.loads(response.data)
-            else:
-                message = f"Error: Got code {response.status} while accessing the match history api."
-                logging.error(message)
-                if str(response.status) == "401":
-                    message = message + " Please check your api key."
-                    output = {"status": message}
-                    sys.exit(json.dumps(output, indent=4))
+            # the first page of the default size keeps the url it has always been cached with
+            if start:
+                url += f"&start={start}"
+            if count is not None and count != self.history_page_size:
+                url += f"&count={count}"
+            match_history = self._cached_request("history", url, "match history")
         return match_history
 
-    def get_match_events(self, match_id: str | None = None) -> dict[str, Any]:
+    def iter_player_match_history(
+        self, gamertag: str, start: int = 0, count: int | None = None, max_pages: int | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """Iterate over the matches of a given gamertag, from the most recent, a page at a time.
+
+        A page is requested only once the matches of the previous one have been consumed,
+        so a caller which stops iterating doesn't pay for the next pages.
+
+        Parameters
+        ----------
+        gamertag : str
+            The gamertag for which to retrieve the match history.
+        start : int, optional
+            The number of most recent matches to skip, by default 0
+        count : int | None, optional
+            The number of matches of every page, at most history_page_size,
+            if None history_page_size is used, by default None
+        max_pages : int | None, optional
+            The most pages requested, if None the whole history
+            is gone through, by default None
+
+        Yields
+        ------
+        dict[str, Any]
+            The next match, as returned by the API.
+        """
+        count = self.history_page_size if count is None else min(count, self.history_page_size)
+        pages = itertools.count() if max_pages is None else range(max_pages)
+        for _ in pages:
+            results = self.get_player_match_history(gamertag, start, count).get("Results") or []
+            yield from results
+            # a short page is the last one
+            if len(results) < count:
+                return
+            start += len(results)
+
+    def get_match_events(self, match_id: str | None = None, horizon_ms: int | None = None) -> dict[str, Any]:
         """Get the events for a given match.
 
+        Every match is loaded and decoded at most once per instance and horizon, the
+        players referencing the same match share the registered events.
+
         Parameters
         ----------
         match_id : str | None, optional
             The match ID, by default None
+        horizon_ms : int | None, optional
+            The last millisecond of the match to analyse, when given the events
+            past it are not decoded, except for the building completions and the
+            match end, and the events of the known types are typed by
+            hw2_spy_schema, by default None (every event, as returned by the API)
 
         Returns
         -------
         dict[str, Any]
             The match events.
+        """
+        match_id = self.id_filter(match_id)
+        if match_id is None:
+            return {}
+        return self.match_events_registry.get(
+            f"{match_id}/{horizon_ms}", functools.partial(self._load_match_events, match_id, horizon_ms)
+        )
+
+    def get_match_events_data(self, match_id: str | None = None) -> bytes:
+        """Get the events for a given match as the gzip compressed API response, without decoding them.
+
+        Parameters
+        ----------
+        match_id : str | None, optional
+            The match ID, by default None
+
+        Returns
+        -------
+        bytes
+            The compressed match events, or b"" when not available.
+        """
+        match_id = self.id_filter(match_id)
+        if match_id is None:
+            return b""
+        return self._load_match_events_data(match_id)
+
+    def release_match_events(self, match_id: str | None = None, horizon_ms: int | None = None) -> None:
+        """Drop the registered events of a given match, so they can be freed once not referenced anymore.
+
+        Parameters
+        ----------
+        match_id : str | None, optional
+            The match ID, by default None
+        horizon_ms : int | None, optional
+            The horizon the events were decoded for, by default None (every event)
+        """
+        match_id = self.id_filter(match_id)
+        if match_id is not None:
+            self.match_events_registry.discard(f"{match_id}/{horizon_ms}")
+
+    def _load_match_events(self, match_id: str, horizon_ms: int | None) -> dict[str, Any]:
+        # Decode the events for a given match, streaming them up to the horizon when given
+        data = self._load_match_events_data(match_id)
+        if not data:
+            return {}
+        if horizon_ms is None:
+            return dict(json.loads(gzip.decompress(data)))
+        return hw2_spy_events.load_game_events(hw2_spy_events.iter_gzip_text(data), horizon_ms, typed=True)
+
+    def _load_match_events_data(self, match_id: str) -> bytes:
+        """Load the gzip compressed events for a given match from the cache or the API.
+
+        Parameters
+        ----------
+        match_id : str
+            A valid match ID.
+
+        Returns
+        -------
+        bytes
+            The compressed match events, or b"" when not available.
 
         Raises
         ------
         OSError
             When not able to access the caching storage.
         """
-        # Init vars
-        match_events = {}
-        match_id = self.id_filter(match_id)
-        if match_id is not None:
+        try:
             # Look for the match in the cache
-            script_file_path = os.path.abspath(__file__)
-            script_directory = os.path.dirname(script_file_path)
-            folder = os.path.join(script_directory, "cache/matches/events")
-            file = os.path.join(folder, match_id + ".json")
-            # make sure folder exists
-            os.makedirs(folder, exist_ok=True)
+            entry = self.cache_store.get("events", match_id)
+            data = entry[0] if entry is not None else self._import_legacy_match_events(match_id)
+            if data:
+                return data
+            # If not cached, get the match data, kept compressed as sent by the API
+            url = f"https://www.haloapi.com/stats/hw2/matches/{match_id}/events"
+            data = self._request_raw("events", url, "match events", compressed=True)
+            if data:
+                # store the raw response in the cache
+                self.cache_store.put("events", match_id, data)
+        except (OSError, sqlite3.Error) as exc:
+            msg = "Error reading the cached file."
+            raise OSError(msg) from exc
+        return data
+
+    def _import_legacy_match_events(self, match_id: str) -> bytes:
+        # Move the match events cached as a file by previous versions into the cache store,
+        # for the matches requested before the whole folder is imported by the cache gc
+        folder = LEGACY_EVENTS_FOLDER
+        for file, compressed in ((match_id + ".json.gz", True), (match_id + ".json", False)):
             try:
-                with open(file) as rfile:
-                    match_events = json.load(rfile)
+                with open(os.path.join(folder, file), "rb") as rfile:
+                    data = rfile.read()
             except FileNotFoundError:
-                # If not cached, get the match data
-                url = f"https://www.haloapi.com/stats/hw2/matches/{match_id}/events"
-                headers = {"Ocp-Apim-Subscription-Key": self.key}
-                self.throttle()
-                response = self.http.request("GET", url, headers=headers, redirect=False)
-                self.register_call()
-                if str(response.status) == "200":
-                    match_events = json.loads(response.data)
-                    # store the result in the cache
-                    with open(file, "w") as wfile:
-                        json.dump(match_events, wfile, indent=4)
-                else:
-                    message = f"Error: Got code {response.status} while accessing the match events api."
-                    logging.error(message)  # noqa: TRY400
-                    if str(response.status) == "401":
-                        message = message + " Please check your api key."
-                        output = {"status": message}
-                        sys.exit(json.dumps(output, indent=4))
-            except OSError as exc:
-                msg = "Error reading the cached file."
-                raise OSError(msg) from exc
-        return match_events
+                continue
+            if not compressed:
+                data = gzip.compress(data)
+            self.cache_store.put("events", match_id, data)
+            # the cache gc may be importing the same file
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(folder, file))
+            return data
+        return b""
 
     def get_match_result(self, match_id: str | None = None) -> dict[str, Any]:  # noqa: ARG002
         """Not implemented yet.
@@ -383,7 +670,28 @@ class HW2Api:
 class PlayerStats:
     """Consolidate a set of player stats using a variety of API calls and classes."""
 
-    def __init__(self, gamertag: str, mode: str | None = None, hw2api: HW2Api | None = None) -> None:
+    # Modes with a dedicated set of rating attributes
+    modes = ("1vs1", "2vs2", "3vs3")
+    # Number of last matches of the mode summarized, and most pages of the history scanned to find them
+    max_matches = hw2_spy_config.last_matches
+    max_pages = hw2_spy_config.history_max_pages
+    # Whether to add the combat stats of the whole match to the matches summarized
+    combat = hw2_spy_config.analysis_combat
+
+    def __init__(  # noqa: PLR0913
+        self,
+        gamertag: str,
+        mode: str | None = None,
+        hw2api: HW2Api | None = None,
+        resolve_ratings: bool = True,  # noqa: FBT001, FBT002
+        *,
+        horizon_ms: int | None = None,
+        step_ms: int | None = None,
+        max_matches: int | None = None,
+        max_pages: int | None = None,
+        combat: bool | None = None,
+        lazy: bool = False,
+    ) -> None:
         """Init player stats for a given gamertag and game mode.
 
         Parameters
@@ -397,28 +705,62 @@ class PlayerStats:
             An existent instance of the HW2Api class in order to use
             a shared queue, if None is specified a new local one is
             created, by default None
+        resolve_ratings : bool, optional
+            Whether to fetch the ratings missing from the match history
+            straight away, when False the missing modes are kept in
+            `missing_modes` to be resolved later for a whole team with
+            a RatingsResolver, by default True
+        horizon_ms : int | None, optional
+            The last millisecond of the matches analysed, if None
+            the MatchEvents default is used, by default None
+        step_ms : int | None, optional
+            The milliseconds between the population samples of the matches,
+            if None the MatchEvents default is used, by default None
+        max_matches : int | None, optional
+            The number of last matches of the mode summarized, if None
+            the max_matches class attribute is used, by default None
+        max_pages : int | None, optional
+            The most pages of 25 matches of the history scanned to find
+            them, a page being requested only while they fall short, if
+            None the max_pages class attribute is used, by default None
+        combat : bool | None, optional
+            Whether to add the kills and losses of the whole match to the
+            matches summarized, if None the combat class attribute is
+            used, by default None
+        lazy : bool, optional
+            Whether setting the gamertag leaves the API calls to `fetch`
+            or `resolve_all`, by default False (the stats are fetched
+            straight away)
 
         Raises
         ------
         ValueError
             When a value is passed thru hw2api parameter that is not actually
-            an instance of the HW2Api class.
+            an instance of the HW2Api class, or when the number of matches
+            or of pages are not positive.
         """
-        self.xp = ""
-        self.level = ""
-        self.mmr1vs1 = ""
-        self.csr1vs1 = ""
-        self.tier1vs1 = ""
-        self.designation1vs1 = ""
-        self.mmr2vs2 = ""
-        self.csr2vs2 = ""
-        self.tier2vs2 = ""
-        self.designation2vs2 = ""
-        self.mmr3vs3 = ""
-        self.csr3vs3 = ""
-        self.tier3vs3 = ""
-        self.designation3vs3 = ""
-        self.matches: list[dict[str, Any]] = []
+        # Raw stats, formatted only by export_json
+        self.xp: int | None = None
+        self.ratings = {mode: Rating() for mode in self.modes}
+        self.matches: list[MatchRecord] = []
+        # The last matches of the mode found in the match history, waiting for their events
+        self.last_matches: list[dict[str, Any]] = []
+        # Modes lacking a rating in the match history, pending to be resolved
+        self.resolve_ratings = resolve_ratings
+        self.missing_modes: list[str] = []
+        # Analysis horizon and population sampling step of the matches
+        self.horizon_ms = horizon_ms
+        self.step_ms = step_ms
+        if max_matches is not None:
+            self.max_matches = max_matches
+        if max_pages is not None:
+            self.max_pages = max_pages
+        if combat is not None:
+            self.combat = combat
+        if self.max_matches <= 0 or self.max_pages <= 0:
+            msg = "max_matches and max_pages parameters must be positive."
+            raise ValueError(msg)
+        self.lazy = lazy
         # Setup the API instance
         if hw2api is None:
             hw2api = HW2Api()
@@ -452,190 +794,170 @@ class PlayerStats:
             self._gamertag = safe_value
             # if we have both needed parameters mode and gamertag
             # proceed to update the player stats
-            if self.mode is not None and self.gamertag is not None:
+            if not self.lazy and self.mode is not None and self.gamertag is not None:
                 self.summarize(value, self.mode)
         else:
             logging.error("Incorrect gamertag format provided.")
             self._gamertag = ""
 
-    def summarize(  # noqa: D102, C901, PLR0912, PLR0915
-        self, gamertag: str | None = None, mode: str | None = None
-    ) -> None:
-        if gamertag is None:
-            gamertag = self.gamertag
-        if mode is None:
-            mode = self.mode
+    def summarize(self, gamertag: str | None = None, mode: str | None = None) -> None:
+        """Get the ranks and the last matches of a gamertag for a mode, straight away.
+
+        Parameters
+        ----------
+        gamertag : str | None, optional
+            The gamertag to get the stats for, if None the gamertag
+            of the instance is used, by default None
+        mode : str | None, optional
+            The mode of the last matches summarized, if None the mode
+            of the instance is used, by default None
+        """
         if gamertag is not None:
-            history = MatchHistory(self.gamertag, self.hw2api)
-            player = history.player_stats
-            # If got results put the data into the class attributes
-            # Otherwise don't make additional api calls for this gamertag
-            if player:
-                if player.get("xp") is not None:
-                    self.xp = player["xp"]
-                    self.level = self._get_level_from_xp(int(player["xp"]))
-                if player.get("mmr1vs1") is not None:
-                    self.mmr1vs1 = str(round(float(player["mmr1vs1"]), 2))
-                else:
-                    # probably none of the last 25 matches were related
-                    # so fetch this data from the player_playlist_ratings api
-                    ratings = PlaylistRatings(self.hw2api.play_lists["1vs1"][0], gamertag, self.hw2api)
-                    ratings1 = ratings.summary
-                    if ratings1.get("mmr1vs1") is not None:
-                        self.mmr1vs1 = str(round(float(ratings1["mmr1vs1"]), 2))
-                    if ratings1.get("tier1vs1") is not None:
-                        self.tier1vs1 = str(ratings1["tier1vs1"])
-                    if ratings1.get("designation1vs1") is not None:
-                        self.designation1vs1 = hw2_spy_config.designations[str(ratings1["designation1vs1"])]
-                if player.get("tier1vs1") is not None:
-                    self.tier1vs1 = str(player["tier1vs1"])
-                if player.get("designation1vs1") is not None:
-                    self.designation1vs1 = hw2_spy_config.designations[str(player["designation1vs1"])]
-                if self.tier1vs1 and self.designation1vs1:
-                    self.csr1vs1 = self.tier1vs1 + " " + self.designation1vs1
-                if player.get("mmr2vs2") is not None:
-                    self.mmr2vs2 = str(round(float(player["mmr2vs2"]), 2))
-                else:
-                    # probably none of the last 25 matches were related
-                    # so fetch this data from the player_playlist_ratings api
-                    ratings = PlaylistRatings(self.hw2api.play_lists["2vs2"][0], gamertag, self.hw2api)
-                    ratings2 = ratings.summary
-                    if ratings2.get("mmr2vs2") is not None:
-                        self.mmr2vs2 = str(round(float(ratings2["mmr2vs2"]), 2))
-                    if ratings2.get("tier2vs2") is not None:
-                        self.tier2vs2 = str(ratings2["tier2vs2"])
-                    if ratings2.get("designation2vs2") is not None:
-                        self.designation2vs2 = hw2_spy_config.designations[str(ratings2["designation2vs2"])]
-                if player.get("tier2vs2") is not None:
-                    self.tier2vs2 = str(player["tier2vs2"])
-                if player.get("designation2vs2") is not None:
-                    self.designation2vs2 = hw2_spy_config.designations[str(player["designation2vs2"])]
-                if self.tier2vs2 and self.designation2vs2:
-                    self.csr2vs2 = self.tier2vs2 + " " + self.designation2vs2
-                if player.get("mmr3vs3") is not None:
-                    self.mmr3vs3 = str(round(float(player["mmr3vs3"]), 2))
-                else:
-                    # probably none of the last 25 matches were related
-                    # so fetch this data from the player_playlist_ratings api
-                    ratings = PlaylistRatings(self.hw2api.play_lists["3vs3"][0], gamertag, self.hw2api)
-                    ratings3 = ratings.summary
-                    if ratings3.get("mmr3vs3") is not None:
-                        self.mmr3vs3 = str(round(float(ratings3["mmr3vs3"]), 2))
-                    if ratings3.get("tier3vs3") is not None:
-                        self.tier3vs3 = str(ratings3["tier3vs3"])
-                    if ratings3.get("designation3vs3") is not None:
-                        self.designation3vs3 = hw2_spy_config.designations[str(ratings3["designation3vs3"])]
-                if player.get("tier3vs3") is not None:
-                    self.tier3vs3 = str(player["tier3vs3"])
-                if player.get("designation3vs3") is not None:
-                    self.designation3vs3 = hw2_spy_config.designations[str(player["designation3vs3"])]
-                if self.tier3vs3 and self.designation3vs3:
-                    self.csr3vs3 = self.tier3vs3 + " " + self.designation3vs3
-                # Get last matches information for the specified mode
-                if mode in self.hw2api.play_lists:
-                    for match in history.get_last_matches(self.hw2api.play_lists[mode]):
-                        events = MatchEvents(match["MatchId"], gamertag, self.hw2api)
-                        summary = events.match_summary
-                        if match.get("MatchStartDate") is not None:
-                            summary["Date"] = self._iso_date_to_str(match["MatchStartDate"])
-                        if match.get("Result") is not None:
-                            summary["Result"] = hw2_spy_config.results[match["Result"]]
-                        # Format data
-                        if summary.get("Leader") is not None:
-                            summary["Leader"] = hw2_spy_config.leaders[int(summary["Leader"])]
-                        if summary.get("T2") is not None:
-                            summary["T2"] = self._ms_to_min_sec(int(summary["T2"]))
-                        if summary.get("T3") is not None:
-                            summary["T3"] = self._ms_to_min_sec(int(summary["T3"]))
-                        if summary.get("Turrets") is not None:
-                            summary["Turrets"] = [self._ms_to_min_sec(int(element)) for element in summary["Turrets"]]
-                        if summary.get("Bases") is not None:
-                            summary["Bases"] = [self._ms_to_min_sec(int(element)) for element in summary["Bases"]]
-                        if summary.get("Minis") is not None:
-                            summary["Minis"] = [self._ms_to_min_sec(int(element)) for element in summary["Minis"]]
-                        if summary.get("Duration") is not None:
-                            summary["Duration"] = self._ms_to_min_sec(int(summary["Duration"]))
-                        if summary.get("Units") is not None:
-                            summary["Units"] = {
-                                self._translate_unit(key): value for key, value in summary["Units"].items()
-                            }
-                        # Save the formatted match data in the instance attribute
-                        self.matches.append(summary)
+            self._gamertag = self.hw2api.gamertag_filter(gamertag)
+        if mode is not None:
+            self.mode = mode
+        self.fetch_ranks()
+        self.fetch_matches()
+
+    def fetch(self) -> None:
+        """Get the stats for the gamertag and mode of a lazy instance."""
+        self.fetch_ranks()
+        self.fetch_matches()
+
+    def fetch_ranks(self, resolve_ratings: bool | None = None) -> None:
+        """Get the match history and the ratings of the gamertag, without the match events.
+
+        The last matches of the mode are kept, so that `fetch_matches` can get their events later.
+
+        Parameters
+        ----------
+        resolve_ratings : bool | None, optional
+            Whether to fetch the ratings missing from the match history, if None
+            the resolve_ratings instance attribute is used, by default None
+        """
+        self.last_matches = []
+        if not self.gamertag:
+            return
+        if resolve_ratings is None:
+            resolve_ratings = self.resolve_ratings
+        history = MatchHistory(self.gamertag, self.hw2api)
+        player = history.player_stats
+        if not player:
+            return
+        self.missing_modes = self._process_history_stats(player)
+        if resolve_ratings:
+            for missing_mode in self.missing_modes:
+                ratings = PlaylistRatings(self.hw2api.play_lists[missing_mode][0], self.gamertag, self.hw2api)
+                self._process_ratings(missing_mode, ratings.summary)
+            self.missing_modes = []
+        if self.mode in self.hw2api.play_lists:
+            self.last_matches = history.get_last_matches(
+                self.hw2api.play_lists[self.mode], self.max_matches, max_pages=self.max_pages
+            )
+
+    def fetch_matches(self) -> None:
+        """Get the events of the last matches found by `fetch_ranks` and add their summary to the stats."""
+        self.matches.extend(self.match_record(match) for match in self.last_matches)
+
+    def match_record(self, match: Mapping[str, Any]) -> MatchRecord:
+        """Get the summary of a match of the history for the gamertag.
+
+        Parameters
+        ----------
+        match : Mapping[str, Any]
+            The match, as found in the match history.
+
+        Returns
+        -------
+        MatchRecord
+            The match record.
+        """
+        events = MatchEvents(
+            match["MatchId"],
+            self.gamertag,
+            self.hw2api,
+            horizon_ms=self.horizon_ms,
+            step_ms=self.step_ms,
+            retain_events=False,
+        )
+        return MatchRecord.from_summary(match, self._with_combat(events))
+
+    def _with_combat(self, events: "MatchEvents") -> dict[str, Any]:
+        # The match summary of the gamertag, with its combat stats when asked
+        if not self.combat:
+            return events.match_summary
+        combat = events.process_combat().get(self.gamertag.casefold())
+        return events.match_summary if combat is None else {**events.match_summary, "Combat": combat}
+
+    def _process_history_stats(self, player: Mapping[str, Any]) -> list[str]:
+        # Put the stats collected from the match history into the class attributes
+        # and return the modes that still lack a rating
+        missing_modes = []
+        if player.get("xp") is not None:
+            self.xp = int(player["xp"])
+        for mode in self.modes:
+            if player.get(f"mmr{mode}") is None:
+                missing_modes.append(mode)
+            self.ratings[mode].update(player, mode)
+        return missing_modes
+
+    def _process_ratings(self, mode: str, ratings: Mapping[str, Any]) -> None:
+        # Put a playlist ratings summary into the rating of the given mode
+        self.ratings[mode].update(ratings, mode)
+
+    def apply_ratings(self, mode: str, ratings: Mapping[str, Any]) -> None:
+        """Apply a playlist ratings summary resolved for a missing mode.
+
+        Parameters
+        ----------
+        mode : str
+            The mode the ratings belong to.
+        ratings : Mapping[str, Any]
+            The ratings summary, as returned by PlaylistRatings.summarize.
+        """
+        self._process_ratings(mode, ratings)
+        if mode in self.missing_modes:
+            self.missing_modes.remove(mode)
 
     def export_json(self) -> dict[str, Any]:
-        """Export a dictionary with all the consolidated stats.
+        """Export a dictionary with all the consolidated stats, formatted for display.
 
         Returns
         -------
         dict[str, Any]
             The consolidated stats.
         """
-        return {
+        stats: dict[str, Any] = {
             "gamertag": self.gamertag,
-            "xp": self.xp,
-            "level": self.level,
-            "mmr1vs1": self.mmr1vs1,
-            "csr1vs1": self.csr1vs1,
-            "tier1vs1": self.tier1vs1,
-            "designation1vs1": self.designation1vs1,
-            "mmr2vs2": self.mmr2vs2,
-            "csr2vs2": self.csr2vs2,
-            "tier2vs2": self.tier2vs2,
-            "designation2vs2": self.designation2vs2,
-            "mmr3vs3": self.mmr3vs3,
-            "csr3vs3": self.csr3vs3,
-            "tier3vs3": self.tier3vs3,
-            "designation3vs3": self.designation3vs3,
-            "matches": self.matches,
+            "xp": "" if self.xp is None else self.xp,
+            "level": "" if self.xp is None else self._get_level_from_xp(self.xp),
         }
+        for mode in self.modes:
+            stats.update(self.ratings[mode].export_json(mode))
+        stats["matches"] = [match.export_json(self._translate_unit) for match in self.matches]
+        return stats
 
     @staticmethod
     def _get_level_from_xp(xp: int) -> str:
-        if hw2_spy_config.levels is not None and isinstance(hw2_spy_config.levels, dict):
-            for level, required_xp in hw2_spy_config.levels.items():
-                if xp < required_xp:
-                    return str(level - 1)
-            return str(max(hw2_spy_config.levels.keys()))
-        return ""
-
-    @staticmethod
-    def _ms_to_min_sec(milliseconds: int) -> str:
-        total_seconds, milliseconds = divmod(milliseconds, 1000)
-        minutes, seconds = divmod(total_seconds, 60)
-        return f"{minutes:02}:{seconds:02}"
-
-    @staticmethod
-    def _iso_date_to_str(iso_date: str) -> str:
-        # Convert ISO date to a datetime object
-        dt_object = isoparse(iso_date)
-        # Save date and time in a readable format
-        return dt_object.strftime("%Y-%m-%d %H:%M:%S")
+        level = hw2_spy_metadata.get_registry().level(xp)
+        return "" if level is None else str(level)
 
     @staticmethod
     def _translate_unit(unit_id: str) -> str:
-        units = hw2_spy_config.units
-        if unit_id in units:
-            return str(units[unit_id])
-        # Add the key to the dictionary with a default value
-        units[unit_id] = unit_id
-        # Look for the config file independently from the execution dir
-        script_file_path = os.path.abspath(__file__)
-        script_directory = os.path.dirname(script_file_path)
-        file = os.path.join(script_directory, "hw2_spy_config.py")
-        # Update the config file with the new dictionary
-        with open(file) as config_file:
-            config_content = config_file.read()
-            new_units = f"units: dict[str, str] = {units!r}\n"
-            new_config_content = re.sub(r"units:\s+dict\[str, str\]\s+=\s+{[^}]+}", new_units, config_content)
-        with open(file, "w") as config_file:
-            config_file.write(new_config_content)
-        return unit_id
+        return hw2_spy_metadata.get_registry().unit_name(unit_id)
 
 
 class PlaylistRatings:
     """Retrieve and manage data from playlist ratings API for a given gamertag."""
 
-    def __init__(self, playlist: str | None = None, gamertag: str | None = None, hw2api: HW2Api | None = None) -> None:
+    def __init__(
+        self,
+        playlist: str | None = None,
+        gamertag: str | None = None,
+        hw2api: HW2Api | None = None,
+        *,
+        lazy: bool = False,
+    ) -> None:
         """Init vars according to playlist and gamertag given values.
 
         Parameters
@@ -648,6 +970,10 @@ class PlaylistRatings:
             An existent instance of the HW2Api class in order to use
             a shared queue, if None is specified a new local one is
             created, by default None
+        lazy : bool, optional
+            Whether setting the playlist and the gamertag leaves the API
+            call to `fetch` or `resolve_all`, by default False (the ratings
+            are fetched straight away)
 
         Raises
         ------
@@ -659,6 +985,7 @@ class PlaylistRatings:
         self.ratings: dict[str, Any] = {}
         # Init attribute to store results
         self.summary: dict[str, str] = {}
+        self.lazy = lazy
         # Setup the API instance
         if hw2api is None:
             hw2api = HW2Api()
@@ -694,9 +1021,8 @@ class PlaylistRatings:
             self._playlist = safe_value
             # if we have both needed parameters playlist and gamertag
             # proceed to update the player playlist ratings summary
-            if self.playlist and self.gamertag:
-                self.get()
-                self.summarize()
+            if not self.lazy and self.playlist and self.gamertag:
+                self.fetch()
         else:
             logging.error("Incorrect playlist id format provided.")
             self._playlist = ""
@@ -719,13 +1045,23 @@ class PlaylistRatings:
             self._gamertag = safe_value
             # if we have both needed parameters playlist and gamertag
             # proceed to update the player playlist ratings summary
-            if self.playlist and self.gamertag:
-                self.get()
-                self.summarize()
+            if not self.lazy and self.playlist and self.gamertag:
+                self.fetch()
         else:
             logging.error("Incorrect gamertag format provided.")
             self._gamertag = ""
 
+    def fetch(self) -> dict:
+        """Get the ratings for the playlist and gamertag of a lazy instance and summarize them.
+
+        Returns
+        -------
+        dict
+            The ratings summary.
+        """
+        self.get()
+        return self.summarize()
+
     def get(self, playlist: str | None = None, gamertag: str | None = None) -> dict[str, Any]:
         """Get the ratings for the specified playlist and gamertag.
 
@@ -801,10 +1137,91 @@ class PlaylistRatings:
         return summary
 
 
+class RatingsResolver:
+    """Resolve the ratings missing from the match history of several players with one call per playlist."""
+
+    # Number of gamertags accepted by the API on every call
+    max_gamertags = 6
+
+    def __init__(self, players: Iterable[PlayerStats], hw2api: HW2Api | None = None) -> None:
+        """Init vars according to given parameters.
+
+        Parameters
+        ----------
+        players : Iterable[PlayerStats]
+            The player stats to resolve the missing ratings for,
+            built with resolve_ratings set to False.
+        hw2api : HW2Api | None, optional
+            An existent instance of the HW2Api class in order to use
+            a shared queue, if None is specified a new local one is
+            created, by default None
+
+        Raises
+        ------
+        ValueError
+            When a value is passed thru hw2api parameter that is not actually
+            an instance of the HW2Api class.
+        """
+        # Setup the API instance
+        if hw2api is None:
+            hw2api = HW2Api()
+        elif not isinstance(hw2api, HW2Api):
+            msg = "hw2api parameter must be an instance of the HW2Api class."
+            raise ValueError(msg)
+        self.hw2api = hw2api
+        self.players = list(players)
+
+    def pending(self) -> list[tuple[str, str, list[str]]]:
+        """Collect the gamertags lacking a rating, grouped by mode.
+
+        Returns
+        -------
+        list[tuple[str, str, list[str]]]
+            The mode, the playlist ID and up to 6 gamertags of every needed API call.
+        """
+        gamertags: dict[str, list[str]] = {}
+        for player in self.players:
+            for mode in player.missing_modes:
+                if player.gamertag not in gamertags.setdefault(mode, []):
+                    gamertags[mode].append(player.gamertag)
+        calls: list[tuple[str, str, list[str]]] = []
+        for mode, mode_gamertags in gamertags.items():
+            playlist = self.hw2api.play_lists[mode][0]
+            calls.extend(
+                (mode, playlist, mode_gamertags[index : index + self.max_gamertags])
+                for index in range(0, len(mode_gamertags), self.max_gamertags)
+            )
+        return calls
+
+    def apply(self, mode: str, playlist: str, ratings: Mapping[str, Any]) -> None:
+        """Fan the ratings of a playlist out to the players lacking them.
+
+        Parameters
+        ----------
+        mode : str
+            The mode the ratings belong to.
+        playlist : str
+            The playlist ID the ratings belong to.
+        ratings : Mapping[str, Any]
+            The ratings as returned by the API.
+        """
+        summarizer = PlaylistRatings(hw2api=self.hw2api)
+        for player in self.players:
+            if mode in player.missing_modes:
+                summary = summarizer.summarize(playlist, player.gamertag, ratings)
+                if summary:
+                    player.apply_ratings(mode, summary)
+
+    def resolve(self) -> None:
+        """Get the missing ratings from the API and apply them to the players."""
+        for mode, playlist, gamertags in self.pending():
+            self.apply(mode, playlist, self.hw2api.get_player_playlist_ratings(playlist, gamertags))
+
+
 class MatchHistory:
     """Retrieve and manage the 25 last matches for a given user."""
 
-    def __init__(self, gamertag: str, hw2api: HW2Api | None = None) -> None:
+    def __init__(self, gamertag: str, hw2api: HW2Api | None = None, *, lazy: bool = False) -> None:
         """Init vars according to given parameters.
 
         Parameters
@@ -815,6 +1232,10 @@ class MatchHistory:
             An existent instance of the HW2Api class in order to use
             a shared queue, if None is specified a new local one is
             created, by default None
+        lazy : bool, optional
+            Whether setting the gamertag leaves the API call to `fetch`
+            or `resolve_all`, by default False (the history is fetched
+            straight away)
 
         Raises
         ------
@@ -835,6 +1256,7 @@ class MatchHistory:
         self.player_stats: dict[str, str] = {}
         # Init a list of last matches
         self.last_matches: list[dict] = []
+        self.lazy = lazy
         # Verify value and trigger actions using the setter decorator
         self.gamertag = gamertag
 
@@ -855,16 +1277,29 @@ class MatchHistory:
         if safe_value:
             self._gamertag = safe_value
             # Match history is always needed so we'll fetch it straight away
-            self.get()
-            if self.match_history:
-                # reset player stats and process using the new data
-                self.process()
-            else:
-                logging.error("Can't get the match history, please check the gamertag and the api key.")
+            if not self.lazy:
+                self.fetch()
         else:
             logging.error("Incorrect gamertag format provided.")
             self._gamertag = ""
 
+    def fetch(self) -> dict[str, Any]:
+        """Get and process the match history for the gamertag of a lazy instance.
+
+        Returns
+        -------
+        dict[str, Any]
+            A summary of data extracted from match history.
+        """
+        self.player_stats = {}
+        self.get()
+        if self.match_history:
+            # reset player stats and process using the new data
+            self.process()
+        else:
+            logging.error("Can't get the match history, please check the gamertag and the api key.")
+        return self.player_stats
+
     def get(self, gamertag: str | None = None) -> dict[str, Any]:
         """Get the las 25 matches for a given gamertag.
 
@@ -943,11 +1378,37 @@ class MatchHistory:
         if self.player_stats.get("designation3vs3") is None:
             self.player_stats["designation3vs3"] = str(match["RatingProgress"]["UpdatedCsr"]["Designation"])
 
+    def iter_matches(self, max_pages: int | None = None) -> Iterator[dict[str, Any]]:
+        """Iterate over the matches of the history, from the most recent, requesting the next pages on demand.
+
+        The fetched matches come first, a further page is requested only once the previous
+        one has been consumed, so a caller which stops iterating doesn't pay for the next pages.
+
+        Parameters
+        ----------
+        max_pages : int | None, optional
+            The most pages gone through, counting the fetched one, if
+            None the whole history is, by default None
+
+        Yields
+        ------
+        dict[str, Any]
+            The next match, as returned by the API.
+        """
+        results = self.match_history.get("Results") or []
+        yield from results
+        if len(results) < self.hw2api.history_page_size or (max_pages is not None and max_pages <= 1):
+            return
+        yield from self.hw2api.iter_player_match_history(
+            self.gamertag, len(results), max_pages=None if max_pages is None else max_pages - 1
+        )
+
     def get_last_matches(
         self,
         play_list_ids: Iterable[str],
         max_matches: int = 3,
         match_history: Mapping[str, Any] | None = None,
+        max_pages: int = 1,
     ) -> list[dict[str, Any]]:
         """Get a number of last matches for the given playlists from a match history.
 
@@ -961,33 +1422,70 @@ class MatchHistory:
             The match history to use as data base, if None,
             the match history from the instance is loaded,
             by default None
+        max_pages : int, optional
+            The most pages of the instance match history scanned, the next
+            pages being requested only while the matches collected fall
+            short, by default 1 (the fetched matches only)
 
         Returns
         -------
         list[dict[str, Any]]
             The selected last matches.
         """
-        if match_history is None:
-            match_history = self.match_history
-        last_matches: list[dict] = []
-        if match_history.get("Results") is not None:
-            for match in match_history["Results"]:
-                if len(last_matches) < max_matches and match["PlaylistId"] in play_list_ids:
-                    last_matches.append(
-                        {
-                            "MatchId": match["MatchId"],
-                            "MatchStartDate": match["MatchStartDate"]["ISO8601Date"],
-                            "Result": match["PlayerMatchOutcome"],
-                        }
-                    )
+        matches = self.iter_matches(max_pages) if match_history is None else iter(match_history.get("Results") or [])
+        selected = (match for match in matches if match["PlaylistId"] in play_list_ids)
+        last_matches = [self.last_match(match) for match in itertools.islice(selected, max_matches)]
         self.last_matches = last_matches
         return last_matches
 
+    @staticmethod
+    def last_match(match: Mapping[str, Any]) -> dict[str, Any]:
+        """Keep the values of a match of the history needed to summarize it.
+
+        Parameters
+        ----------
+        match : Mapping[str, Any]
+            The match, as returned by the API.
+
+        Returns
+        -------
+        dict[str, Any]
+            The match ID, start date and result.
+        """
+        return {
+            "MatchId": match["MatchId"],
+            "MatchStartDate": match["MatchStartDate"]["ISO8601Date"],
+            "Result": match["PlayerMatchOutcome"],
+        }
+
 
 class MatchEvents:
     """Retrieve,manage and extract data from match events for a given match and gamertag."""
 
-    def __init__(self, match_id: str | None = None, gamertag: str | None = None, hw2api: HW2Api | None = None) -> None:
+    # Last millisecond of the match analysed, later events are only decoded when needed,
+    # and milliseconds between the population samples
+    horizon_ms = hw2_spy_config.analysis_horizon_ms
+    step_ms = hw2_spy_config.analysis_step_ms
+    # Extractors filling the match summaries
+    extractors: tuple[type[hw2_spy_extractors.Extractor], ...] = hw2_spy_extractors.EXTRACTORS
+    # Version of the data extracted by process, to be bumped whenever it or the extractors
+    # change so the summaries stored by previous versions are not used anymore
+    extractor_version = 3
+    # Whether the decoded events are kept once processed, when False only the summary of the
+    # gamertag is, and `get` loads the events from the cache again when they are needed
+    retain_events = True
+
+    def __init__(  # noqa: PLR0913
+        self,
+        match_id: str | None = None,
+        gamertag: str | None = None,
+        hw2api: HW2Api | None = None,
+        *,
+        horizon_ms: int | None = None,
+        step_ms: int | None = None,
+        retain_events: bool | None = None,
+        lazy: bool = False,
+    ) -> None:
         """Init the vars according to the given parameters.
 
         Parameters
@@ -1000,16 +1498,46 @@ class MatchEvents:
             An existent instance of the HW2Api class in order to use
             a shared queue, if None is specified a new local one is
             created, by default None
+        horizon_ms : int | None, optional
+            The last millisecond of the match analysed, if None
+            the horizon_ms class attribute is used, by default None
+        step_ms : int | None, optional
+            The milliseconds between the population samples, if None
+            the step_ms class attribute is used, by default None
+        retain_events : bool | None, optional
+            Whether to keep the decoded events once processed, if None
+            the retain_events class attribute is used, by default None
+        lazy : bool, optional
+            Whether setting the match ID leaves the stored summary lookup and
+            the API call to `fetch` or `resolve_all`, by default False (the
+            events are fetched straight away)
 
         Raises
         ------
         ValueError
             When a value is passed thru hw2api parameter that is not actually
-            an instance of the HW2Api class.
+            an instance of the HW2Api class, or when the horizon or the step
+            are not positive.
         """
         # Init the instance attributes
+        self._match_id = ""
+        self._gamertag = ""
+        if horizon_ms is not None:
+            self.horizon_ms = horizon_ms
+        if step_ms is not None:
+            self.step_ms = step_ms
+        if self.horizon_ms <= 0 or self.step_ms <= 0:
+            msg = "horizon_ms and step_ms parameters must be positive."
+            raise ValueError(msg)
+        if retain_events is not None:
+            self.retain_events = retain_events
+        self.lazy = lazy
         self.match_events: dict[str, Any] = {}
         self.match_summary: dict[str, Any] = {}
+        self.match_summaries: dict[str, dict[str, Any]] = {}
+        self.match_info: dict[str, Any] = {}
+        self.timelines: dict[str, hw2_spy_timeline.Timeline] = {}
+        self.combat: dict[str, dict[str, Any]] = {}
         # Setup the API instance
         if hw2api is None:
             hw2api = HW2Api()
@@ -1017,6 +1545,10 @@ class MatchEvents:
             msg = "hw2api parameter must be an instance of the HW2Api class."
             raise ValueError(msg)
         self.hw2api = hw2api
+        # Use the summary stored by a previous run when available,
+        # so the events don't need to be gathered at all
+        if not lazy and match_id is not None and gamertag is not None and self.load_summary(match_id, gamertag):
+            return
         # Verify and set the match_id value using the setter decorator
         # and trigger match_events gathering
         if match_id is not None:
@@ -1045,7 +1577,8 @@ class MatchEvents:
             # Events contain required information,
             # so we'll fetch them straight away if
             # a correct match_id is set
-            self.get()
+            if not self.lazy:
+                self.get()
         else:
             logging.error("Incorrect match id format provided.")
             self._match_id = ""
@@ -1074,6 +1607,23 @@ class MatchEvents:
             logging.error("Incorrect gamertag format provided.")
             self._gamertag = ""
 
+    def fetch(self) -> dict[str, Any]:
+        """Get the match events of a lazy instance and, when a gamertag is set, calculate its summary.
+
+        The summary stored by a previous run is used when available, without getting the events.
+
+        Returns
+        -------
+        dict[str, Any]
+            The match summary for the gamertag of the instance.
+        """
+        if self.gamertag and self.load_summary(self.match_id, self.gamertag):
+            return self.match_summary
+        self.get()
+        if self.match_events and self.gamertag:
+            self.process()
+        return self.match_summary
+
     def get(self, match_id: str | None = None) -> dict[str, Any]:
         """Get match events for the given match ID.
 
@@ -1090,128 +1640,374 @@ class MatchEvents:
         """
         match_id = self.match_id if match_id is None else self.hw2api.id_filter(match_id)
         self.match_events = {}
-        self.match_events = self.hw2api.get_match_events(match_id)
+        self.match_events = self.hw2api.get_match_events(match_id, self.horizon_ms)
         return self.match_events
 
-    def process(  # noqa: D102, C901, PLR0912, PLR0915
+    @classmethod
+    def _summary_key(cls, match_id: str, gamertag: str, horizon_ms: int, step_ms: int) -> str:
+        late_horizon_ms = hw2_spy_config.analysis_late_horizon_ms
+        return f"{match_id}/{gamertag.casefold()}/{horizon_ms}/{step_ms}/{late_horizon_ms}/{cls.extractor_version}"
+
+    @classmethod
+    def _stored_summary(  # noqa: PLR0913
+        cls, hw2api: HW2Api, match_id: str, gamertag: str, horizon_ms: int, step_ms: int
+    ) -> Any:
+        # Get the summary stored for a match and gamertag, None when not found
+        try:
+            entry = hw2api.cache_store.get("summaries", cls._summary_key(match_id, gamertag, horizon_ms, step_ms))
+        except sqlite3.Error:
+            logging.exception("Error reading the stored match summary.")
+            return None
+        return None if entry is None else json.loads(entry[0])
+
+    def load_summary(self, match_id: str, gamertag: str) -> bool:
+        """Load the summary stored for a given match and gamertag by a previous run.
+
+        Parameters
+        ----------
+        match_id : str
+            A match ID.
+        gamertag : str
+            A gamertag.
+
+        Returns
+        -------
+        bool
+            Whether a summary was found, in which case the match ID, the
+            gamertag and the summary of the instance are set.
+        """
+        safe_match_id = self.hw2api.id_filter(match_id)
+        safe_gamertag = self.hw2api.gamertag_filter(gamertag)
+        if not (safe_match_id and safe_gamertag):
+            return False
+        summary = self._stored_summary(self.hw2api, safe_match_id, safe_gamertag, self.horizon_ms, self.step_ms)
+        if summary is None:
+            return False
+        self._match_id = safe_match_id
+        self._gamertag = safe_gamertag
+        self.match_summary = summary
+        return True
+
+    def process(  # noqa: D102
         self, gamertag: str | None = None, match_events: Mapping[str, Any] | None = None
     ) -> dict[str, Any]:
         # Init vars
         match_summary: dict[str, Any] = {}
         # Use gamertag from parameter or instance attribute
         gamertag = self.gamertag if gamertag is None else self.hw2api.gamertag_filter(gamertag)
-        # Use match_events from parameter or instance attribute
-        if match_events is None:
-            match_events = self.match_events
         # Start processing
         if gamertag is not None:
-            match_summary["Population"] = [0]
-            match_summary["Units"] = {}
-            match_summary["Turrets"] = []
-            match_summary["Bases"] = []
-            match_summary["Minis"] = []
-            turrets_ids = []
-            bases_ids = []
-            minis_ids = []
-            previous_heartbeat_time = 0
-            previous_tech_level = 1
-            player_index = 0  # init as invalid
-            for event in match_events["GameEvents"]:
-                if event["EventName"] == "MatchStart":
-                    match_summary["GameMode"] = event["GameMode"]
-                    match_summary["MatchType"] = event["MatchType"]
-                    match_summary["PlaylistId"] = event["PlaylistId"]
-                if (
-                    event["EventName"] == "PlayerJoinedMatch"
-                    and isinstance(event["HumanPlayerId"], dict)
-                    and event["HumanPlayerId"].get("Gamertag") is not None
-                    and str(event["HumanPlayerId"]["Gamertag"]).casefold() == str(gamertag).casefold()
-                ):
-                    player_index = event["PlayerIndex"]
-                    match_summary["Leader"] = event["LeaderId"]
-                if event["EventName"] == "ResourceHeartbeat" and int(player_index) in range(1, 6):
-                    # logging.debug(
-                    #   f'Previous: {previous_heartbeat_time} Actual: {event["TimeSinceStartMilliseconds"]}'  # noqa: ERA001
-                    # )  # noqa: ERA001, RUF100
-                    if (
-                        previous_tech_level == 1
-                        and int(event["PlayerResources"][str(player_index)]["TechLevel"]) == 2  # noqa: PLR2004
-                    ):
-                        match_summary["T2"] = event["TimeSinceStartMilliseconds"]
-                    if (
-                        previous_tech_level == 2  # noqa: PLR2004
-                        and int(event["PlayerResources"][str(player_index)]["TechLevel"]) == 3  # noqa: PLR2004
-                    ):
-                        match_summary["T3"] = event["TimeSinceStartMilliseconds"]
-                    if (
-                        int(previous_heartbeat_time) < 120000  # noqa: PLR2004
-                        and int(event["TimeSinceStartMilliseconds"]) >= 120000  # noqa: PLR2004
-                    ):
-                        match_summary["Population"].append(event["PlayerResources"][str(player_index)]["Population"])
-                    if (
-                        int(previous_heartbeat_time) < 240000  # noqa: PLR2004
-                        and int(event["TimeSinceStartMilliseconds"]) >= 240000  # noqa: PLR2004
-                    ):
-                        match_summary["Population"].append(event["PlayerResources"][str(player_index)]["Population"])
-                    if (
-                        int(previous_heartbeat_time) < 360000  # noqa: PLR2004
-                        and int(event["TimeSinceStartMilliseconds"]) >= 360000  # noqa: PLR2004
-                    ):
-                        match_summary["Population"].append(event["PlayerResources"][str(player_index)]["Population"])
-                    if (
-                        int(previous_heartbeat_time) < 480000  # noqa: PLR2004
-                        and int(event["TimeSinceStartMilliseconds"]) >= 480000  # noqa: PLR2004
-                    ):
-                        match_summary["Population"].append(event["PlayerResources"][str(player_index)]["Population"])
-                    if (
-                        int(previous_heartbeat_time) < 600000  # noqa: PLR2004
-                        and int(event["TimeSinceStartMilliseconds"]) >= 600000  # noqa: PLR2004
-                    ):
-                        match_summary["Population"].append(event["PlayerResources"][str(player_index)]["Population"])
-                    if (
-                        int(previous_heartbeat_time) < 720000  # noqa: PLR2004
-                        and int(event["TimeSinceStartMilliseconds"]) >= 720000  # noqa: PLR2004
-                    ):
-                        match_summary["Population"].append(event["PlayerResources"][str(player_index)]["Population"])
-                    previous_heartbeat_time = event["TimeSinceStartMilliseconds"]
-                    previous_tech_level = int(event["PlayerResources"][str(player_index)]["TechLevel"])
-                if (
-                    event["EventName"] == "BuildingConstructionQueued"
-                    and int(event["TimeSinceStartMilliseconds"]) <= 720000  # noqa: PLR2004
-                    and event["PlayerIndex"] == int(player_index)
-                ):
-                    # logging.debug(event["BuildingId"])  # noqa: ERA001
-                    if event["BuildingId"] == "unsc_bldg_turret_01" or event["BuildingId"] == "cov_bldg_turret_01":
-                        turrets_ids.append(int(event["InstanceId"]))
-                    if "unsc_bldg_command" in event["BuildingId"] or "cov_bldg_builder" in event["BuildingId"]:
-                        bases_ids.append(int(event["InstanceId"]))
-                    if (
-                        event["BuildingId"] == "unsc_bldg_minibase1sock_01"
-                        or event["BuildingId"] == "cov_bldg_minibase1sock_01"
-                        or event["BuildingId"] == "unsc_bldg_minibase2sock_01"
-                        or event["BuildingId"] == "cov_bldg_minibase2sock_01"
-                    ):
-                        minis_ids.append(int(event["InstanceId"]))
-                if event["EventName"] == "BuildingConstructionCompleted" and event["InstanceId"] in turrets_ids:
-                    match_summary["Turrets"].append(int(event["TimeSinceStartMilliseconds"]))
-                    turrets_ids.remove(event["InstanceId"])
-                if event["EventName"] == "BuildingConstructionCompleted" and event["InstanceId"] in bases_ids:
-                    match_summary["Bases"].append(int(event["TimeSinceStartMilliseconds"]))
-                    bases_ids.remove(event["InstanceId"])
-                if event["EventName"] == "BuildingConstructionCompleted" and event["InstanceId"] in minis_ids:
-                    match_summary["Minis"].append(int(event["TimeSinceStartMilliseconds"]))
-                    minis_ids.remove(event["InstanceId"])
-                if (
-                    event["EventName"] == "UnitTrained"
-                    and int(event["TimeSinceStartMilliseconds"]) <= 720000  # noqa: PLR2004
-                    and event["PlayerIndex"] == int(player_index)
-                    and event["SquadId"] not in hw2_spy_config.ignored_units
-                ):
-                    if match_summary["Units"].get(event["SquadId"]) is None:
-                        match_summary["Units"][event["SquadId"]] = 1
-                    else:
-                        match_summary["Units"][event["SquadId"]] = match_summary["Units"][event["SquadId"]] + 1
-                if event["EventName"] == "MatchEnd":
-                    match_summary["Duration"] = event["ActivePlaytimeMilliseconds"]
+            # The summaries of every player are extracted at once, so the other
+            # players of the match don't need another pass over the events
+            summaries = self.process_all(match_events)
+            if str(gamertag).casefold() in summaries:
+                # the callers may modify the summary, keep the registered one untouched
+                match_summary = copy.deepcopy(summaries[str(gamertag).casefold()])
+            else:
+                match_summary = self._missing_summary(self.match_info)
         self.match_summary = match_summary
         return match_summary
+
+    @staticmethod
+    def _missing_summary(match_info: Mapping[str, Any]) -> dict[str, Any]:
+        # Summary of a gamertag not found among the human players of the match
+        match_summary = {"Population": [0], "Units": {}, "Turrets": [], "Bases": [], "Minis": []}
+        match_summary.update(match_info)
+        return match_summary
+
+    def process_all(self, match_events: Mapping[str, Any] | None = None) -> dict[str, dict[str, Any]]:
+        """Extract the summary of every human player of the match in a single pass over the events.
+
+        The summaries are kept in the `match_summaries` attribute and, when extracted
+        from the events of the instance, stored for the later runs. The details of
+        the match shared by every player are kept in the `match_info` attribute and
+        the resources timelines of the players in the `timelines` attribute.
+
+        Parameters
+        ----------
+        match_events : Mapping[str, Any] | None, optional
+            The match events, if None the events of the instance
+            are used, by default None
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            The match summary of every human player, keyed by casefolded gamertag.
+        """
+        # Use match_events from parameter or instance attribute
+        store_summaries = match_events is None
+        if match_events is None:
+            match_events = self.match_events
+        processor = hw2_spy_extractors.MatchProcessor(self.horizon_ms, self.extractors, self.step_ms)
+        summaries = processor.run(match_events["GameEvents"])
+        self.match_info = processor.match_info
+        self.match_summaries = summaries
+        timeline_extractor = processor.get(hw2_spy_extractors.TimelineExtractor)
+        if timeline_extractor is not None:
+            self.timelines = {
+                processor.gamertags[player_index]: timeline
+                for player_index, timeline in timeline_extractor.timelines.items()
+            }
+        # Store the summaries of the instance match, so later runs don't process it again
+        if store_summaries and self.match_id:
+            self._store_summaries(self.hw2api, self.match_id, self.match_summaries, self.horizon_ms, self.step_ms)
+            if not self.retain_events:
+                self.release_events()
+        return summaries
+
+    def release_events(self) -> None:
+        """Drop the decoded events, timelines and summaries of the other players of the instance match.
+
+        Only the summary of the gamertag and the details of the match are kept. The events
+        are also dropped from the registry of the API instance, so they are freed and later
+        loaded again from the cache, by `get` for instance, when needed.
+        """
+        self.match_events = {}
+        self.match_summaries = {}
+        self.timelines = {}
+        if self.match_id:
+            self.hw2api.release_match_events(self.match_id, self.horizon_ms)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Get the memory used by the match data held by the instance.
+
+        Returns
+        -------
+        int
+            The size in bytes of the events, summaries, timelines and combat data of the instance.
+        """
+        return deep_sizeof(
+            (self.match_events, self.match_summary, self.match_summaries, self.match_info, self.timelines, self.combat)
+        )
+
+    def process_combat(self, match_events: Mapping[str, Any] | None = None) -> dict[str, dict[str, Any]]:
+        """Extract the kills, losses and supply and energy traded by every human player over the whole match.
+
+        The events of the instance match are streamed in a single pass from its cached
+        compressed events, keeping the participants of the deaths, without downloading
+        them again nor keeping them decoded. The result is kept in the `combat` attribute.
+
+        Parameters
+        ----------
+        match_events : Mapping[str, Any] | None, optional
+            The match events, including the Participants of the Death events,
+            if None the events of the instance match are used, by default None
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            The combat summary of every human player, keyed by casefolded gamertag.
+        """
+        if match_events is not None:
+            events: Iterable[Mapping[str, Any]] = match_events.get("GameEvents", [])
+        elif data := self.hw2api.get_match_events_data(self.match_id):
+            events = hw2_spy_events.iter_game_events(
+                hw2_spy_events.iter_gzip_text(data), hw2_spy_extractors.CombatExtractor.skipped_keys
+            )
+        else:
+            events = []
+        processor = hw2_spy_extractors.MatchProcessor(
+            self.horizon_ms, (hw2_spy_extractors.CombatExtractor,), self.step_ms
+        )
+        self.combat = {gamertag: summary["Combat"] for gamertag, summary in processor.run(events).items()}
+        return self.combat
+
+    @classmethod
+    def _store_summaries(  # noqa: PLR0913
+        cls, hw2api: HW2Api, match_id: str, summaries: Mapping[str, Mapping[str, Any]], horizon_ms: int, step_ms: int
+    ) -> None:
+        # Store the summaries of every player of a match at once
+        if not summaries:
+            return
+        try:
+            hw2api.cache_store.put_many(
+                "summaries",
+                {
+                    cls._summary_key(match_id, gamertag, horizon_ms, step_ms): json.dumps(summary).encode()
+                    for gamertag, summary in summaries.items()
+                },
+            )
+        except sqlite3.Error:
+            logging.exception("Error storing the match summaries.")
+
+    @classmethod
+    def _submit_events(  # noqa: PLR0913
+        cls,
+        hw2api: HW2Api,
+        executor: concurrent.futures.Executor,
+        match_ids: Iterable[str],
+        horizon_ms: int,
+        step_ms: int,
+    ) -> dict[concurrent.futures.Future[tuple[dict[str, Any], dict[str, dict[str, Any]]]], str]:
+        # Load the events of every match and submit them to the workers as soon as loaded,
+        # so they are processed while loading the next, the matches that fail to load are skipped
+        futures = {}
+        for match_id in match_ids:
+            try:
+                data = hw2api.get_match_events_data(match_id)
+            except OSError:
+                logging.exception("Error loading the events of match %s.", match_id)
+                continue
+            if not data:
+                continue
+            try:
+                future = executor.submit(summarize_events, data, horizon_ms, step_ms, cls.extractors)
+            except RuntimeError:
+                # BrokenProcessPool, the matches already submitted are still collected
+                logging.exception("Error submitting the events of match %s.", match_id)
+                break
+            futures[future] = match_id
+        return futures
+
+    @classmethod
+    def summarize_many(  # noqa: PLR0913
+        cls,
+        hw2api: HW2Api,
+        pairs: Iterable[tuple[str, str]],
+        max_workers: int | None = None,
+        *,
+        horizon_ms: int | None = None,
+        step_ms: int | None = None,
+    ) -> dict[tuple[str, str], dict[str, Any]]:
+        """Get the summaries of many matches and gamertags, processing the matches in parallel processes.
+
+        The stored summaries are used when available. The events of the other matches
+        are loaded from the cache or the API by this process, then decoded and processed
+        by a pool of worker processes, which only send back the summaries of the players.
+        Every match is processed once, whatever the number of its gamertags, and the
+        summaries of all its players are stored for the later runs. A match whose events
+        can't be loaded or processed is logged and left out, without failing the others.
+
+        Parameters
+        ----------
+        hw2api : HW2Api
+            An existent instance of the HW2Api class to get the events with.
+        pairs : Iterable[tuple[str, str]]
+            The match IDs and gamertags to summarize.
+        max_workers : int | None, optional
+            The maximum number of worker processes, if None the number
+            of processors of the machine is used, by default None
+        horizon_ms : int | None, optional
+            The last millisecond of the matches analysed, if None
+            the horizon_ms class attribute is used, by default None
+        step_ms : int | None, optional
+            The milliseconds between the population samples, if None
+            the step_ms class attribute is used, by default None
+
+        Returns
+        -------
+        dict[tuple[str, str], dict[str, Any]]
+            The match summary of every match ID and gamertag pair, the pairs with
+            an invalid match ID or gamertag, or whose events are not available,
+            are left out.
+        """
+        horizon_ms = cls.horizon_ms if horizon_ms is None else horizon_ms
+        step_ms = cls.step_ms if step_ms is None else step_ms
+        results: dict[tuple[str, str], dict[str, Any]] = {}
+        # Pairs pending to be processed, by match ID
+        pending: dict[str, list[tuple[str, str]]] = {}
+        for match_id, gamertag in pairs:
+            safe_match_id = hw2api.id_filter(match_id)
+            safe_gamertag = hw2api.gamertag_filter(gamertag)
+            if not (safe_match_id and safe_gamertag):
+                continue
+            summary = cls._stored_summary(hw2api, safe_match_id, safe_gamertag, horizon_ms, step_ms)
+            if summary is not None:
+                results[(match_id, gamertag)] = summary
+            else:
+                pending.setdefault(safe_match_id, []).append((match_id, gamertag))
+        if not pending:
+            return results
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = cls._submit_events(hw2api, executor, pending, horizon_ms, step_ms)
+            for future in concurrent.futures.as_completed(futures):
+                match_id = futures[future]
+                try:
+                    match_info, summaries = future.result()
+                except Exception:
+                    logging.exception("Error processing the events of match %s.", match_id)
+                    continue
+                cls._store_summaries(hw2api, match_id, summaries, horizon_ms, step_ms)
+                for pair in pending[match_id]:
+                    summary = summaries.get(hw2api.gamertag_filter(pair[1]).casefold())
+                    results[pair] = summary if summary is not None else cls._missing_summary(match_info)
+        return results
+
+
+def summarize_events(
+    data: bytes,
+    horizon_ms: int,
+    step_ms: int = hw2_spy_config.analysis_step_ms,
+    extractors: Sequence[type[hw2_spy_extractors.Extractor]] = hw2_spy_extractors.EXTRACTORS,
+) -> tuple[dict[str, Any], dict[str, dict[str, Any]]]:
+    """Extract the summary of every human player of a match from its compressed events.
+
+    It doesn't depend on any instance, so that it can be run by worker processes.
+
+    Parameters
+    ----------
+    data : bytes
+        The gzip compressed match events, as returned by HW2Api.get_match_events_data.
+    horizon_ms : int
+        The last millisecond of the match analysed.
+    step_ms : int, optional
+        The milliseconds between the population samples,
+        by default hw2_spy_config.analysis_step_ms
+    extractors : Sequence[type[hw2_spy_extractors.Extractor]], optional
+        The classes of the extractors to run, by default hw2_spy_extractors.EXTRACTORS
+
+    Returns
+    -------
+    tuple[dict[str, Any], dict[str, dict[str, Any]]]
+        The details of the match shared by every player, and the match
+        summary of every human player, keyed by casefolded gamertag.
+    """
+    match_events = hw2_spy_events.load_game_events(hw2_spy_events.iter_gzip_text(data), horizon_ms, typed=True)
+    processor = hw2_spy_extractors.MatchProcessor(horizon_ms, extractors, step_ms)
+    summaries = processor.run(match_events.get("GameEvents", []))
+    return processor.match_info, summaries
+
+
+def resolve_all(
+    items: Iterable[PlayerStats | MatchHistory | MatchEvents | PlaylistRatings], max_workers: int | None = None
+) -> None:
+    """Fetch the data of many lazy instances at once.
+
+    Every request is handed to a pool of threads straight away, and left to the
+    priority scheduler and the throttle of the HW2Api instances: the match histories
+    of every player first, then the ratings missing from them, with a single call
+    per playlist for all the players, along with the events of all their last
+    matches, every match being loaded once even when shared by several players.
+
+    Parameters
+    ----------
+    items : Iterable[PlayerStats | MatchHistory | MatchEvents | PlaylistRatings]
+        The instances to fetch, built with lazy set to True.
+    max_workers : int | None, optional
+        The number of threads sending the requests, if None
+        the ThreadPoolExecutor default is used, by default None
+    """
+    items = list(items)
+    players = [item for item in items if isinstance(item, PlayerStats)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        # The match histories, the ratings missing from them being resolved for the whole team afterwards
+        futures: list[concurrent.futures.Future[Any]] = [
+            executor.submit(player.fetch_ranks, resolve_ratings=False) for player in players
+        ]
+        futures.extend(executor.submit(item.fetch) for item in items if not isinstance(item, PlayerStats))
+        for future in futures:
+            future.result()
+        resolving = [player for player in players if player.resolve_ratings]
+        hw2apis = {id(player.hw2api): player.hw2api for player in resolving}
+        futures = [
+            executor.submit(
+                RatingsResolver([player for player in resolving if player.hw2api is hw2api], hw2api).resolve
+            )
+            for hw2api in hw2apis.values()
+        ]
+        records = [[executor.submit(player.match_record, match) for match in player.last_matches] for player in players]
+        for future in futures:
+            future.result()
+        for player, player_records in zip(players, records, strict=True):
+            player.matches.extend(record.result() for record in player_records)
@@ -0,0 +1,392 @@
+"""HW2_Spy streaming match events parser."""
+import codecs
+import contextlib
+import json
+import re
+import zlib
+from collections.abc import Collection, Iterable, Iterator
+from typing import Any
+
+from hw2_spy import hw2_spy_config, hw2_spy_schema
+
+# Sub-objects of the events never read when processing the matches,
+# Participants holds the CombatStats of the Death events
+SKIPPED_KEYS = frozenset(
+    {
+        "Location",
+        "SpawnLocation",
+        "TargetLocation",
+        "VictimLocation",
+        "CapturerLocation",
+        "TeamResources",
+        "Participants",
+    }
+)
+
+# Last tech level a player can reach
+MAX_TECH_LEVEL = 3
+# Most characters of a document decompressed at once
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_game_events_start = re.compile(r'"GameEvents"\s*:\s*\[')
+_separators = re.compile(r"[\s,]*")
+_event_names = re.compile(r'"EventName"\s*:\s*"([^"]*)"')
+
+
+def iter_gzip_text(data: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Decompress a gzip compressed UTF-8 document a chunk at a time.
+
+    Parameters
+    ----------
+    data : bytes
+        The compressed document, such as the match events kept by the cache store.
+    chunk_size : int, optional
+        The most characters of every chunk, by default CHUNK_SIZE
+
+    Yields
+    ------
+    str
+        The next chunk of the document.
+
+    Raises
+    ------
+    EOFError
+        When the compressed document is truncated.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = data
+    while pending and not decompressor.eof:
+        text = decoder.decode(decompressor.decompress(pending, chunk_size))
+        pending = decompressor.unconsumed_tail
+        if text:
+            yield text
+    if text := decoder.decode(decompressor.flush(), final=True):
+        yield text
+    if not decompressor.eof:
+        msg = "Compressed file ended before the end-of-stream marker was reached"
+        raise EOFError(msg)
+
+
+class _Reader:
+    # Text of a document read a chunk at a time, only the part from the current position being kept
+
+    def __init__(self, document: str | Iterable[str]) -> None:
+        self.chunks = iter((document,) if isinstance(document, str) else document)
+        self.buffer = ""
+        self.position = 0
+
+    def read(self) -> bool:
+        # Drop the text before the position and append the next chunk, False when the document is over
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def find_start(self) -> bool:
+        # Move the position to the first event of the GameEvents array, False when not found
+        while (start := _game_events_start.search(self.buffer, self.position)) is None:
+            if not self.read():
+                return False
+        self.position = start.end()
+        return True
+
+
+def _scan(reader: _Reader, skipped_keys: Collection[str]) -> Iterator[dict[str, Any]]:
+    # Decode the events of the GameEvents array one at a time from the reader position, which is left
+    # at the start of every event while it is yielded, then moved right after it
+    while True:
+        start = _separators.match(reader.buffer, reader.position).end()  # type: ignore[union-attr]
+        if start == len(reader.buffer):
+            if reader.read():
+                continue
+            return
+        if reader.buffer[start] == "]":
+            return
+        try:
+            event, end = _decoder.raw_decode(reader.buffer, start)
+        except ValueError:
+            # the event may be cut by the end of the chunk
+            if reader.read():
+                continue
+            raise
+        for key in skipped_keys & event.keys():
+            del event[key]
+        reader.position = start
+        yield event
+        reader.position = end
+
+
+def _enclosing_event(document: str, position: int, skipped_keys: Collection[str]) -> dict[str, Any] | None:
+    # Decode the innermost object containing the given position, looking back for its opening brace
+    start = position
+    while (start := document.rfind("{", 0, start)) != -1:
+        try:
+            event, end = _decoder.raw_decode(document, start)
+        except ValueError:
+            continue
+        if end > position:
+            for key in skipped_keys & event.keys():
+                del event[key]
+            return dict(event)
+    return None
+
+
+def _find(
+    document: str, event_names: Collection[str], position: int, end: int, skipped_keys: Collection[str]
+) -> Iterator[dict[str, Any]]:
+    # Decode the events with the given names between an event boundary and an end position, without
+    # decoding the others, the names are looked up for every event so the caller can change them
+    event_start = _separators.match(document, position).end()  # type: ignore[union-attr]
+    for match in _event_names.finditer(document, position, end):
+        if match.group(1) in event_names:
+            event = None
+            # the events usually end with their name, so the event starts where the previous one ended
+            with contextlib.suppress(ValueError):
+                event, event_end = _decoder.raw_decode(document, event_start)
+                if event_end > match.start() and isinstance(event, dict) and event.get("EventName") in event_names:
+                    for key in skipped_keys & event.keys():
+                        del event[key]
+                else:
+                    event = None
+            if event is None:
+                event = _enclosing_event(document, match.start(), skipped_keys)
+            if event is not None and event.get("EventName") == match.group(1):
+                yield event
+        event_start = _separators.match(document, document.find("}", match.end()) + 1).end()  # type: ignore[union-attr]
+
+
+def _find_stream(
+    reader: _Reader, event_names: Collection[str], skipped_keys: Collection[str]
+) -> Iterator[dict[str, Any]]:
+    # Decode the events with the given names from the reader position to the end of the document, the
+    # part of the buffer up to the end of its last event name is searched before reading the next chunk
+    while True:
+        name_start = reader.buffer.rfind('"EventName"', reader.position)
+        end = -1 if name_start == -1 else reader.buffer.find("}", name_start)
+        if end != -1:
+            yield from _find(reader.buffer, event_names, reader.position, end, skipped_keys)
+            reader.position = end + 1
+        if not reader.read():
+            return
+
+
+def iter_game_events(
+    document: str | Iterable[str], skipped_keys: Collection[str] = SKIPPED_KEYS
+) -> Iterator[dict[str, Any]]:
+    """Decode the events of a match events document one at a time.
+
+    Only the event being yielded is decoded, so a caller which stops iterating
+    doesn't pay for the rest of the document.
+
+    Parameters
+    ----------
+    document : str | Iterable[str]
+        The match events, as returned by the API, whole or in chunks such as the ones of iter_gzip_text.
+    skipped_keys : Collection[str], optional
+        The sub-objects removed from every event, by default SKIPPED_KEYS
+
+    Yields
+    ------
+    dict[str, Any]
+        The next match event.
+    """
+    reader = _Reader(document)
+    if reader.find_start():
+        yield from _scan(reader, frozenset(skipped_keys))
+
+
+def find_events(
+    document: str, event_name: str, position: int = 0, skipped_keys: Collection[str] = SKIPPED_KEYS
+) -> Iterator[dict[str, Any]]:
+    """Decode the events with a given name found after a position, without decoding the others.
+
+    Parameters
+    ----------
+    document : str
+        The match events, as returned by the API.
+    event_name : str
+        The name of the events to decode.
+    position : int, optional
+        The position of an event boundary from which to search, such as the
+        end of a previous event, by default 0 (the first event)
+    skipped_keys : Collection[str], optional
+        The sub-objects removed from every event, by default SKIPPED_KEYS
+
+    Yields
+    ------
+    dict[str, Any]
+        The next match event with the given name.
+    """
+    if position == 0 and (start := _game_events_start.search(document)) is not None:
+        position = start.end()
+    yield from _find(document, {event_name}, position, len(document), frozenset(skipped_keys))
+
+
+def find_last_event(document: str, event_name: str, position: int = 0) -> dict[str, Any] | None:
+    """Decode the last event with a given name, searching backwards from the end of the document.
+
+    Parameters
+    ----------
+    document : str
+        The match events, as returned by the API.
+    event_name : str
+        The name of the event to decode.
+    position : int, optional
+        The position of the document from which to search, by default 0
+
+    Returns
+    -------
+    dict[str, Any] | None
+        The last match event with the given name, or None when not found.
+    """
+    end = len(document)
+    while (end := document.rfind(f'"{event_name}"', position, end)) != -1:
+        event = _enclosing_event(document, end, frozenset())
+        if event is not None and event.get("EventName") == event_name:
+            return event
+    return None
+
+
+def load_game_events(
+    document: str | Iterable[str],
+    horizon_ms: int,
+    skipped_keys: Collection[str] = SKIPPED_KEYS,
+    *,
+    typed: bool = False,
+    late_horizon_ms: int | None = hw2_spy_config.analysis_late_horizon_ms,
+) -> dict[str, Any]:
+    """Decode the match events needed to analyse a match up to a given time.
+
+    Every event up to the horizon is decoded, along with the first resource
+    heartbeat at or past it. Past the horizon, the rest of the document is
+    only searched by name for the completions of the buildings queued before
+    the horizon, the resource heartbeats changing the tech level of a player
+    yet to reach the last one, until they are all found or until the late
+    horizon, and the match end. The document can be given in chunks, such as
+    the ones of iter_gzip_text, only the chunk being searched being kept, so
+    the memory used is bounded by the horizon and not by the match length.
+
+    Parameters
+    ----------
+    document : str | Iterable[str]
+        The match events, as returned by the API, whole or in chunks.
+    horizon_ms : int
+        The last millisecond of the match to analyse.
+    skipped_keys : Collection[str], optional
+        The sub-objects removed from every event, by default SKIPPED_KEYS
+    typed : bool, optional
+        Whether to decode the events of the known types into the typed
+        structs of hw2_spy_schema, which take far less memory than the
+        decoded JSON objects, by default False
+    late_horizon_ms : int | None, optional
+        The last millisecond searched for the building completions and the tech
+        ups past the horizon, if None the whole match is searched, by default
+        the analysis_late_horizon_ms of the config file
+
+    Returns
+    -------
+    dict[str, Any]
+        The match events, with the same layout as the API response.
+    """
+    reader = _Reader(document)
+    if not reader.find_start():
+        return {}
+    game_events: list[hw2_spy_schema.Event] = []
+    # the events are typed as soon as decoded, so their JSON objects are never all held at once
+    decode = hw2_spy_schema.decode_event if typed else _untyped
+    # instance ids of the buildings queued and completed, and last resource heartbeat
+    queued: set[int] = set()
+    completed: set[int] = set()
+    heartbeat: dict[str, Any] = {}
+    heartbeat_seen = False
+    skipped_keys = frozenset(skipped_keys)
+    for event in _scan(reader, skipped_keys):
+        time_ms = event["TimeSinceStartMilliseconds"]
+        if heartbeat_seen and time_ms > horizon_ms:
+            break
+        event_name = event["EventName"]
+        if event_name == "BuildingConstructionQueued":
+            queued.add(event["InstanceId"])
+        elif event_name == "BuildingConstructionCompleted":
+            completed.add(event["InstanceId"])
+        elif event_name == "ResourceHeartbeat":
+            heartbeat = event
+            heartbeat_seen = time_ms >= horizon_ms
+        game_events.append(decode(event))
+    else:
+        # the whole match fits in the horizon
+        return {"GameEvents": game_events}
+    # buildings queued before the horizon may be completed past it, and players may reach a new tech level
+    completions, tech_ups, match_end = _late_events(
+        reader, queued - completed, heartbeat, skipped_keys, late_horizon_ms
+    )
+    late_events = [*completions, *tech_ups]
+    late_events.sort(key=lambda event: int(event["TimeSinceStartMilliseconds"]))
+    game_events.extend(decode(event) for event in late_events)
+    if match_end is not None:
+        game_events.append(decode(match_end))
+    return {"GameEvents": game_events}
+
+
+def _untyped(event: dict[str, Any]) -> dict[str, Any]:
+    # Keep an event as decoded from the JSON document
+    return event
+
+
+def _late_events(  # noqa: C901
+    reader: _Reader,
+    pending: set[int],
+    heartbeat: dict[str, Any],
+    skipped_keys: Collection[str],
+    late_horizon_ms: int | None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], dict[str, Any] | None]:
+    # Decode the rest of the document: the completions of the buildings with the given instance ids, the
+    # heartbeats changing the tech level of a player yet to reach the last one, starting from the tech
+    # levels of the given heartbeat, and the match end
+    tech_levels = {index: int(resources["TechLevel"]) for index, resources in heartbeat["PlayerResources"].items()}
+    # names of the events searched, the ones no longer needed being dropped so they are only skipped over
+    event_names = {"MatchEnd"}
+    if pending:
+        event_names.add("BuildingConstructionCompleted")
+    if not _all_max_tech(tech_levels):
+        event_names.add("ResourceHeartbeat")
+    completions: list[dict[str, Any]] = []
+    tech_ups: list[dict[str, Any]] = []
+    match_end = None
+    for event in _find_stream(reader, event_names, skipped_keys):
+        event_name = event["EventName"]
+        if event_name == "MatchEnd":
+            match_end = event
+        elif late_horizon_ms is not None and event["TimeSinceStartMilliseconds"] > late_horizon_ms:
+            event_names.intersection_update({"MatchEnd"})
+        elif event_name == "BuildingConstructionCompleted":
+            if event["InstanceId"] in pending:
+                completions.append(event)
+                pending.remove(event["InstanceId"])
+                if not pending:
+                    event_names.discard(event_name)
+        elif _update_tech_levels(event, tech_levels):
+            tech_ups.append(event)
+            if _all_max_tech(tech_levels):
+                event_names.discard(event_name)
+    return completions, tech_ups, match_end
+
+
+def _all_max_tech(tech_levels: dict[str, int]) -> bool:
+    # Whether every player reached the last tech level
+    return all(tech_level >= MAX_TECH_LEVEL for tech_level in tech_levels.values())
+
+
+def _update_tech_levels(heartbeat: dict[str, Any], tech_levels: dict[str, int]) -> bool:
+    # Update the tech levels of the players yet to reach the last one, True when one of them changed
+    changed = False
+    for index, resources in heartbeat["PlayerResources"].items():
+        tech_level = int(resources["TechLevel"])
+        if tech_levels.get(index, 1) < MAX_TECH_LEVEL and tech_level != tech_levels.get(index):
+            tech_levels[index] = tech_level
+            changed = True
+    return changed
@@ -0,0 +1,512 @@
+"""HW2_Spy match events extractors."""
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import Any, TypeVar
+
+import numpy as np
+
+from hw2_spy import hw2_spy_config, hw2_spy_events, hw2_spy_schema, hw2_spy_timeline
+
+Handler = Callable[[Any, Mapping[int, dict[str, Any]]], None]
+ExtractorT = TypeVar("ExtractorT", bound="Extractor")
+
+
+class Extractor:
+    """Base class of the extractors adding their data to the summaries of the players of a match.
+
+    An extractor is only called for the events it has a handler for, so adding one
+    costs nothing to the processing of the other events.
+    """
+
+    def __init__(self, horizon_ms: int, step_ms: int = hw2_spy_config.analysis_step_ms) -> None:
+        """Init the extractor for a new match.
+
+        Parameters
+        ----------
+        horizon_ms : int
+            The last millisecond of the match analysed.
+        step_ms : int, optional
+            The milliseconds between the samples of the timelines,
+            by default hw2_spy_config.analysis_step_ms
+        """
+        self.horizon_ms = horizon_ms
+        self.step_ms = step_ms
+
+    def handlers(self) -> Mapping[str, Handler]:
+        """Get the handlers of the extractor.
+
+        Every handler is called with the event, typed by hw2_spy_schema when
+        its type is known, and the summaries of the players which joined
+        the match so far, by player index.
+
+        Returns
+        -------
+        Mapping[str, Handler]
+            The handlers, by event name.
+        """
+        return {}
+
+    def start(self, summary: dict[str, Any]) -> None:
+        """Init the data of the extractor in the summary of a player joining the match.
+
+        Parameters
+        ----------
+        summary : dict[str, Any]
+            The summary of the player.
+        """
+
+    def finish(self, summaries: Mapping[int, dict[str, Any]]) -> None:
+        """Complete the summaries of the players once every event was handled.
+
+        Parameters
+        ----------
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+
+    @staticmethod
+    def heartbeat_resources(
+        event: hw2_spy_schema.ResourceHeartbeat, summaries: Mapping[int, dict[str, Any]]
+    ) -> Iterable[tuple[int, dict[str, Any], hw2_spy_schema.PlayerResources]]:
+        """Get the resources of every tracked player from a resource heartbeat.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.ResourceHeartbeat
+            A ResourceHeartbeat event.
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+
+        Returns
+        -------
+        Iterable[tuple[int, dict[str, Any], hw2_spy_schema.PlayerResources]]
+            The player index, summary and resources of the players with
+            a player index from 1 to 5 found in the heartbeat.
+        """
+        resources = event.resources
+        return [
+            (player_index, summary, resources[player_index])
+            for player_index, summary in summaries.items()
+            if player_index in range(1, 6) and player_index in resources
+        ]
+
+
+class UnitsExtractor(Extractor):
+    """Units trained by the players up to the horizon."""
+
+    def __init__(self, horizon_ms: int, step_ms: int = hw2_spy_config.analysis_step_ms) -> None:
+        """Init the extractor for a new match.
+
+        Parameters
+        ----------
+        horizon_ms : int
+            The last millisecond of the match analysed.
+        step_ms : int, optional
+            The milliseconds between the samples of the timelines,
+            by default hw2_spy_config.analysis_step_ms
+        """
+        super().__init__(horizon_ms, step_ms)
+        self.ignored_units = frozenset(hw2_spy_config.ignored_units)
+
+    def handlers(self) -> Mapping[str, Handler]:  # noqa: D102
+        return {"UnitTrained": self.unit_trained}
+
+    def start(self, summary: dict[str, Any]) -> None:  # noqa: D102
+        summary["Units"] = {}
+
+    def unit_trained(self, event: hw2_spy_schema.UnitTrained, summaries: Mapping[int, dict[str, Any]]) -> None:
+        """Count a unit trained by a player.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.UnitTrained
+            A UnitTrained event.
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+        summary = summaries.get(event.player_index)
+        if summary is not None and event.time_ms <= self.horizon_ms and event.squad_id not in self.ignored_units:
+            units = summary["Units"]
+            units[event.squad_id] = units.get(event.squad_id, 0) + 1
+
+
+class BuildingsExtractor(Extractor):
+    """Completion times of the turrets, bases and minibases queued by the players up to the horizon."""
+
+    turrets = frozenset({"unsc_bldg_turret_01", "cov_bldg_turret_01"})
+    minis = frozenset(
+        {
+            "unsc_bldg_minibase1sock_01",
+            "cov_bldg_minibase1sock_01",
+            "unsc_bldg_minibase2sock_01",
+            "cov_bldg_minibase2sock_01",
+        }
+    )
+
+    def __init__(self, horizon_ms: int, step_ms: int = hw2_spy_config.analysis_step_ms) -> None:
+        """Init the extractor for a new match.
+
+        Parameters
+        ----------
+        horizon_ms : int
+            The last millisecond of the match analysed.
+        step_ms : int, optional
+            The milliseconds between the samples of the timelines,
+            by default hw2_spy_config.analysis_step_ms
+        """
+        super().__init__(horizon_ms, step_ms)
+        # Player index and summary list of the queued buildings, by instance id
+        self.queued: dict[int, tuple[int, str]] = {}
+
+    def handlers(self) -> Mapping[str, Handler]:  # noqa: D102
+        return {"BuildingConstructionQueued": self.queued_building, "BuildingConstructionCompleted": self.completed}
+
+    def start(self, summary: dict[str, Any]) -> None:  # noqa: D102
+        summary["Turrets"] = []
+        summary["Bases"] = []
+        summary["Minis"] = []
+
+    def queued_building(
+        self, event: hw2_spy_schema.BuildingConstructionQueued, summaries: Mapping[int, dict[str, Any]]
+    ) -> None:
+        """Track a building queued by a player.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.BuildingConstructionQueued
+            A BuildingConstructionQueued event.
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+        if event.time_ms > self.horizon_ms or event.player_index not in summaries:
+            return
+        building_id = event.building_id
+        if building_id in self.turrets:
+            self.queued[event.instance_id] = (event.player_index, "Turrets")
+        elif "unsc_bldg_command" in building_id or "cov_bldg_builder" in building_id:
+            self.queued[event.instance_id] = (event.player_index, "Bases")
+        elif building_id in self.minis:
+            self.queued[event.instance_id] = (event.player_index, "Minis")
+
+    def completed(
+        self, event: hw2_spy_schema.BuildingConstructionCompleted, summaries: Mapping[int, dict[str, Any]]
+    ) -> None:
+        """Add the completion time of a tracked building.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.BuildingConstructionCompleted
+            A BuildingConstructionCompleted event.
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+        building = self.queued.pop(event.instance_id, None)
+        if building is not None:
+            player_index, kind = building
+            summaries[player_index][kind].append(event.time_ms)
+
+
+class TimelineExtractor(Extractor):
+    """Resources timeline of the players, their population every step up to the horizon and their tech ups."""
+
+    def __init__(self, horizon_ms: int, step_ms: int = hw2_spy_config.analysis_step_ms) -> None:
+        """Init the extractor for a new match.
+
+        Parameters
+        ----------
+        horizon_ms : int
+            The last millisecond of the match analysed.
+        step_ms : int, optional
+            The milliseconds between the samples of the timelines,
+            by default hw2_spy_config.analysis_step_ms
+        """
+        super().__init__(horizon_ms, step_ms)
+        self.checkpoints = np.arange(step_ms, horizon_ms + 1, step_ms)
+        # Heartbeat time and resources of the players, by player index
+        self.rows: dict[int, list[tuple[int, ...]]] = {}
+        self.timelines: dict[int, hw2_spy_timeline.Timeline] = {}
+
+    def handlers(self) -> Mapping[str, Handler]:  # noqa: D102
+        return {"ResourceHeartbeat": self.heartbeat}
+
+    def start(self, summary: dict[str, Any]) -> None:  # noqa: D102
+        summary["Population"] = [0]
+
+    def heartbeat(self, event: hw2_spy_schema.ResourceHeartbeat, summaries: Mapping[int, dict[str, Any]]) -> None:
+        """Add the resources of the players to their timeline.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.ResourceHeartbeat
+            A ResourceHeartbeat event.
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+        for player_index, _, resources in self.heartbeat_resources(event, summaries):
+            self.rows.setdefault(player_index, []).append((event.time_ms, *resources))
+
+    def finish(self, summaries: Mapping[int, dict[str, Any]]) -> None:
+        """Build the timelines, then sample the population and set the tech ups of the players.
+
+        Parameters
+        ----------
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+        for player_index, rows in self.rows.items():
+            timeline = self.timelines[player_index] = hw2_spy_timeline.Timeline(rows)
+            summary = summaries[player_index]
+            summary["Population"].extend(timeline.sample("Population", self.checkpoints).tolist())
+            tech_ups = timeline.tech_ups()
+            for tech_level in (2, 3):
+                if tech_level in tech_ups:
+                    summary[f"T{tech_level}"] = tech_ups[tech_level]
+
+
+class CombatExtractor(Extractor):
+    """Kills, losses and supply and energy traded by the players over the whole match.
+
+    The supply and energy of every unit and building are the ones spent to train, build
+    and upgrade it, a kill is credited to the enemy player which landed the most attacks
+    on the victim. It needs the Participants of the Death events, so its events are to
+    be decoded without dropping them, see `skipped_keys`.
+    """
+
+    # Sub-objects of the events which can be dropped when decoding them for this extractor
+    skipped_keys = hw2_spy_events.SKIPPED_KEYS - {"Participants"}
+
+    def __init__(self, horizon_ms: int, step_ms: int = hw2_spy_config.analysis_step_ms) -> None:
+        """Init the extractor for a new match.
+
+        Parameters
+        ----------
+        horizon_ms : int
+            The last millisecond of the match analysed, not used as the whole match is.
+        step_ms : int, optional
+            The milliseconds between the samples of the timelines,
+            by default hw2_spy_config.analysis_step_ms
+        """
+        super().__init__(horizon_ms, step_ms)
+        # Supply and energy spent on the units and buildings, by instance id
+        self.costs: dict[int, list[int]] = {}
+        # Team of every player, by player index
+        self.teams: dict[int, int] = {}
+
+    def handlers(self) -> Mapping[str, Handler]:  # noqa: D102
+        return {
+            "PlayerJoinedMatch": self.player_joined,
+            "UnitTrained": self.spent,
+            "BuildingConstructionQueued": self.spent,
+            "BuildingUpgraded": self.spent,
+            "Death": self.death,
+        }
+
+    def start(self, summary: dict[str, Any]) -> None:  # noqa: D102
+        summary["Combat"] = {
+            "Kills": {},
+            "Losses": {},
+            "SupplyKilled": 0,
+            "EnergyKilled": 0,
+            "SupplyLost": 0,
+            "EnergyLost": 0,
+        }
+
+    def player_joined(self, event: hw2_spy_schema.PlayerJoinedMatch, _: Mapping[int, dict[str, Any]]) -> None:
+        """Keep the team of a player, human or not.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.PlayerJoinedMatch
+            A PlayerJoinedMatch event.
+        """
+        self.teams[event.player_index] = event.team_id
+
+    def spent(self, event: hw2_spy_schema.Purchase, _: Mapping[int, dict[str, Any]]) -> None:
+        """Add the supply and energy spent on a unit or building.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.Purchase
+            A UnitTrained, BuildingConstructionQueued or BuildingUpgraded event.
+        """
+        cost = self.costs.setdefault(event.instance_id, [0, 0])
+        cost[0] += event.supply_cost
+        cost[1] += event.energy_cost
+
+    def death(self, event: hw2_spy_schema.Death, summaries: Mapping[int, dict[str, Any]]) -> None:
+        """Count a unit or building lost by its player and killed by an enemy player.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.Death
+            A Death event.
+        summaries : Mapping[int, dict[str, Any]]
+            The summaries of the players, by player index.
+        """
+        victim_index = event.victim_player_index
+        object_type = event.victim_object_type_id
+        supply, energy = self.costs.pop(event.victim_instance_id, (0, 0))
+        if victim_index in summaries:
+            self._add(summaries[victim_index]["Combat"], "Losses", object_type, supply, energy)
+        if event.is_suicide:
+            return
+        killer_index = self.killer(event)
+        if killer_index is not None and killer_index in summaries:
+            self._add(summaries[killer_index]["Combat"], "Kills", object_type, supply, energy)
+
+    def killer(self, event: hw2_spy_schema.Death) -> int | None:
+        """Get the enemy player which landed the most attacks on the victim of a death.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.Death
+            A Death event.
+
+        Returns
+        -------
+        int | None
+            The player index of the killer, or None when no enemy took part.
+        """
+        victim_index = event.victim_player_index
+        victim_team = self.teams.get(victim_index)
+        attacks = {
+            player_index: attacks_landed
+            for player_index, attacks_landed in event.attacks.items()
+            if player_index != victim_index and (victim_team is None or self.teams.get(player_index) != victim_team)
+        }
+        return max(attacks, key=attacks.__getitem__) if attacks else None
+
+    @staticmethod
+    def _add(combat: dict[str, Any], kind: str, object_type: str, supply: int, energy: int) -> None:
+        # Count a kill or a loss by object type and add its value to the totals
+        total = "Killed" if kind == "Kills" else "Lost"
+        entry = combat[kind].setdefault(object_type, {"Count": 0, "Supply": 0, "Energy": 0})
+        entry["Count"] += 1
+        entry["Supply"] += supply
+        entry["Energy"] += energy
+        combat[f"Supply{total}"] += supply
+        combat[f"Energy{total}"] += energy
+
+
+# Extractors used by default, their data is added to the summaries in this order
+EXTRACTORS: tuple[type[Extractor], ...] = (TimelineExtractor, UnitsExtractor, BuildingsExtractor)
+
+
+class MatchProcessor:
+    """Run a set of extractors over the events of a match, dispatching every event by name."""
+
+    def __init__(
+        self,
+        horizon_ms: int,
+        extractors: Sequence[type[Extractor]] = EXTRACTORS,
+        step_ms: int = hw2_spy_config.analysis_step_ms,
+    ) -> None:
+        """Init the extractors and the dispatch table.
+
+        Parameters
+        ----------
+        horizon_ms : int
+            The last millisecond of the match analysed.
+        extractors : Sequence[type[Extractor]], optional
+            The classes of the extractors to run, by default EXTRACTORS
+        step_ms : int, optional
+            The milliseconds between the samples of the timelines,
+            by default hw2_spy_config.analysis_step_ms
+        """
+        self.extractors = [extractor(horizon_ms, step_ms) for extractor in extractors]
+        # Details of the match shared by every player
+        self.match_info: dict[str, Any] = {}
+        # Summaries and casefolded gamertags of the human players, by player index
+        self.summaries: dict[int, dict[str, Any]] = {}
+        self.gamertags: dict[int, str] = {}
+        self.dispatch: dict[str, list[Handler]] = {
+            "MatchStart": [self.match_start],
+            "PlayerJoinedMatch": [self.player_joined],
+            "MatchEnd": [self.match_end],
+        }
+        for extractor in self.extractors:
+            for event_name, handler in extractor.handlers().items():
+                self.dispatch.setdefault(event_name, []).append(handler)
+
+    def run(self, events: Iterable[hw2_spy_schema.Event]) -> dict[str, dict[str, Any]]:
+        """Extract the summary of every human player of the match.
+
+        Parameters
+        ----------
+        events : Iterable[hw2_spy_schema.Event]
+            The match events in time order, typed or as returned by the API,
+            in which case only the ones with a handler are decoded.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            The match summary of every human player, keyed by casefolded gamertag.
+        """
+        dispatch = self.dispatch
+        summaries = self.summaries
+        for event in events:
+            handlers = dispatch.get(hw2_spy_schema.event_name(event))
+            if handlers:
+                typed_event = hw2_spy_schema.decode_event(event)
+                for handler in handlers:
+                    handler(typed_event, summaries)
+        for extractor in self.extractors:
+            extractor.finish(summaries)
+        if "Duration" in self.match_info:
+            for summary in summaries.values():
+                summary["Duration"] = self.match_info["Duration"]
+        return {self.gamertags[player_index]: summary for player_index, summary in summaries.items()}
+
+    def match_start(self, event: hw2_spy_schema.MatchStart, _: Mapping[int, dict[str, Any]]) -> None:
+        """Keep the game mode, match type and playlist of the match.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.MatchStart
+            A MatchStart event.
+        """
+        self.match_info.update(
+            {"GameMode": event.game_mode, "MatchType": event.match_type, "PlaylistId": event.playlist_id}
+        )
+
+    def player_joined(self, event: hw2_spy_schema.PlayerJoinedMatch, _: Mapping[int, dict[str, Any]]) -> None:
+        """Start the summary of a human player.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.PlayerJoinedMatch
+            A PlayerJoinedMatch event.
+        """
+        if event.gamertag is None:
+            return
+        summary: dict[str, Any] = {}
+        for extractor in self.extractors:
+            extractor.start(summary)
+        summary.update(self.match_info)
+        summary["Leader"] = event.leader_id
+        self.summaries[event.player_index] = summary
+        self.gamertags[event.player_index] = event.gamertag.casefold()
+
+    def match_end(self, event: hw2_spy_schema.MatchEnd, _: Mapping[int, dict[str, Any]]) -> None:
+        """Keep the duration of the match, added to the summaries once they are complete.
+
+        Parameters
+        ----------
+        event : hw2_spy_schema.MatchEnd
+            A MatchEnd event.
+        """
+        self.match_info["Duration"] = event.active_playtime_ms
+
+    def get(self, extractor_class: type[ExtractorT]) -> ExtractorT | None:
+        """Get the extractor of a given class.
+
+        Parameters
+        ----------
+        extractor_class : type[ExtractorT]
+            The class of the extractor.
+
+        Returns
+        -------
+        ExtractorT | None
+            The first extractor of the class, or None when not run.
+        """
+        return next((extractor for extractor in self.extractors if isinstance(extractor, extractor_class)), None)
@@ -0,0 +1,439 @@
+"""HW2_Spy metadata registry."""
+import bisect
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import weakref
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+from hw2_spy import hw2_spy_config
+
+if TYPE_CHECKING:
+    from hw2_spy.hw2_spy_data import HW2Api
+
+# Metadata endpoints compiled into the index, with their sample file
+ENDPOINTS = {
+    "csr-designations": "csr_designations.json",
+    "leaders": "leaders.json",
+    "playlists": "playlists.json",
+    "spartan-ranks": "spartan-ranks.json",
+    "game-objects": "game-objects.json",
+}
+
+
+def _format_id(identity: str) -> str:
+    # Format a content identity as the dashed ids used by the stats endpoints
+    return f"{identity[:8]}-{identity[8:12]}-{identity[12:16]}-{identity[16:20]}-{identity[20:]}"
+
+
+def _data_directory() -> str:
+    # User-writable data folder of HW2_Spy, the package folder may be read-only (e.g. installed with pipx)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, "hw2_spy")
+
+
+def _append_locked(path: str, data: bytes) -> None:
+    # Append to a file under an exclusive lock, a single O_APPEND write is only atomic on local POSIX
+    # filesystems, not on network ones nor on Windows, so concurrent runs could interleave their lines
+    file_descriptor = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            # msvcrt locks a byte range from the current position, the same first byte for every writer
+            os.lseek(file_descriptor, 0, os.SEEK_SET)
+            msvcrt.locking(file_descriptor, msvcrt.LK_LOCK, 1)
+            try:
+                os.lseek(file_descriptor, 0, os.SEEK_END)
+                os.write(file_descriptor, data)
+            finally:
+                os.lseek(file_descriptor, 0, os.SEEK_SET)
+                msvcrt.locking(file_descriptor, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+            try:
+                os.write(file_descriptor, data)
+            finally:
+                fcntl.flock(file_descriptor, fcntl.LOCK_UN)
+    finally:
+        os.close(file_descriptor)
+
+
+def _flush_pending(path: str, lock: threading.Lock, pending: list[str]) -> None:
+    # Append the buffered unknown units to their record file, emptying the buffer
+    with lock:
+        if not pending:
+            return
+        lines = "".join(f"{unit_id}\n" for unit_id in pending)
+        pending.clear()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            _append_locked(path, lines.encode())
+        except OSError:
+            logging.exception("Can't record the unknown units.")
+
+
+def _load_sample(path: str) -> dict[str, Any]:
+    # Load a metadata sample, {} when it can't be read
+    try:
+        with open(path) as sample_file:
+            return dict(json.load(sample_file))
+    except (OSError, ValueError):
+        logging.exception("Can't load the metadata sample %s.", path)
+        return {}
+
+
+class UnknownUnits:
+    """Append-only record of the object type ids missing from the metadata, one id per line.
+
+    The new ids are buffered and appended in batches with a single write under a file lock,
+    the file is never rewritten, so concurrent runs only ever add lines to it. The file is
+    kept in the user data folder, as the package folder may not be writable.
+    """
+
+    # Number of new ids buffered before they are written
+    batch_size = 16
+
+    def __init__(self, path: str | None = None) -> None:
+        """Load the recorded ids.
+
+        Parameters
+        ----------
+        path : str | None, optional
+            The record file, if None the one in the user data folder is used, by default None
+        """
+        if path is None:
+            path = os.path.join(_data_directory(), "unknown_units.txt")
+        self.path = path
+        self.lock = threading.Lock()
+        # Ids waiting to be written, emptied in place as the finalizer holds the list
+        self.pending: list[str] = []
+        self.unit_ids = self._read()
+        # the buffered ids are written when the instance is collected or at exit, without keeping it alive
+        weakref.finalize(self, _flush_pending, self.path, self.lock, self.pending)
+
+    def _read(self) -> set[str]:
+        try:
+            with open(self.path) as record_file:
+                return {line.strip() for line in record_file if line.strip()}
+        except FileNotFoundError:
+            return set()
+        except OSError:
+            logging.exception("Can't read the unknown units.")
+            return set()
+
+    def add(self, unit_id: str) -> None:
+        """Record an unknown object type id, written with the next batch.
+
+        Parameters
+        ----------
+        unit_id : str
+            The object type id.
+        """
+        with self.lock:
+            if unit_id in self.unit_ids:
+                return
+            self.unit_ids.add(unit_id)
+            self.pending.append(unit_id)
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the buffered ids to the record file."""
+        _flush_pending(self.path, self.lock, self.pending)
+
+
+class MetadataRegistry:
+    """Names of the leaders, designations, playlists and units, and the XP needed for every level.
+
+    The metadata endpoints are compiled once into a compact index file, which is loaded
+    in memory, so the names are looked up in dicts and the levels by bisection. The
+    names of the config file take precedence, so they can shorten the official ones.
+    """
+
+    # Version of the index layout, to be bumped whenever compile_index changes so older index files are rebuilt
+    index_version = 1
+
+    def __init__(self, index: Mapping[str, Any], unknown_units: UnknownUnits | None = None) -> None:
+        """Load a compiled index.
+
+        Parameters
+        ----------
+        index : Mapping[str, Any]
+            The index, as returned by compile_index.
+        unknown_units : UnknownUnits | None, optional
+            The record of the units missing from the metadata, if None
+            the one in the user data folder is used, by default None
+        """
+        self.leaders: dict[int, str] = {int(key): name for key, name in index.get("leaders", {}).items()}
+        self.leaders.update(hw2_spy_config.leaders)
+        self.designations: dict[int, str] = {int(key): name for key, name in index.get("designations", {}).items()}
+        self.designations.update((int(key), name) for key, name in hw2_spy_config.designations.items())
+        self.playlists: dict[str, str] = dict(index.get("playlists", {}))
+        self.units: dict[str, str] = dict(index.get("units", {}))
+        # the config file also records the unknown units by their id, which are no name
+        self.units.update((unit_id, name) for unit_id, name in hw2_spy_config.units.items() if name != unit_id)
+        # the units recorded as unknown are named by their id, unless the metadata knows them by now
+        self.unknown_units = UnknownUnits() if unknown_units is None else unknown_units
+        for unit_id in self.unknown_units.unit_ids:
+            self.units.setdefault(unit_id, unit_id)
+        levels = index.get("levels") or sorted((xp, level) for level, xp in hw2_spy_config.levels.items())
+        # Start XP of every level, sorted, and the matching levels
+        self.level_xps = [int(xp) for xp, _ in levels]
+        self.level_numbers = [int(level) for _, level in levels]
+
+    @staticmethod
+    def default_path() -> str:
+        """Get the path of the index file in the user data folder.
+
+        Returns
+        -------
+        str
+            The index file path.
+        """
+        return os.path.join(_data_directory(), "metadata.json")
+
+    @staticmethod
+    def load_samples() -> dict[str, dict[str, Any]]:
+        """Load the metadata shipped in the samples folder.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            The metadata of every endpoint found, keyed by endpoint.
+        """
+        script_directory = os.path.dirname(os.path.abspath(__file__))
+        documents = {
+            endpoint: _load_sample(os.path.join(script_directory, "samples", file_name))
+            for endpoint, file_name in ENDPOINTS.items()
+        }
+        return {endpoint: document for endpoint, document in documents.items() if document}
+
+    @classmethod
+    def compile_index(cls, documents: Mapping[str, Mapping[str, Any]]) -> dict[str, Any]:
+        """Compile the metadata into an index keeping only the looked up values.
+
+        Parameters
+        ----------
+        documents : Mapping[str, Mapping[str, Any]]
+            The metadata of every endpoint, as returned by the API, keyed by endpoint.
+
+        Returns
+        -------
+        dict[str, Any]
+            The index.
+        """
+
+        def views(endpoint: str, content_type: str) -> list[dict[str, Any]]:
+            items = documents.get(endpoint, {}).get("ContentItems", [])
+            return [item["View"] for item in items if content_type in item.get("View", {})]
+
+        designations = {
+            view["HW2CsrDesignation"]["ID"]: view["HW2CsrDesignation"]["DisplayInfo"]["View"][
+                "HW2CsrDesignationDisplayInfo"
+            ]["Name"]
+            for view in views("csr-designations", "HW2CsrDesignation")
+        }
+        leaders = {view["HW2Leader"]["Id"]: view["HW2Leader"]["Name"] for view in views("leaders", "HW2Leader")}
+        playlists = {_format_id(view["Identity"]): view["Title"].strip() for view in views("playlists", "HW2Playlist")}
+        levels = sorted(
+            (view["HW2SpartanRank"]["StartXP"], view["HW2SpartanRank"]["RankNumber"])
+            for view in views("spartan-ranks", "HW2SpartanRank")
+        )
+        units = {
+            view["HW2Object"]["ObjectTypeId"]: view["HW2Object"]["DisplayInfo"]["View"]["HW2ObjectDisplayInfo"][
+                "Name"
+            ].title()
+            for view in views("game-objects", "HW2Object")
+        }
+        return {
+            "version": cls.index_version,
+            "designations": designations,
+            "leaders": leaders,
+            "playlists": playlists,
+            "levels": levels,
+            "units": units,
+        }
+
+    @classmethod
+    def build(cls, hw2api: "HW2Api | None" = None, path: str | None = None) -> "MetadataRegistry":
+        """Get the metadata, compile it and save the index.
+
+        Parameters
+        ----------
+        hw2api : HW2Api | None, optional
+            An instance of the HW2Api class to get the metadata from the API, the
+            samples being used for the endpoints it can't get, if None only the
+            samples are used, by default None
+        path : str | None, optional
+            The index file, if None the one in the user data folder is used, by default None
+
+        Returns
+        -------
+        MetadataRegistry
+            The registry of the new index.
+        """
+        documents = cls.load_samples()
+        if hw2api is not None:
+            for endpoint in ENDPOINTS:
+                if metadata := hw2api.get_metadata(endpoint):
+                    documents[endpoint] = metadata
+        index = cls.compile_index(documents)
+        path = cls.default_path() if path is None else path
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # replace the index at once, so that it is never read half written
+            with open(f"{path}.{os.getpid()}.tmp", "w") as index_file:
+                json.dump(index, index_file, separators=(",", ":"))
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError:
+            logging.exception("Can't save the metadata index.")
+        return cls(index)
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "MetadataRegistry":
+        """Load the index file, building it from the samples when missing or outdated.
+
+        Parameters
+        ----------
+        path : str | None, optional
+            The index file, if None the one in the user data folder is used, by default None
+
+        Returns
+        -------
+        MetadataRegistry
+            The registry of the index.
+        """
+        path = cls.default_path() if path is None else path
+        try:
+            with open(path) as index_file:
+                index = json.load(index_file)
+        except FileNotFoundError:
+            return cls.build(path=path)
+        except (OSError, ValueError):
+            logging.exception("Can't load the metadata index, building it again.")
+            return cls.build(path=path)
+        if index.get("version") != cls.index_version:
+            return cls.build(path=path)
+        return cls(index)
+
+    def leader(self, leader_id: int) -> str | None:
+        """Get the name of a leader.
+
+        Parameters
+        ----------
+        leader_id : int
+            The leader id.
+
+        Returns
+        -------
+        str | None
+            The leader name, or None when unknown.
+        """
+        return self.leaders.get(leader_id)
+
+    def designation(self, designation_id: int) -> str | None:
+        """Get the name of a CSR designation.
+
+        Parameters
+        ----------
+        designation_id : int
+            The designation id.
+
+        Returns
+        -------
+        str | None
+            The designation name, or None when unknown.
+        """
+        return self.designations.get(designation_id)
+
+    def playlist(self, playlist_id: str) -> str | None:
+        """Get the title of a playlist.
+
+        Parameters
+        ----------
+        playlist_id : str
+            The playlist id.
+
+        Returns
+        -------
+        str | None
+            The playlist title, or None when unknown.
+        """
+        return self.playlists.get(playlist_id.lower())
+
+    def unit(self, object_type_id: str) -> str | None:
+        """Get the name of a unit or building.
+
+        Parameters
+        ----------
+        object_type_id : str
+            The object type id.
+
+        Returns
+        -------
+        str | None
+            The object name, or None when unknown.
+        """
+        return self.units.get(object_type_id)
+
+    def unit_name(self, object_type_id: str) -> str:
+        """Get the name of a unit or building, recording the unknown ones.
+
+        Parameters
+        ----------
+        object_type_id : str
+            The object type id.
+
+        Returns
+        -------
+        str
+            The object name, or its id when unknown.
+        """
+        name = self.units.get(object_type_id)
+        if name is None:
+            self.unknown_units.add(object_type_id)
+            name = self.units.setdefault(object_type_id, object_type_id)
+        return name
+
+    def level(self, xp: int) -> int | None:
+        """Get the level reached with an amount of XP.
+
+        Parameters
+        ----------
+        xp : int
+            The XP of a player.
+
+        Returns
+        -------
+        int | None
+            The last level starting at or below the XP, or None when the levels are unknown.
+        """
+        if not self.level_numbers:
+            return None
+        index = bisect.bisect_right(self.level_xps, xp)
+        return self.level_numbers[index - 1] if index else self.level_numbers[0] - 1
+
+
+@functools.cache
+def get_registry() -> MetadataRegistry:
+    """Get the registry of the index in the user data folder, loaded once.
+
+    Returns
+    -------
+    MetadataRegistry
+        The metadata registry.
+    """
+    return MetadataRegistry.load()
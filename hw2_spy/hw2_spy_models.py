@@ -0,0 +1,196 @@
+"""HW2_Spy player stats and match summaries records."""
+from collections import Counter
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from dateutil.parser import isoparse
+
+from hw2_spy import hw2_spy_config, hw2_spy_metadata
+
+# Summary keys held by the typed fields of MatchRecord, the others are kept as they are
+_MATCH_KEYS = frozenset(
+    {"Leader", "Duration", "T2", "T3", "Turrets", "Bases", "Minis", "Units", "Population", "Combat"},
+)
+
+
+def ms_to_min_sec(milliseconds: int) -> str:
+    """Format a duration as minutes and seconds.
+
+    Parameters
+    ----------
+    milliseconds : int
+        The duration in milliseconds.
+
+    Returns
+    -------
+    str
+        The duration as "mm:ss".
+    """
+    total_seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(total_seconds, 60)
+    return f"{minutes:02}:{seconds:02}"
+
+
+@dataclass(slots=True)
+class Rating:
+    """Rating of a player in a mode, as raw values."""
+
+    mmr: float | None = None
+    tier: int | None = None
+    designation: int | None = None
+
+    def update(self, ratings: Mapping[str, Any], mode: str) -> None:
+        """Update the values found in a ratings summary.
+
+        Parameters
+        ----------
+        ratings : Mapping[str, Any]
+            A ratings summary, with the values of the mode suffixed by its name.
+        mode : str
+            The mode of the rating.
+        """
+        if ratings.get(f"mmr{mode}") is not None:
+            self.mmr = float(ratings[f"mmr{mode}"])
+        if ratings.get(f"tier{mode}") is not None:
+            self.tier = int(ratings[f"tier{mode}"])
+        if ratings.get(f"designation{mode}") is not None:
+            self.designation = int(ratings[f"designation{mode}"])
+
+    def export_json(self, mode: str) -> dict[str, str]:
+        """Export the formatted rating.
+
+        Parameters
+        ----------
+        mode : str
+            The mode of the rating, suffixing the keys.
+
+        Returns
+        -------
+        dict[str, str]
+            The mmr, csr, tier and designation, empty when unknown.
+        """
+        mmr = "" if self.mmr is None else str(round(self.mmr, 2))
+        tier = "" if self.tier is None else str(self.tier)
+        designation = ""
+        if self.designation is not None:
+            designation = hw2_spy_metadata.get_registry().designation(self.designation) or str(self.designation)
+        csr = tier + " " + designation if tier and designation else ""
+        return {
+            f"mmr{mode}": mmr,
+            f"csr{mode}": csr,
+            f"tier{mode}": tier,
+            f"designation{mode}": designation,
+        }
+
+
+def _export_combat(combat: Mapping[str, Any], translate_unit: Callable[[str], str]) -> dict[str, Any]:
+    # Name the object types of the kills and losses, adding up the ones sharing a name
+    exported = dict(combat)
+    for kind in ("Kills", "Losses"):
+        by_name: dict[str, dict[str, int]] = {}
+        for object_type, entry in combat.get(kind, {}).items():
+            totals = by_name.setdefault(translate_unit(object_type), {"Count": 0, "Supply": 0, "Energy": 0})
+            for key in totals:
+                totals[key] += entry[key]
+        exported[kind] = by_name
+    return exported
+
+
+@dataclass(slots=True)
+class MatchRecord:
+    """Summary of a match for a player, with times in milliseconds and ids as given by the API."""
+
+    start_date: datetime | None = None
+    result: int | None = None
+    leader: int | None = None
+    duration: int | None = None
+    t2: int | None = None
+    t3: int | None = None
+    turrets: list[int] | None = None
+    bases: list[int] | None = None
+    minis: list[int] | None = None
+    units: dict[str, int] | None = None
+    population: list[int] | None = None
+    # Kills, losses and supply and energy traded over the whole match, as extracted by CombatExtractor
+    combat: dict[str, Any] | None = None
+    # Summary values of other extractors, exported as they are
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_summary(cls, match: Mapping[str, Any], summary: Mapping[str, Any]) -> "MatchRecord":
+        """Build the record of a match from its history entry and its summary.
+
+        Parameters
+        ----------
+        match : Mapping[str, Any]
+            The match, as found in the match history.
+        summary : Mapping[str, Any]
+            The match summary of the player, as returned by MatchEvents,
+            with the combat stats of the player under Combat when known.
+
+        Returns
+        -------
+        MatchRecord
+            The match record, the summary is left untouched.
+        """
+        return cls(
+            start_date=None if match.get("MatchStartDate") is None else isoparse(match["MatchStartDate"]),
+            result=match.get("Result"),
+            leader=None if summary.get("Leader") is None else int(summary["Leader"]),
+            duration=summary.get("Duration"),
+            t2=summary.get("T2"),
+            t3=summary.get("T3"),
+            turrets=summary.get("Turrets"),
+            bases=summary.get("Bases"),
+            minis=summary.get("Minis"),
+            units=summary.get("Units"),
+            population=summary.get("Population"),
+            combat=summary.get("Combat"),
+            extra={key: value for key, value in summary.items() if key not in _MATCH_KEYS},
+        )
+
+    def export_json(self, translate_unit: Callable[[str], str]) -> dict[str, Any]:  # noqa: C901, PLR0912
+        """Export the formatted match summary.
+
+        Parameters
+        ----------
+        translate_unit : Callable[[str], str]
+            The function giving the name of a unit from its id.
+
+        Returns
+        -------
+        dict[str, Any]
+            The summary, with the times as "mm:ss" and the names of the leader, result and units.
+        """
+        summary = dict(self.extra)
+        if self.leader is not None:
+            summary["Leader"] = hw2_spy_metadata.get_registry().leader(self.leader) or str(self.leader)
+        if self.duration is not None:
+            summary["Duration"] = ms_to_min_sec(self.duration)
+        if self.t2 is not None:
+            summary["T2"] = ms_to_min_sec(self.t2)
+        if self.t3 is not None:
+            summary["T3"] = ms_to_min_sec(self.t3)
+        if self.turrets is not None:
+            summary["Turrets"] = [ms_to_min_sec(time_ms) for time_ms in self.turrets]
+        if self.bases is not None:
+            summary["Bases"] = [ms_to_min_sec(time_ms) for time_ms in self.bases]
+        if self.minis is not None:
+            summary["Minis"] = [ms_to_min_sec(time_ms) for time_ms in self.minis]
+        if self.units is not None:
+            # several unit ids share a name (e.g. the Grunts of every leader), their counts are added up
+            units: Counter[str] = Counter()
+            for unit_id, count in self.units.items():
+                units[translate_unit(unit_id)] += count
+            summary["Units"] = dict(units)
+        if self.population is not None:
+            summary["Population"] = self.population
+        if self.combat is not None:
+            summary["Combat"] = _export_combat(self.combat, translate_unit)
+        if self.start_date is not None:
+            summary["Date"] = self.start_date.strftime("%Y-%m-%d %H:%M:%S")
+        if self.result is not None:
+            summary["Result"] = hw2_spy_config.results[self.result]
+        return summary
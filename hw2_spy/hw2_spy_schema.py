@@ -0,0 +1,393 @@
+"""HW2_Spy typed match events."""
+from collections.abc import Callable, Mapping
+from typing import Any, NamedTuple
+
+
+class PlayerResources(NamedTuple):
+    """Resources of a player at a resource heartbeat, in the order of the Timeline fields."""
+
+    population: int
+    supply: int
+    energy: int
+    tech_level: int
+    mana: int
+    command_points: int
+
+    @classmethod
+    def decode(cls, resources: Mapping[str, Any]) -> "PlayerResources":
+        """Decode the resources of a player.
+
+        Parameters
+        ----------
+        resources : Mapping[str, Any]
+            The resources of a player, as found in the PlayerResources of a ResourceHeartbeat event.
+
+        Returns
+        -------
+        PlayerResources
+            The typed resources.
+        """
+        return cls(
+            int(resources["Population"]),
+            int(resources["Supply"]),
+            int(resources["Energy"]),
+            int(resources["TechLevel"]),
+            int(resources["Mana"]),
+            int(resources["CommandPoints"]),
+        )
+
+
+class ResourceHeartbeat(NamedTuple):
+    """Resources of every player, sent periodically."""
+
+    time_ms: int
+    # Resources of the players, by player index
+    resources: dict[int, PlayerResources]
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "ResourceHeartbeat":
+        """Decode a ResourceHeartbeat event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        ResourceHeartbeat
+            The typed event.
+        """
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            {
+                int(player_index): PlayerResources.decode(resources)
+                for player_index, resources in event["PlayerResources"].items()
+            },
+        )
+
+
+class MatchStart(NamedTuple):
+    """Start of the match."""
+
+    time_ms: int
+    game_mode: int
+    match_type: int
+    playlist_id: str
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "MatchStart":
+        """Decode a MatchStart event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        MatchStart
+            The typed event.
+        """
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            int(event["GameMode"]),
+            int(event["MatchType"]),
+            str(event["PlaylistId"]),
+        )
+
+
+class PlayerJoinedMatch(NamedTuple):
+    """A human or computer player joining the match."""
+
+    time_ms: int
+    player_index: int
+    team_id: int
+    leader_id: int
+    # Gamertag of the human players, None for the computer ones
+    gamertag: str | None
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "PlayerJoinedMatch":
+        """Decode a PlayerJoinedMatch event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        PlayerJoinedMatch
+            The typed event.
+        """
+        human_player = event["HumanPlayerId"]
+        gamertag = human_player.get("Gamertag") if isinstance(human_player, dict) else None
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            int(event["PlayerIndex"]),
+            int(event["TeamId"]),
+            int(event["LeaderId"]),
+            None if gamertag is None else str(gamertag),
+        )
+
+
+class MatchEnd(NamedTuple):
+    """End of the match."""
+
+    time_ms: int
+    active_playtime_ms: int
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "MatchEnd":
+        """Decode a MatchEnd event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        MatchEnd
+            The typed event.
+        """
+        return cls(int(event["TimeSinceStartMilliseconds"]), int(event["ActivePlaytimeMilliseconds"]))
+
+
+class UnitTrained(NamedTuple):
+    """A unit trained by a player."""
+
+    time_ms: int
+    player_index: int
+    squad_id: str
+    instance_id: int
+    supply_cost: int
+    energy_cost: int
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "UnitTrained":
+        """Decode a UnitTrained event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        UnitTrained
+            The typed event.
+        """
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            int(event["PlayerIndex"]),
+            str(event["SquadId"]),
+            int(event["InstanceId"]),
+            int(event.get("SupplyCost", 0)),
+            int(event.get("EnergyCost", 0)),
+        )
+
+
+class BuildingConstructionQueued(NamedTuple):
+    """A building queued by a player."""
+
+    time_ms: int
+    player_index: int
+    building_id: str
+    instance_id: int
+    supply_cost: int
+    energy_cost: int
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "BuildingConstructionQueued":
+        """Decode a BuildingConstructionQueued event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        BuildingConstructionQueued
+            The typed event.
+        """
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            int(event["PlayerIndex"]),
+            str(event["BuildingId"]),
+            int(event["InstanceId"]),
+            int(event.get("SupplyCost", 0)),
+            int(event.get("EnergyCost", 0)),
+        )
+
+
+class BuildingConstructionCompleted(NamedTuple):
+    """A building completed."""
+
+    time_ms: int
+    player_index: int
+    instance_id: int
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "BuildingConstructionCompleted":
+        """Decode a BuildingConstructionCompleted event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        BuildingConstructionCompleted
+            The typed event.
+        """
+        return cls(int(event["TimeSinceStartMilliseconds"]), int(event["PlayerIndex"]), int(event["InstanceId"]))
+
+
+class BuildingUpgraded(NamedTuple):
+    """A building upgraded by a player."""
+
+    time_ms: int
+    player_index: int
+    new_building_id: str
+    instance_id: int
+    supply_cost: int
+    energy_cost: int
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "BuildingUpgraded":
+        """Decode a BuildingUpgraded event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        BuildingUpgraded
+            The typed event.
+        """
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            int(event["PlayerIndex"]),
+            str(event["NewBuildingId"]),
+            int(event["InstanceId"]),
+            int(event.get("SupplyCost", 0)),
+            int(event.get("EnergyCost", 0)),
+        )
+
+
+class Death(NamedTuple):
+    """A unit or building killed."""
+
+    time_ms: int
+    victim_player_index: int
+    victim_object_type_id: str
+    victim_instance_id: int
+    is_suicide: bool
+    # Attacks landed on the victim, by player index, empty when the Participants were dropped
+    attacks: dict[int, int]
+
+    @classmethod
+    def decode(cls, event: Mapping[str, Any]) -> "Death":
+        """Decode a Death event.
+
+        Parameters
+        ----------
+        event : Mapping[str, Any]
+            The event, as returned by the API.
+
+        Returns
+        -------
+        Death
+            The typed event.
+        """
+        return cls(
+            int(event["TimeSinceStartMilliseconds"]),
+            int(event["VictimPlayerIndex"]),
+            str(event["VictimObjectTypeId"]),
+            int(event["VictimInstanceId"]),
+            bool(event.get("IsSuicide")),
+            {
+                int(player_index): sum(
+                    int(stats.get("AttacksLanded", 0))
+                    for object_participant in participant.get("ObjectParticipants", {}).values()
+                    for stats in object_participant.get("CombatStats", {}).values()
+                )
+                for player_index, participant in event.get("Participants", {}).items()
+            },
+        )
+
+
+# Typed events spending supply and energy on a unit or building
+Purchase = UnitTrained | BuildingConstructionQueued | BuildingUpgraded
+
+# Typed events, and events of the other types as returned by the API
+Event = (
+    ResourceHeartbeat
+    | MatchStart
+    | PlayerJoinedMatch
+    | MatchEnd
+    | UnitTrained
+    | BuildingConstructionQueued
+    | BuildingConstructionCompleted
+    | BuildingUpgraded
+    | Death
+    | Mapping[str, Any]
+)
+
+# Decoder of every known event type, by event name
+SCHEMAS: dict[str, Callable[[Mapping[str, Any]], Event]] = {
+    schema.__name__: schema.decode
+    for schema in (
+        ResourceHeartbeat,
+        MatchStart,
+        PlayerJoinedMatch,
+        MatchEnd,
+        UnitTrained,
+        BuildingConstructionQueued,
+        BuildingConstructionCompleted,
+        BuildingUpgraded,
+        Death,
+    )
+}
+
+
+def event_name(event: Event) -> str:
+    """Get the name of an event, typed or not.
+
+    Parameters
+    ----------
+    event : Event
+        A match event.
+
+    Returns
+    -------
+    str
+        The event name.
+    """
+    if isinstance(event, Mapping):
+        return str(event["EventName"])
+    return type(event).__name__
+
+
+def decode_event(event: Event) -> Event:
+    """Decode an event into its typed struct, when its type is known.
+
+    Parameters
+    ----------
+    event : Event
+        A match event, as returned by the API or already typed.
+
+    Returns
+    -------
+    Event
+        The typed event, or the given event when already typed or of an unknown type.
+    """
+    if not isinstance(event, Mapping) or (decode := SCHEMAS.get(event["EventName"])) is None:
+        return event
+    return decode(event)
@@ -0,0 +1,209 @@
+"""HW2_Spy request throttling backends."""
+import abc
+import heapq
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class Throttle(abc.ABC):
+    """Sliding window throttle base class, subclasses define where the window is kept."""
+
+    def __init__(self, max_requests: int = 10, interval_seconds: float = 10) -> None:
+        """Initialize the window limits.
+
+        Parameters
+        ----------
+        max_requests : int, optional
+            The maximum number of requests allowed per interval, by default 10
+        interval_seconds : float, optional
+            The time interval in seconds during which the maximum
+            number of requests is defined, by default 10
+        """
+        self.max_requests = max_requests
+        self.interval_seconds = interval_seconds
+
+    @abc.abstractmethod
+    def try_acquire(self) -> float:
+        """Register a request when it fits in the window.
+
+        Returns
+        -------
+        float
+            0 when the request has been registered, otherwise the
+            seconds to wait before it may fit.
+        """
+
+
+class LocalThrottle(Throttle):
+    """Throttle keeping the sliding window in memory, shared only by the threads of one process."""
+
+    def __init__(self, max_requests: int = 10, interval_seconds: float = 10) -> None:
+        """Initialize the window limits and the in-memory request queue.
+
+        Parameters
+        ----------
+        max_requests : int, optional
+            The maximum number of requests allowed per interval, by default 10
+        interval_seconds : float, optional
+            The time interval in seconds during which the maximum
+            number of requests is defined, by default 10
+        """
+        super().__init__(max_requests, interval_seconds)
+        # Init a request queue
+        self.request_queue: deque[float] = deque()
+        # Serialize access to the request queue, as calls may come from several threads
+        self.request_lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Register a request when it fits in the window.
+
+        The check and the registration happen under the same lock, so concurrent
+        callers can never claim the same free slot of the sliding window.
+
+        Returns
+        -------
+        float
+            0 when the request has been registered, otherwise the
+            seconds to wait before it may fit.
+        """
+        with self.request_lock:
+            current_time = time.time()
+            # clear old requests
+            while self.request_queue and current_time - self.request_queue[0] >= self.interval_seconds:
+                self.request_queue.popleft()
+            if len(self.request_queue) >= self.max_requests:
+                return self.interval_seconds - (current_time - self.request_queue[0])
+            self.request_queue.append(current_time)
+            return 0
+
+
+class SQLiteThrottle(Throttle):
+    """Throttle keeping the sliding window in a SQLite file, shared by every process on the host.
+
+    Each acquisition runs in an immediate transaction, so the database lock serializes
+    the processes checking and claiming the free slots of the window.
+    """
+
+    def __init__(self, path: str | None = None, max_requests: int = 10, interval_seconds: float = 10) -> None:
+        """Initialize the window limits and the database file.
+
+        Parameters
+        ----------
+        path : str | None, optional
+            The database file, if None the one in the package cache
+            folder is used, by default None
+        max_requests : int, optional
+            The maximum number of requests allowed per interval, by default 10
+        interval_seconds : float, optional
+            The time interval in seconds during which the maximum
+            number of requests is defined, by default 10
+        """
+        super().__init__(max_requests, interval_seconds)
+        if path is None:
+            script_directory = os.path.dirname(os.path.abspath(__file__))
+            path = os.path.join(script_directory, "cache", "throttle.sqlite3")
+        self.path = path
+        # make sure folder exists
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS requests (sent REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS requests_sent ON requests (sent)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are opened explicitly
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    def try_acquire(self) -> float:
+        """Register a request when it fits in the window shared by all the processes.
+
+        Returns
+        -------
+        float
+            0 when the request has been registered, otherwise the
+            seconds to wait before it may fit.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            current_time = time.time()
+            # clear old requests
+            conn.execute("DELETE FROM requests WHERE sent <= ?", (current_time - self.interval_seconds,))
+            count, oldest_request_time = conn.execute("SELECT COUNT(*), MIN(sent) FROM requests").fetchone()
+            if count < self.max_requests:
+                conn.execute("INSERT INTO requests (sent) VALUES (?)", (current_time,))
+                wait_time = 0.0
+            else:
+                wait_time = self.interval_seconds - (current_time - oldest_request_time)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return wait_time
+
+
+class PriorityScheduler:
+    """Hand the slots of a throttle out by priority, first come first served within a priority.
+
+    Only the most urgent waiting request polls the throttle, so a request with a
+    lower priority value arriving while others wait for the window is served first.
+    """
+
+    def __init__(self, backend: Throttle) -> None:
+        """Init the waiting queue for the given throttle backend.
+
+        Parameters
+        ----------
+        backend : Throttle
+            The throttle keeping the sliding window of requests.
+        """
+        self.backend = backend
+        # heap of (priority, ticket) waiting for a slot
+        self.waiting: list[tuple[int, int]] = []
+        self.tickets = itertools.count()
+        self.condition = threading.Condition()
+        # whether the most urgent request is polling the backend
+        self.polling = False
+
+    def acquire(self, priority: int = 0) -> None:
+        """Wait until the request is the most urgent one and fits in the window, then register it.
+
+        Parameters
+        ----------
+        priority : int, optional
+            The request priority, lower values are served first, by default 0
+        """
+        with self.condition:
+            ticket = (priority, next(self.tickets))
+            heapq.heappush(self.waiting, ticket)
+            # a more urgent request may have to take over the polling
+            self.condition.notify_all()
+        try:
+            while True:
+                with self.condition:
+                    while self.waiting[0] != ticket or self.polling:
+                        self.condition.wait()
+                    self.polling = True
+                # the backend may block on its own lock or file, so it is polled without holding the condition
+                try:
+                    wait_time = self.backend.try_acquire()
+                finally:
+                    with self.condition:
+                        self.polling = False
+                        self.condition.notify_all()
+                if wait_time <= 0:
+                    return
+                logging.info("Reached max requests. Waiting for %s seconds...", wait_time)
+                with self.condition:
+                    self.condition.wait(wait_time)
+        finally:
+            with self.condition:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
@@ -0,0 +1,111 @@
+"""HW2_Spy player resources timelines."""
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+
+class Timeline:
+    """Columnar timeline of the resources of a player, sampled by the resource heartbeats of a match.
+
+    Every column is an array aligned with the sorted heartbeat times, so sampling at
+    any set of timestamps, detecting tech ups or comparing curves are vectorized.
+    """
+
+    fields = ("Population", "Supply", "Energy", "TechLevel", "Mana", "CommandPoints")
+
+    def __init__(self, rows: Sequence[Sequence[int]]) -> None:
+        """Build the columns from the heartbeat rows of a player.
+
+        Parameters
+        ----------
+        rows : Sequence[Sequence[int]]
+            A row for every heartbeat in time order, with the heartbeat
+            time followed by the value of every field.
+        """
+        table = np.array(rows, dtype=np.int64).reshape(-1, len(self.fields) + 1)
+        self.times = table[:, 0]
+        self.columns = {field: table[:, index] for index, field in enumerate(self.fields, start=1)}
+
+    def __len__(self) -> int:
+        """Get the number of heartbeats.
+
+        Returns
+        -------
+        int
+            The number of heartbeats of the timeline.
+        """
+        return len(self.times)
+
+    def indexes(self, timestamps: Iterable[int]) -> npt.NDArray[np.intp]:
+        """Get the heartbeats sampling a set of timestamps.
+
+        Parameters
+        ----------
+        timestamps : Iterable[int]
+            The timestamps in milliseconds.
+
+        Returns
+        -------
+        npt.NDArray[np.intp]
+            The index of the first heartbeat at or after every timestamp, the
+            timestamps past the last heartbeat are left out.
+        """
+        indexes = np.searchsorted(self.times, np.fromiter(timestamps, dtype=np.int64), side="left")
+        return indexes[indexes < len(self.times)]
+
+    def sample(self, field: str, timestamps: Iterable[int]) -> npt.NDArray[np.int64]:
+        """Sample a field at a set of timestamps.
+
+        Parameters
+        ----------
+        field : str
+            The name of the field.
+        timestamps : Iterable[int]
+            The timestamps in milliseconds.
+
+        Returns
+        -------
+        npt.NDArray[np.int64]
+            The field value at the first heartbeat at or after every timestamp,
+            the timestamps past the last heartbeat are left out.
+        """
+        return self.columns[field][self.indexes(timestamps)]
+
+    def tech_ups(self) -> dict[int, int]:
+        """Get the times the player reached every tech level.
+
+        Returns
+        -------
+        dict[int, int]
+            The time of the last heartbeat reaching every tech level straight
+            from the previous one, by tech level.
+        """
+        tech_levels = self.columns["TechLevel"]
+        # players start the match at the first tech level
+        tech_ups = np.flatnonzero(np.diff(tech_levels, prepend=1) == 1)
+        return {int(tech_levels[index]): int(self.times[index]) for index in tech_ups}
+
+    def compare(self, other: "Timeline", field: str, timestamps: Iterable[int]) -> npt.NDArray[np.int64]:
+        """Compare a field of two timelines at a set of timestamps.
+
+        Parameters
+        ----------
+        other : Timeline
+            The timeline to compare to.
+        field : str
+            The name of the field.
+        timestamps : Iterable[int]
+            The timestamps in milliseconds.
+
+        Returns
+        -------
+        npt.NDArray[np.int64]
+            The difference between the field of this timeline and the other one at
+            every timestamp, up to the last heartbeat of the shortest timeline.
+        """
+        timestamps = list(timestamps)
+        values = self.sample(field, timestamps)
+        other_values = other.sample(field, timestamps)
+        size = min(len(values), len(other_values))
+        return np.subtract(values[:size], other_values[:size])
@@ -8,6 +8,7 @@ from textual.screen import ModalScreen
 from textual.widgets import Footer, Input, Label, Static
 
 from hw2_spy import hw2_spy_data
+from hw2_spy.hw2_spy_throttle import Throttle
 
 
 class GamertagScreen(ModalScreen[str]):
@@ -79,6 +80,19 @@ class Player(ScrollableContainer):
     player_csr3vs3 = reactive("", layout=True)
     player_level = reactive("", layout=True)
 
+    def __init__(self, matches: int = 3, *, id: str | None = None) -> None:  # noqa: A002
+        """Init a player widget.
+
+        Parameters
+        ----------
+        matches : int, optional
+            The number of match widgets, by default 3
+        id : str | None, optional
+            The ID of the widget in the DOM, by default None
+        """
+        self.matches = matches
+        super().__init__(id=id)
+
     def compose(self) -> ComposeResult:
         """Create child widgets of a player."""
         self.add_class("Player")
@@ -109,9 +123,8 @@ class Player(ScrollableContainer):
                     yield Static(id="Ranks1vs1CSR", classes="Ranks1vs1CSR Value")
                     yield Static(id="Ranks2vs2CSR", classes="Ranks2vs2CSR Value")
                     yield Static(id="Ranks3vs3CSR", classes="Ranks3vs3CSR Value")
-        yield Match(id="MatchWidget")
-        yield Match(id="MatchWidget2")
-        yield Match(id="Matchwidget3")
+        for _ in range(self.matches):
+            yield Match()
 
     def watch_player_gamertag(self, new_val: str) -> None:
         """Update player gamertag label when its variable changes.
@@ -413,8 +426,23 @@ class HW2SpyApp(App):
         p2g: str | None = None,
         p3g: str | None = None,
         api_key: str | None = None,
+        throttle_backend: Throttle | None = None,
+        horizon_ms: int | None = None,
+        step_ms: int | None = None,
+        *,
+        match_mode: str | None = None,
+        max_matches: int | None = None,
+        max_pages: int | None = None,
     ) -> None:
         self.mode = mode
+        # Mode of the matches analysed, by default the one played
+        self.match_mode = mode if match_mode is None else match_mode
+        # Analysis horizon and population sampling step of the matches
+        self.horizon_ms = horizon_ms
+        self.step_ms = step_ms
+        # Number of last matches shown, and most pages of the history scanned to find them
+        self.max_matches = hw2_spy_data.PlayerStats.max_matches if max_matches is None else max_matches
+        self.max_pages = max_pages
         self.color = color
         if color not in ("blue", "red"):
             self.color = "blue"
@@ -422,9 +450,9 @@ class HW2SpyApp(App):
         self.p2g = p2g
         self.p3g = p3g
         if api_key is not None:
-            self.hw2api = hw2_spy_data.HW2Api(key=api_key)
+            self.hw2api = hw2_spy_data.HW2Api(key=api_key, throttle_backend=throttle_backend)
         else:
-            self.hw2api = hw2_spy_data.HW2Api()
+            self.hw2api = hw2_spy_data.HW2Api(throttle_backend=throttle_backend)
         super().__init__()
 
     def compose(self) -> ComposeResult:
@@ -432,11 +460,11 @@ class HW2SpyApp(App):
         self.add_class(self.color)
         with Horizontal():
             if self.mode in ("1vs1", "2vs2", "3vs3"):
-                yield Player(id="player1")
+                yield Player(self.max_matches, id="player1")
             if self.mode in ("2vs2", "3vs3"):
-                yield Player(id="player2")
+                yield Player(self.max_matches, id="player2")
             if self.mode == "3vs3":
-                yield Player(id="player3")
+                yield Player(self.max_matches, id="player3")
         yield Footer()
 
     def action_toggle_dark(self) -> None:
@@ -524,7 +552,15 @@ class HW2SpyApp(App):
         dict
             The player data.
         """
-        player_instance = hw2_spy_data.PlayerStats(gamertag, mode, self.hw2api)
+        player_instance = hw2_spy_data.PlayerStats(
+            gamertag,
+            mode,
+            self.hw2api,
+            horizon_ms=self.horizon_ms,
+            step_ms=self.step_ms,
+            max_matches=self.max_matches,
+            max_pages=self.max_pages,
+        )
         new_data: dict[Any, Any] = player_instance.export_json()
         # print(new_data)  # noqa: ERA001
         return new_data
@@ -570,7 +606,7 @@ class HW2SpyApp(App):
         for match in matches:
             if n < len(new_data["matches"]):
                 # match.match_mode = new_data["matches"][n]["Mode"]  # noqa: ERA001
-                match.match_mode = self.mode
+                match.match_mode = self.match_mode
                 if new_data["matches"][n].get("Leader") is not None:
                     match.match_leader = new_data["matches"][n]["Leader"]
                 if new_data["matches"][n].get("Date") is not None:
@@ -614,7 +650,7 @@ class HW2SpyApp(App):
         # iterate matches
         matches = self.query("#player1 Match")
         # get new data
-        new_data = self.get_player_data(player1_gamertag, self.mode)
+        new_data = self.get_player_data(player1_gamertag, self.match_mode)
         self.update_player(player, matches, new_data)
 
     def update_player_2(self, player2_gamertag: str | None = None) -> None:
@@ -633,7 +669,7 @@ class HW2SpyApp(App):
         # iterate matches
         matches = self.query("#player2 Match")
         # get new data
-        new_data = self.get_player_data(player2_gamertag, self.mode)
+        new_data = self.get_player_data(player2_gamertag, self.match_mode)
         self.update_player(player, matches, new_data)
 
     def update_player_3(self, player3_gamertag: str | None = None) -> None:
@@ -652,17 +688,32 @@ class HW2SpyApp(App):
         # iterate matches
         matches = self.query("#player3 Match")
         # get new data
-        new_data = self.get_player_data(player3_gamertag, self.mode)
+        new_data = self.get_player_data(player3_gamertag, self.match_mode)
         self.update_player(player, matches, new_data)
 
     def on_mount(self) -> None:
         """Execute actions on App mount, i.e. update required players."""
-        if self.p1g is not None:
-            self.update_player_1(self.p1g)
-        if self.p2g is not None:
-            self.update_player_2(self.p2g)
-        if self.p3g is not None:
-            self.update_player_3(self.p3g)
+        gamertags = {"player1": self.p1g, "player2": self.p2g, "player3": self.p3g}
+        players = {
+            player_id: hw2_spy_data.PlayerStats(
+                gamertag,
+                self.match_mode,
+                self.hw2api,
+                horizon_ms=self.horizon_ms,
+                step_ms=self.step_ms,
+                max_matches=self.max_matches,
+                max_pages=self.max_pages,
+                lazy=True,
+            )
+            for player_id, gamertag in gamertags.items()
+            if gamertag is not None
+        }
+        # The histories of the whole team first, then a single ratings call per playlist along with the match events
+        hw2_spy_data.resolve_all(players.values())
+        for player_id, player_stats in players.items():
+            player = self.query_one(f"#{player_id}", Player)
+            matches = self.query(f"#{player_id} Match")
+            self.update_player(player, matches, player_stats.export_json())
 
     @staticmethod
     def format_units(units: dict[str, int]) -> str:
@@ -0,0 +1 @@
+"""HW2_Spy tests."""
@@ -0,0 +1,111 @@
+"""Fixtures of the HW2_Spy tests."""
+import copy
+import gzip
+import json
+import os
+import pathlib
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from hw2_spy import hw2_spy_metadata
+from hw2_spy.hw2_spy_cache import CacheStore
+from hw2_spy.hw2_spy_data import HW2Api
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hw2_spy", "samples")
+# ID the sample match events are cached with
+MATCH_ID = "bc300422-8c60-45b2-8784-5356f7d235c0"
+
+
+class SampleResponse:
+    """The bits of an urllib3 response read by HW2Api."""
+
+    def __init__(self, status: int, data: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.status = status
+        self.data = data
+        self.headers = headers or {}
+
+
+class SamplePool:
+    """A stand-in for the urllib3 PoolManager of HW2Api, serving the sample responses.
+
+    The urls requested are kept in `calls`, and the responses queued in `replies`
+    for an url fragment are served before the samples.
+    """
+
+    def __init__(self) -> None:
+        with open(os.path.join(SAMPLES, "player_match_history.json"), "rb") as history_file:
+            self.history = history_file.read()
+        with open(os.path.join(SAMPLES, "match_events.json"), "rb") as events_file:
+            self.events = events_file.read()
+        with open(os.path.join(SAMPLES, "player_playlist_ratings.json"), "rb") as ratings_file:
+            self.ratings = json.load(ratings_file)
+        self.calls: list[str] = []
+        self.replies: dict[str, list[SampleResponse]] = {}
+        self.lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> SampleResponse:  # noqa: ARG002
+        """Serve the queued response or the sample matching the url."""
+        with self.lock:
+            self.calls.append(url)
+            for fragment, replies in self.replies.items():
+                if fragment in url and replies:
+                    return replies.pop(0)
+        if "/events" in url:
+            if not kwargs.get("decode_content", True):
+                return SampleResponse(200, gzip.compress(self.events), {"Content-Encoding": "gzip"})
+            return SampleResponse(200, self.events)
+        if "/matches" in url:
+            return SampleResponse(200, self.history)
+        if "/rating" in url:
+            # the sample ratings, for every player requested
+            ratings = copy.deepcopy(self.ratings)
+            ratings["Results"] = [
+                {**self.ratings["Results"][0], "Id": player} for player in url.split("players=")[1].split(",")
+            ]
+            return SampleResponse(200, json.dumps(ratings).encode())
+        return SampleResponse(404)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def data_directory(tmp_path_factory: pytest.TempPathFactory) -> Iterator[pathlib.Path]:
+    """Keep the metadata index and the unknown units of the tests out of the user data folder."""
+    folder = tmp_path_factory.mktemp("data")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(hw2_spy_metadata, "_data_directory", lambda: str(folder))
+        yield folder
+
+
+def sample_api(folder: pathlib.Path) -> HW2Api:
+    """Get an API instance with its own cache store, holding the sample match events.
+
+    Parameters
+    ----------
+    folder : pathlib.Path
+        The folder of the cache store.
+
+    Returns
+    -------
+    HW2Api
+        The API instance, which never needs to call the API for the sample match.
+    """
+    store = CacheStore(os.path.join(folder, "cache.sqlite3"))
+    with open(os.path.join(SAMPLES, "match_events.json"), "rb") as events_file:
+        store.put("events", MATCH_ID, gzip.compress(events_file.read()))
+    return HW2Api(key="test", cache_store=store)
+
+
+@pytest.fixture()
+def hw2api(tmp_path: pathlib.Path) -> HW2Api:
+    """Get an API instance holding the sample match events in a temporary cache store."""
+    return sample_api(tmp_path)
+
+
+@pytest.fixture()
+def sample_pool(monkeypatch: pytest.MonkeyPatch) -> SamplePool:
+    """Get the sample responses served in place of the API."""
+    pool = SamplePool()
+    monkeypatch.setattr(HW2Api, "http", pool)
+    return pool
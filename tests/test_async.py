@@ -0,0 +1,44 @@
+"""Tests of the asyncio api access."""
+import asyncio
+import pathlib
+import threading
+
+import pytest
+
+from hw2_spy.hw2_spy_async import AsyncHW2Api, AsyncPlayerStats, scout
+from hw2_spy.hw2_spy_data import HW2Api, PlayerStats, resolve_all
+from tests.conftest import sample_api
+
+GAMERTAG = "L1am_Wh1te"
+MODE = "3vs3"
+
+
+def async_threads() -> list[threading.Thread]:
+    """Get the worker threads of the AsyncHW2Api instances still running."""
+    return [thread for thread in threading.enumerate() if thread.name.startswith("AsyncHW2Api")]
+
+
+@pytest.mark.usefixtures("sample_pool")
+def test_scout_matches_sync_stats(hw2api: HW2Api, tmp_path: pathlib.Path) -> None:
+    """The stats scouted concurrently are the ones of the synchronous API."""
+    expected = PlayerStats(GAMERTAG, MODE, sample_api(tmp_path / "sync")).export_json()
+    with_api = asyncio.run(scout({"blue": GAMERTAG, "red": GAMERTAG}, MODE, AsyncHW2Api(hw2api=hw2api)))
+    assert with_api == {"blue": expected, "red": expected}
+
+
+@pytest.mark.usefixtures("sample_pool")
+def test_close_when_idle(hw2api: HW2Api) -> None:
+    """An instance closing when idle leaves no worker thread behind once its calls are done."""
+    player = AsyncPlayerStats(GAMERTAG, MODE, AsyncHW2Api(hw2api=hw2api, close_when_idle=True))
+    asyncio.run(player.afetch())
+    assert player.matches
+    assert not async_threads()
+
+
+@pytest.mark.usefixtures("sample_pool")
+def test_async_stats_substitute_sync_stats(hw2api: HW2Api, tmp_path: pathlib.Path) -> None:
+    """The async player stats can still be fetched synchronously, by resolve_all."""
+    expected = PlayerStats(GAMERTAG, MODE, sample_api(tmp_path / "sync")).export_json()
+    player = AsyncPlayerStats(GAMERTAG, MODE, AsyncHW2Api(hw2api=hw2api))
+    resolve_all([player])
+    assert player.export_json() == expected
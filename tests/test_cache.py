@@ -0,0 +1,150 @@
+"""Tests of the cache store."""
+import gzip
+import os
+import pathlib
+import threading
+
+import pytest
+
+from hw2_spy.hw2_spy_cache import CacheStore, ResponseCache, SingleFlight
+from hw2_spy.hw2_spy_data import HW2Api
+from tests.conftest import SamplePool
+
+
+def test_gc_imports_legacy_events(tmp_path: pathlib.Path) -> None:
+    """The legacy match events files are moved into the store, without replacing the stored events."""
+    folder = tmp_path / "matches" / "events"
+    folder.mkdir(parents=True)
+    (folder / "plain.json").write_bytes(b'{"plain": 1}')
+    (folder / "compressed.json.gz").write_bytes(gzip.compress(b'{"compressed": 1}'))
+    (folder / "stored.json").write_bytes(b'{"legacy": 1}')
+    store = CacheStore(os.path.join(tmp_path, "cache.sqlite3"))
+    store.put("events", "stored", gzip.compress(b'{"stored": 1}'))
+    assert store.import_legacy_events(str(folder)) == 3  # noqa: PLR2004
+    for key, data in (("plain", b'{"plain": 1}'), ("compressed", b'{"compressed": 1}'), ("stored", b'{"stored": 1}')):
+        entry = store.get("events", key)
+        assert entry is not None
+        assert gzip.decompress(entry[0]) == data
+    assert not (tmp_path / "matches").exists()
+
+
+def test_get_updates_old_access_times(tmp_path: pathlib.Path) -> None:
+    """A lookup only updates the access time when older than the granularity."""
+    store = CacheStore(os.path.join(tmp_path, "cache.sqlite3"))
+    store.put("ratings", "recent", b"{}")
+    store.put("ratings", "old", b"{}")
+    conn = store._connect()  # noqa: SLF001
+    conn.execute("UPDATE entries SET accessed = accessed - 100 WHERE key = 'recent'")
+    conn.execute(
+        "UPDATE entries SET accessed = accessed - ? WHERE key = 'old'", (store.access_granularity_seconds + 1,)
+    )
+    before = dict(conn.execute("SELECT key, accessed FROM entries").fetchall())
+    store.get("ratings", "recent")
+    store.get("ratings", "old")
+    after = dict(conn.execute("SELECT key, accessed FROM entries").fetchall())
+    conn.close()
+    assert after["recent"] == before["recent"]
+    assert after["old"] > before["old"] + store.access_granularity_seconds
+
+
+def test_import_legacy_events_race(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The legacy files moved meanwhile by a match events request are skipped."""
+    folder = tmp_path / "events"
+    folder.mkdir()
+    (folder / "moved.json").write_bytes(b'{"moved": 1}')
+    remove = os.remove
+
+    def remove_twice(path: str) -> None:
+        remove(path)
+        remove(path)
+
+    monkeypatch.setattr(os, "listdir", lambda _: ["gone.json", "moved.json"])
+    monkeypatch.setattr(os, "remove", remove_twice)
+    store = CacheStore(os.path.join(tmp_path, "cache.sqlite3"))
+    assert store.import_legacy_events(str(folder)) == 1
+    assert store.get("events", "gone") is None
+    assert store.get("events", "moved") is not None
+
+
+def age_entries(store: CacheStore, seconds: float) -> None:
+    """Make the entries of a store older by a number of seconds."""
+    conn = store._connect()  # noqa: SLF001
+    try:
+        conn.execute("UPDATE entries SET inserted = inserted - ?", (seconds,))
+    finally:
+        conn.close()
+
+
+def test_response_cache_freshness(tmp_path: pathlib.Path) -> None:
+    """A response is fresh for the endpoint time to live, then stale during its stale window, then dropped."""
+    store = CacheStore(os.path.join(tmp_path, "cache.sqlite3"))
+    cache = ResponseCache(store, {"history": 60}, {"history": 600})
+    cache.put("history", "URL", {"Results": []})
+    cache.put("events", "URL", {"Results": []})
+    assert cache.get("history", "url") == ({"Results": []}, True)
+    assert cache.get("events", "url") == (None, False)
+    age_entries(store, 100)
+    assert cache.get("history", "url") == ({"Results": []}, False)
+    age_entries(store, 600)
+    assert cache.get("history", "url") == (None, False)
+
+
+def test_stale_while_revalidate(tmp_path: pathlib.Path, sample_pool: SamplePool) -> None:
+    """A stale response is served straight away while it is refreshed in the background."""
+    store = CacheStore(os.path.join(tmp_path, "cache.sqlite3"))
+    hw2api = HW2Api(
+        key="test", cache_store=store, response_cache=ResponseCache(store, {"history": 60}, {"history": 600})
+    )
+    history = hw2api.get_player_match_history("test")
+    assert history
+    assert hw2api.get_player_match_history("test") == history
+    assert len(sample_pool.calls) == 1
+    age_entries(store, 100)
+    assert hw2api.get_player_match_history("test") == history
+    for thread in threading.enumerate():
+        if thread.name.startswith("revalidate-"):
+            thread.join()
+    assert len(sample_pool.calls) == 2  # noqa: PLR2004
+    # the refreshed response is fresh again
+    assert hw2api.get_player_match_history("test") == history
+    assert len(sample_pool.calls) == 2  # noqa: PLR2004
+    age_entries(store, 1000)
+    assert hw2api.get_player_match_history("test") == history
+    assert len(sample_pool.calls) == 3  # noqa: PLR2004
+
+
+def test_single_flight_shared_load() -> None:
+    """The callers asking for a key being loaded wait for that load and share its result."""
+    registry: SingleFlight[dict[str, int]] = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    loads: list[str] = []
+
+    def loader() -> dict[str, int]:
+        loads.append("loaded")
+        started.set()
+        release.wait(5)
+        return {"events": 1}
+
+    results: list[dict[str, int]] = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("match", loader))) for _ in range(4)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert loads == ["loaded"]
+    assert results == [{"events": 1}] * 4
+    assert all(result is results[0] for result in results)
+
+
+def test_single_flight_empty_result_retried() -> None:
+    """An empty result isn't kept, so the next caller loads the key again."""
+    registry: SingleFlight[dict[str, int]] = SingleFlight()
+    assert registry.get("match", dict) == {}
+    assert registry.get("match", lambda: {"events": 1}) == {"events": 1}
+    assert registry.get("match", dict) == {"events": 1}
+    registry.discard("match")
+    assert registry.get("match", dict) == {}
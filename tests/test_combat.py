@@ -0,0 +1,54 @@
+"""Tests of the combat stats of the whole match."""
+import asyncio
+import json
+import os
+import pathlib
+
+import pytest
+
+from hw2_spy import hw2_spy_metadata
+from hw2_spy.hw2_spy_async import AsyncHW2Api, scout
+from hw2_spy.hw2_spy_data import HW2Api, MatchEvents, PlayerStats
+from tests.conftest import MATCH_ID, sample_api
+
+# Combat stats of every player of the sample match
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "match_combat.json")
+GAMERTAG = "L1am_Wh1te"
+MODE = "3vs3"
+
+
+def load_golden() -> dict[str, dict]:
+    """Load the golden combat stats, keyed by casefolded gamertag."""
+    with open(GOLDEN) as golden_file:
+        return dict(json.load(golden_file))
+
+
+def test_process_combat_golden(hw2api: HW2Api) -> None:
+    """The combat stats of every player of the sample match are the golden ones, and add up."""
+    combat = MatchEvents(MATCH_ID, hw2api=hw2api).process_combat()
+    assert combat == load_golden()
+    for stats in combat.values():
+        for kind, total in (("Kills", "Killed"), ("Losses", "Lost")):
+            for resource in ("Supply", "Energy"):
+                assert sum(entry[resource] for entry in stats[kind].values()) == stats[f"{resource}{total}"]
+        assert stats["Kills"]
+
+
+@pytest.mark.usefixtures("sample_pool")
+def test_player_stats_export_combat(hw2api: HW2Api, tmp_path: pathlib.Path) -> None:
+    """The combat stats of the matches are exported when asked, with the names of the object types."""
+    player = PlayerStats(GAMERTAG, MODE, hw2api, combat=True)
+    golden = load_golden()["l1am wh1te"]
+    registry = hw2_spy_metadata.get_registry()
+    names = {registry.unit_name(object_type) for object_type in golden["Kills"]}
+    stats = player.export_json()
+    assert stats["matches"]
+    for match in stats["matches"]:
+        # every match of the history is served the sample events
+        assert set(match["Combat"]["Kills"]) == names
+        assert match["Combat"]["SupplyKilled"] == golden["SupplyKilled"]
+    assert all("Combat" not in match for match in PlayerStats(GAMERTAG, MODE, hw2api).export_json()["matches"])
+    scouted = asyncio.run(
+        scout({"blue": GAMERTAG}, MODE, AsyncHW2Api(hw2api=sample_api(tmp_path / "async")), combat=True)
+    )
+    assert scouted["blue"] == stats
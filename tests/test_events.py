@@ -0,0 +1,62 @@
+"""Tests of the streaming match events parser."""
+import gzip
+import json
+import os
+
+import pytest
+
+from hw2_spy import hw2_spy_events
+from tests.conftest import SAMPLES
+
+# Analysis horizon of the tests, the sample match lasting about 20 minutes
+HORIZON_MS = 720000
+
+
+@pytest.fixture(scope="module")
+def document() -> str:
+    """Get the sample match events document."""
+    with open(os.path.join(SAMPLES, "match_events.json")) as events_file:
+        return events_file.read()
+
+
+@pytest.mark.parametrize("chunk_size", [97, 4096, hw2_spy_events.CHUNK_SIZE])
+@pytest.mark.parametrize("typed", [True, False])
+def test_chunked_document_matches_whole(document: str, chunk_size: int, typed: bool) -> None:  # noqa: FBT001
+    """The events decoded from a compressed document a chunk at a time are the ones of the whole document."""
+    chunks = hw2_spy_events.iter_gzip_text(gzip.compress(document.encode()), chunk_size)
+    assert hw2_spy_events.load_game_events(chunks, HORIZON_MS, typed=typed) == hw2_spy_events.load_game_events(
+        document, HORIZON_MS, typed=typed
+    )
+
+
+def test_whole_match_within_horizon(document: str) -> None:
+    """Every event is decoded when the whole match fits in the horizon."""
+    chunks = hw2_spy_events.iter_gzip_text(gzip.compress(document.encode()), 4096)
+    assert hw2_spy_events.load_game_events(chunks, 10**9, frozenset()) == {
+        "GameEvents": json.loads(document)["GameEvents"]
+    }
+
+
+def late_events(game_events: list[dict]) -> list[dict]:
+    """Get the events past the first resource heartbeat at or past the horizon."""
+    heartbeat = next(
+        index
+        for index, event in enumerate(game_events)
+        if event["EventName"] == "ResourceHeartbeat" and event["TimeSinceStartMilliseconds"] >= HORIZON_MS
+    )
+    return game_events[heartbeat + 1 :]
+
+
+def test_late_events(document: str) -> None:
+    """Past the horizon, only the late completions, tech ups and the match end are decoded, up to the late horizon."""
+    late = late_events(hw2_spy_events.load_game_events(document, HORIZON_MS)["GameEvents"])
+    assert {event["EventName"] for event in late} == {"BuildingConstructionCompleted", "ResourceHeartbeat", "MatchEnd"}
+    assert late[-1]["EventName"] == "MatchEnd"
+    bounded = hw2_spy_events.load_game_events(document, HORIZON_MS, late_horizon_ms=HORIZON_MS)["GameEvents"]
+    assert late_events(bounded) == late[-1:]
+
+
+def test_truncated_document() -> None:
+    """A truncated compressed document is reported."""
+    with pytest.raises(EOFError):
+        list(hw2_spy_events.iter_gzip_text(gzip.compress(b'{"GameEvents": []}')[:-8]))
@@ -0,0 +1,51 @@
+"""Tests of the match history paging."""
+import asyncio
+import itertools
+import json
+
+from hw2_spy.hw2_spy_async import AsyncHW2Api
+from hw2_spy.hw2_spy_data import HW2Api
+from tests.conftest import SamplePool, SampleResponse
+
+# Matches of every sample history page
+PAGE_SIZE = 25
+
+
+def test_pages_requested_lazily(hw2api: HW2Api, sample_pool: SamplePool) -> None:
+    """A page is only requested once the matches of the previous one are consumed."""
+    matches = hw2api.iter_player_match_history("test", max_pages=3)
+    assert len(list(itertools.islice(matches, PAGE_SIZE))) == PAGE_SIZE
+    assert len(sample_pool.calls) == 1
+    next(matches)
+    assert len(sample_pool.calls) == 2  # noqa: PLR2004
+    assert "start=25" in sample_pool.calls[1]
+    assert len(list(matches)) == 2 * PAGE_SIZE - 1
+    assert len(sample_pool.calls) == 3  # noqa: PLR2004
+
+
+def test_short_page_is_last(hw2api: HW2Api, sample_pool: SamplePool) -> None:
+    """The paging stops after a page shorter than asked."""
+    history = json.loads(sample_pool.history)
+    history["Results"] = history["Results"][:10]
+    sample_pool.replies["start=25"] = [SampleResponse(200, json.dumps(history).encode())]
+    assert len(list(hw2api.iter_player_match_history("test"))) == PAGE_SIZE + 10
+    assert len(sample_pool.calls) == 2  # noqa: PLR2004
+
+
+def test_async_pages_requested_lazily(hw2api: HW2Api, sample_pool: SamplePool) -> None:
+    """The async iterator also requests a page only once the previous one is consumed."""
+
+    async def first_matches(count: int) -> list[dict]:
+        async with AsyncHW2Api(hw2api=hw2api) as async_api:
+            matches = []
+            async for match in async_api.iter_player_match_history("test", max_pages=3):
+                matches.append(match)
+                if len(matches) == count:
+                    break
+            return matches
+
+    assert len(asyncio.run(first_matches(PAGE_SIZE))) == PAGE_SIZE
+    assert len(sample_pool.calls) == 1
+    # the first page is served by the response cache this time
+    assert len(asyncio.run(first_matches(PAGE_SIZE + 1))) == PAGE_SIZE + 1
+    assert len(sample_pool.calls) == 2  # noqa: PLR2004
@@ -0,0 +1,34 @@
+"""Tests of the lazy instances fetched at once."""
+import pathlib
+
+from hw2_spy.hw2_spy_data import HW2Api, MatchEvents, MatchHistory, PlayerStats, PlaylistRatings, resolve_all
+from tests.conftest import MATCH_ID, SamplePool, sample_api
+
+GAMERTAGS = ("L1am_Wh1te", "WayfarerVII")
+MODE = "3vs3"
+
+
+def test_lazy_instances_make_no_request(hw2api: HW2Api, sample_pool: SamplePool) -> None:
+    """Building lazy instances doesn't make any request."""
+    PlayerStats(GAMERTAGS[0], MODE, hw2api, lazy=True)
+    MatchHistory(GAMERTAGS[0], hw2api, lazy=True)
+    MatchEvents(MATCH_ID, GAMERTAGS[0], hw2api, lazy=True)
+    PlaylistRatings(hw2api.play_lists[MODE][0], GAMERTAGS[0], hw2api, lazy=True)
+    assert not sample_pool.calls
+
+
+def test_resolve_all_matches_eager(hw2api: HW2Api, sample_pool: SamplePool, tmp_path: pathlib.Path) -> None:
+    """The lazy instances fetched at once get the data of the eager ones, with every match loaded once."""
+    eager_api = sample_api(tmp_path / "eager")
+    players = [PlayerStats(gamertag, MODE, hw2api, lazy=True) for gamertag in GAMERTAGS]
+    history = MatchHistory(GAMERTAGS[0], hw2api, lazy=True)
+    events = MatchEvents(MATCH_ID, GAMERTAGS[0], hw2api, lazy=True)
+    resolve_all([*players, history, events])
+    calls = list(sample_pool.calls)
+    for player in players:
+        assert player.export_json() == PlayerStats(player.gamertag, MODE, eager_api).export_json()
+    assert history.player_stats == MatchHistory(GAMERTAGS[0], eager_api).player_stats
+    assert events.match_summary == MatchEvents(MATCH_ID, GAMERTAGS[0], eager_api).match_summary
+    # every player shares the sample history, so the same last matches
+    match_ids = {match["MatchId"] for match in players[0].last_matches} - {MATCH_ID}
+    assert sum("/events" in url for url in calls) == len(match_ids)
@@ -0,0 +1,69 @@
+"""Tests of the match events summaries."""
+import json
+import os
+import pathlib
+
+import pytest
+
+from hw2_spy.hw2_spy_data import HW2Api, MatchEvents
+from tests.conftest import MATCH_ID, sample_api
+
+# Summaries of every player of the sample match, as extracted before the events were streamed,
+# typed and dispatched to the extractors
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "match_events_summaries.json")
+# Analysis horizon and population sampling step of the golden summaries
+HORIZON_MS = 720000
+STEP_MS = 120000
+# Most bytes held by an instance which released its events
+RELEASED_MAX_BYTES = 16 * 1024
+
+
+def load_golden() -> dict[str, dict]:
+    """Load the golden summaries, keyed by casefolded gamertag."""
+    with open(GOLDEN) as golden_file:
+        return dict(json.load(golden_file))
+
+
+def test_process_all_matches_golden(hw2api: HW2Api) -> None:
+    """The summaries of every player of the sample match are the golden ones."""
+    match_events = MatchEvents(MATCH_ID, hw2api=hw2api, horizon_ms=HORIZON_MS, step_ms=STEP_MS)
+    assert match_events.process_all() == load_golden()
+
+
+@pytest.mark.parametrize("retain_events", [True, False])
+@pytest.mark.parametrize("gamertag", sorted(load_golden()))
+def test_summary_matches_golden(hw2api: HW2Api, gamertag: str, retain_events: bool) -> None:  # noqa: FBT001
+    """The summary of a player of the sample match is the golden one, whether the events are retained or not."""
+    match_events = MatchEvents(
+        MATCH_ID, gamertag, hw2api, horizon_ms=HORIZON_MS, step_ms=STEP_MS, retain_events=retain_events
+    )
+    assert match_events.match_summary == load_golden()[gamertag]
+
+
+def test_released_events_memory(tmp_path: pathlib.Path) -> None:
+    """An instance which doesn't retain the events only holds the summary of the player."""
+    retained = MatchEvents(MATCH_ID, "L1am Wh1te", sample_api(tmp_path / "retained"), retain_events=True)
+    released = MatchEvents(MATCH_ID, "L1am Wh1te", sample_api(tmp_path / "released"), retain_events=False)
+    assert released.match_summary == retained.match_summary
+    assert released.memory_bytes < RELEASED_MAX_BYTES
+    assert retained.memory_bytes >= RELEASED_MAX_BYTES
+
+
+def test_summarize_many_golden(hw2api: HW2Api, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The summaries of many matches are the golden ones, the matches which fail to load are left out."""
+    broken_match_id = "00000000-0000-0000-0000-000000000000"
+    get_match_events_data = hw2api.get_match_events_data
+
+    def get_data(match_id: str | None = None) -> bytes:
+        if match_id == broken_match_id:
+            raise OSError
+        return get_match_events_data(match_id)
+
+    monkeypatch.setattr(hw2api, "get_match_events_data", get_data)
+    golden = load_golden()
+    pairs = [(MATCH_ID, gamertag) for gamertag in golden] + [(broken_match_id, "L1am Wh1te")]
+    summaries = MatchEvents.summarize_many(hw2api, pairs, max_workers=1, horizon_ms=HORIZON_MS, step_ms=STEP_MS)
+    assert summaries == {(MATCH_ID, gamertag): summary for gamertag, summary in golden.items()}
+    # the summaries stored by the workers are used by the next runs
+    stored = MatchEvents.summarize_many(hw2api, pairs[:1], horizon_ms=HORIZON_MS, step_ms=STEP_MS)
+    assert stored == {pairs[0]: golden[pairs[0][1]]}
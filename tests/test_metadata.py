@@ -0,0 +1,44 @@
+"""Tests of the metadata registry."""
+import gc
+import multiprocessing
+import pathlib
+import weakref
+
+from hw2_spy.hw2_spy_metadata import UnknownUnits
+
+# Writer processes and ids recorded by each one
+WRITERS = 4
+IDS_PER_WRITER = 200
+
+
+def record_ids(path: str, writer: int) -> None:
+    """Record ids unique to a writer, in many batches."""
+    unknown_units = UnknownUnits(path)
+    for index in range(IDS_PER_WRITER):
+        unknown_units.add(f"unit_{writer}_{index}")
+    unknown_units.flush()
+
+
+def test_unknown_units_concurrent_appends(tmp_path: pathlib.Path) -> None:
+    """Concurrent runs only add whole lines to the record, which are all read back."""
+    path = str(tmp_path / "data" / "unknown_units.txt")
+    processes = [multiprocessing.Process(target=record_ids, args=(path, writer)) for writer in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    expected = {f"unit_{writer}_{index}" for writer in range(WRITERS) for index in range(IDS_PER_WRITER)}
+    assert UnknownUnits(path).unit_ids == expected
+    assert len(pathlib.Path(path).read_text().splitlines()) == len(expected)
+
+
+def test_unknown_units_flushed_when_collected(tmp_path: pathlib.Path) -> None:
+    """The ids buffered by an instance are written once it is collected, nothing else keeping it alive."""
+    path = str(tmp_path / "unknown_units.txt")
+    unknown_units = UnknownUnits(path)
+    unknown_units.add("unit_0")
+    reference = weakref.ref(unknown_units)
+    del unknown_units
+    gc.collect()
+    assert reference() is None
+    assert UnknownUnits(path).unit_ids == {"unit_0"}
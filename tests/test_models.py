@@ -0,0 +1,39 @@
+"""Tests of the player stats and match summaries records."""
+from hw2_spy import hw2_spy_metadata
+from hw2_spy.hw2_spy_models import MatchRecord, Rating
+
+
+def test_units_sharing_a_name_are_added_up() -> None:
+    """The counts of the unit ids exported under the same name are added up."""
+    record = MatchRecord(units={"unsc_grunt": 3, "cov_grunt": 2, "unsc_marine": 1})
+    names = {"unsc_grunt": "Grunts", "cov_grunt": "Grunts", "unsc_marine": "Marines"}
+    assert record.export_json(names.__getitem__)["Units"] == {"Grunts": 5, "Marines": 1}
+
+
+def test_rating_export_json() -> None:
+    """The ratings are formatted with the designation name, empty when unknown."""
+    assert Rating(mmr=1234.5678, tier=3, designation=4).export_json("1vs1") == {
+        "mmr1vs1": "1234.57",
+        "csr1vs1": "3 Platinum",
+        "tier1vs1": "3",
+        "designation1vs1": "Platinum",
+    }
+    assert Rating().export_json("2vs2") == {"mmr2vs2": "", "csr2vs2": "", "tier2vs2": "", "designation2vs2": ""}
+
+
+def test_match_record_export_json() -> None:
+    """The times are formatted as minutes and seconds, and the ids as names."""
+    record = MatchRecord.from_summary(
+        {"MatchStartDate": "2023-05-06T07:08:09Z", "Result": 1},
+        {"Leader": 16, "Duration": 754000, "T2": 185500, "Turrets": [61000], "Population": [10, 20], "Kills": 3},
+    )
+    assert record.export_json(str.upper) == {
+        "Kills": 3,
+        "Leader": hw2_spy_metadata.get_registry().leader(16),
+        "Duration": "12:34",
+        "T2": "03:05",
+        "Turrets": ["01:01"],
+        "Population": [10, 20],
+        "Date": "2023-05-06 07:08:09",
+        "Result": "Victory",
+    }
@@ -0,0 +1,16 @@
+"""Tests of the ratings resolution for a whole team."""
+from hw2_spy.hw2_spy_data import HW2Api, PlayerStats, RatingsResolver
+from tests.conftest import SamplePool
+
+
+def test_one_call_per_playlist(hw2api: HW2Api, sample_pool: SamplePool) -> None:
+    """The missing ratings are requested once per playlist for up to 6 players, and fanned out to all of them."""
+    players = [PlayerStats(f"Player{index}", "1vs1", hw2api, resolve_ratings=False, lazy=True) for index in range(7)]
+    for index, player in enumerate(players):
+        player.missing_modes = ["1vs1", "2vs2"] if index < 3 else ["1vs1"]  # noqa: PLR2004
+    RatingsResolver(players, hw2api).resolve()
+    playlists = [url.split("/playlist/")[1].split("/")[0] for url in sample_pool.calls]
+    assert sorted(playlists) == sorted([*hw2api.play_lists["1vs1"][:1] * 2, hw2api.play_lists["2vs2"][0]])
+    for index, player in enumerate(players):
+        assert player.ratings["1vs1"].mmr is not None
+        assert (player.ratings["2vs2"].mmr is not None) == (index < 3)  # noqa: PLR2004
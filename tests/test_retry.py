@@ -0,0 +1,64 @@
+"""Tests of the retries of the API requests."""
+import pytest
+
+from hw2_spy import hw2_spy_data
+from hw2_spy.hw2_spy_data import HW2Api
+from tests.conftest import SamplePool, SampleResponse
+
+HISTORY_URL = "https://www.haloapi.com/stats/hw2/players/test/matches"
+EVENTS_URL = "https://www.haloapi.com/stats/hw2/matches/test/events"
+
+
+@pytest.fixture()
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Get the delays waited before the retries, without jitter nor waiting."""
+    delays: list[float] = []
+    monkeypatch.setattr(hw2_spy_data.hw2_spy_config, "api_retry_backoff_seconds", 1.0)
+    monkeypatch.setattr(hw2_spy_data.random, "uniform", lambda *_: 0.0)
+    monkeypatch.setattr(hw2_spy_data.time, "sleep", delays.append)
+    return delays
+
+
+def test_rate_limited_retry_after(hw2api: HW2Api, sample_pool: SamplePool, sleeps: list[float]) -> None:
+    """A rate limited request is retried after the delay asked by the server."""
+    sample_pool.replies["/matches"] = [SampleResponse(429, headers={"Retry-After": "7"})]
+    assert hw2api._request_raw("history", HISTORY_URL, "match history") == sample_pool.history  # noqa: SLF001
+    assert sleeps == [7.0]
+    assert len(sample_pool.calls) == 2  # noqa: PLR2004
+
+
+def test_server_error_backoff(hw2api: HW2Api, sample_pool: SamplePool, sleeps: list[float]) -> None:
+    """The transient server errors are retried with an exponential backoff."""
+    sample_pool.replies["/matches"] = [SampleResponse(503), SampleResponse(500)]
+    assert hw2api._request_raw("history", HISTORY_URL, "match history") == sample_pool.history  # noqa: SLF001
+    assert sleeps == [1.0, 2.0]
+
+
+def test_attempts_limit(
+    hw2api: HW2Api, sample_pool: SamplePool, sleeps: list[float], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The request is given up once the attempts of the endpoint are spent."""
+    monkeypatch.setitem(hw2_spy_data.hw2_spy_config.api_retry_attempts, "events", 3)
+    sample_pool.replies["/events"] = [SampleResponse(502) for _ in range(5)]
+    assert hw2api._request_raw("events", EVENTS_URL, "match events", compressed=True) == b""  # noqa: SLF001
+    assert len(sample_pool.calls) == 3  # noqa: PLR2004
+    assert sleeps == [1.0, 2.0]
+
+
+def test_time_limit(
+    hw2api: HW2Api, sample_pool: SamplePool, sleeps: list[float], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The request is given up when the next attempt would come past the time allowed to the endpoint."""
+    monkeypatch.setitem(hw2_spy_data.hw2_spy_config.api_retry_seconds, "history", 30)
+    sample_pool.replies["/matches"] = [SampleResponse(429, headers={"Retry-After": "100"})]
+    assert hw2api._request_raw("history", HISTORY_URL, "match history") == b""  # noqa: SLF001
+    assert len(sample_pool.calls) == 1
+    assert not sleeps
+
+
+def test_client_error_not_retried(hw2api: HW2Api, sample_pool: SamplePool, sleeps: list[float]) -> None:
+    """The client errors other than the rate limit are not retried."""
+    sample_pool.replies["/matches"] = [SampleResponse(404)]
+    assert hw2api._request_raw("history", HISTORY_URL, "match history") == b""  # noqa: SLF001
+    assert len(sample_pool.calls) == 1
+    assert not sleeps
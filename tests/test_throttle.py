@@ -0,0 +1,89 @@
+"""Tests of the request throttling backends."""
+import pathlib
+import threading
+import time
+
+import pytest
+
+from hw2_spy.hw2_spy_throttle import PriorityScheduler, SQLiteThrottle, Throttle
+
+# Seconds a test waits for the other threads
+TIMEOUT = 5
+
+
+class BlockingThrottle(Throttle):
+    """A throttle whose polls wait to be released, recording their order."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.polled = threading.Event()
+        self.release = threading.Event()
+        # Names of the threads let in
+        self.served: list[str] = []
+
+    def try_acquire(self) -> float:
+        """Let the request in once released."""
+        self.polled.set()
+        self.release.wait(TIMEOUT)
+        self.served.append(threading.current_thread().name)
+        return 0
+
+
+def wait_queued(scheduler: PriorityScheduler, count: int) -> int:
+    """Wait until a number of requests are queued by the scheduler, returning the number queued."""
+    deadline = time.monotonic() + TIMEOUT
+    while len(scheduler.waiting) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return len(scheduler.waiting)
+
+
+def test_throttle_is_abstract() -> None:
+    """The base class can't be used without a window."""
+    with pytest.raises(TypeError):
+        Throttle()  # type: ignore[abstract]
+
+
+def test_sqlite_throttle_shared_window(tmp_path: pathlib.Path) -> None:
+    """The throttles of the same file share their window."""
+    path = str(tmp_path / "throttle.sqlite3")
+    first = SQLiteThrottle(path, max_requests=2, interval_seconds=60)
+    second = SQLiteThrottle(path, max_requests=2, interval_seconds=60)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert 0 < first.try_acquire() <= 60  # noqa: PLR2004
+    assert 0 < second.try_acquire() <= 60  # noqa: PLR2004
+
+
+def test_scheduler_polls_without_lock() -> None:
+    """The requests arriving while the backend is polled are queued without waiting for it."""
+    backend = BlockingThrottle()
+    scheduler = PriorityScheduler(backend)
+    threads = [threading.Thread(target=scheduler.acquire) for _ in range(2)]
+    threads[0].start()
+    assert backend.polled.wait(TIMEOUT)
+    threads[1].start()
+    queued = wait_queued(scheduler, 2)
+    backend.release.set()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert queued == 2  # noqa: PLR2004
+    assert not scheduler.waiting
+
+
+def test_scheduler_priority_order() -> None:
+    """The waiting requests are let in by priority, then in their order of arrival."""
+    backend = BlockingThrottle()
+    scheduler = PriorityScheduler(backend)
+    # the first request holds the backend while the others queue up
+    first = threading.Thread(target=scheduler.acquire, args=(3,), name="first")
+    first.start()
+    assert backend.polled.wait(TIMEOUT)
+    threads = [first]
+    for name, priority in (("events", 2), ("history", 0), ("ratings", 1), ("history 2", 0)):
+        threads.append(threading.Thread(target=scheduler.acquire, args=(priority,), name=name))
+        threads[-1].start()
+        wait_queued(scheduler, len(threads))
+    backend.release.set()
+    for thread in threads:
+        thread.join(TIMEOUT)
+    assert backend.served == ["first", "history", "history 2", "ratings", "events"]